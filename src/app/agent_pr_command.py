@@ -2,15 +2,17 @@ from __future__ import annotations
 
 import argparse
 import json
+import re
 import shlex
 from dataclasses import dataclass
 from enum import StrEnum
 from pathlib import Path
 
 from core.settings import settings
-from tasks.registry import TaskRegistry
+from tasks.manifest import load_task_manifest
 
 AGENT_PR_PREFIX = "/agent-pr"
+_COMMAND_START = re.compile(rf"^(?=[ \t]*{re.escape(AGENT_PR_PREFIX)}(?:\s|$))", re.MULTILINE)
 
 
 class OutputFormat(StrEnum):
@@ -31,6 +33,80 @@ class ParseResult:
     error_message: str | None
 
 
+@dataclass(frozen=True)
+class BatchParseResult:
+    valid: bool
+    commands: list[AgentPrCommand]
+    error_message: str | None
+
+
+def parse_agent_pr_command_blocks(
+    comment_body: str,
+    *,
+    supported_task_ids: set[str] | None = None,
+) -> BatchParseResult:
+    """Parse every `/agent-pr` command in a comment; any invalid command rejects the batch.
+
+    Each command starts on a line beginning with the prefix and runs until the
+    next such line, so quoted JSON payloads may still span several lines.
+    """
+    text = comment_body.strip()
+    if not text.startswith(AGENT_PR_PREFIX):
+        return BatchParseResult(
+            valid=False,
+            commands=[],
+            error_message=f"Command must start with '{AGENT_PR_PREFIX}'.",
+        )
+
+    if supported_task_ids is None:
+        supported_task_ids = set(
+            load_task_manifest(settings.task_config_dir, cache_dir=settings.cache_dir).ids()
+        )
+    blocks = [block.strip() for block in _COMMAND_START.split(text) if block.strip()]
+    commands: list[AgentPrCommand] = []
+    for index, block in enumerate(blocks, start=1):
+        result = parse_agent_pr_comment(block, supported_task_ids=supported_task_ids)
+        if not result.valid or result.command is None:
+            message = result.error_message or "Unknown parse error"
+            if len(blocks) > 1:
+                message = f"Command {index}: {message}"
+            return BatchParseResult(valid=False, commands=[], error_message=message)
+        commands.append(result.command)
+    return BatchParseResult(valid=True, commands=commands, error_message=None)
+
+
+def commands_to_json(commands: list[AgentPrCommand]) -> str:
+    return json.dumps(
+        [
+            {"task_id": command.task_id, "payload": json.loads(command.payload_json)}
+            for command in commands
+        ],
+        ensure_ascii=True,
+        separators=(",", ":"),
+    )
+
+
+def commands_from_json(text: str) -> list[AgentPrCommand]:
+    loaded = json.loads(text)
+    if not isinstance(loaded, list):
+        raise ValueError("commands JSON must be a list")
+    commands: list[AgentPrCommand] = []
+    for item in loaded:
+        if (
+            not isinstance(item, dict)
+            or not isinstance(item.get("task_id"), str)
+            or not isinstance(item.get("payload"), dict)
+        ):
+            raise ValueError("each command must be an object with task_id and payload")
+        commands.append(
+            AgentPrCommand(
+                task_id=item["task_id"],
+                payload_json=json.dumps(item["payload"], ensure_ascii=True, separators=(",", ":")),
+            )
+        )
+    return commands
+
+
 def parse_agent_pr_comment(
     comment_body: str,
     *,
@@ -69,7 +145,9 @@ def parse_agent_pr_comment(
         )
 
     task_id, payload_json = parts
-    known_task_ids = supported_task_ids or set(TaskRegistry(settings.task_config_dir).list_ids())
+    known_task_ids = supported_task_ids or set(
+        load_task_manifest(settings.task_config_dir, cache_dir=settings.cache_dir).ids()
+    )
     if task_id not in known_task_ids:
         known = ", ".join(sorted(known_task_ids))
         return ParseResult(
@@ -102,13 +180,18 @@ def parse_agent_pr_comment(
     )
 
 
-def _format_output_lines(result: ParseResult, output_format: OutputFormat) -> list[str]:
+def _format_output_lines(
+    result: ParseResult | BatchParseResult,
+    output_format: OutputFormat,
+) -> list[str]:
     key_map = (
         {
             "valid": "valid",
             "task_id": "task_id",
             "payload_json": "payload_json",
             "error_message": "error_message",
+            "command_count": "command_count",
+            "commands_json": "commands_json",
         }
         if output_format == OutputFormat.GITHUB
         else {
@@ -116,9 +199,24 @@ def _format_output_lines(result: ParseResult, output_format: OutputFormat) -> li
             "task_id": "TASK_ID",
             "payload_json": "PAYLOAD_JSON",
             "error_message": "ERROR_MESSAGE",
+            "command_count": "COMMAND_COUNT",
+            "commands_json": "COMMANDS_JSON",
         }
     )
 
+    if isinstance(result, BatchParseResult):
+        # task_id/payload_json describe the first command for single-command consumers.
+        first = result.commands[0] if result.valid and result.commands else None
+        lines = _format_output_lines(
+            ParseResult(valid=first is not None, command=first, error_message=result.error_message),
+            output_format,
+        )
+        return [
+            *lines,
+            f"{key_map['command_count']}={len(result.commands)}",
+            f"{key_map['commands_json']}={commands_to_json(result.commands)}",
+        ]
+
     if result.valid and result.command is not None:
         return [
             f"{key_map['valid']}=true",
@@ -136,7 +234,11 @@ def _format_output_lines(result: ParseResult, output_format: OutputFormat) -> li
     ]
 
 
-def _write_output(path: Path, result: ParseResult, output_format: OutputFormat) -> None:
+def _write_output(
+    path: Path,
+    result: ParseResult | BatchParseResult,
+    output_format: OutputFormat,
+) -> None:
     if output_format not in {OutputFormat.GITHUB, OutputFormat.DOTENV}:
         raise ValueError(f"Unsupported output format: {output_format}")
 
@@ -147,7 +249,11 @@ def _write_output(path: Path, result: ParseResult, output_format: OutputFormat)
 
 def main() -> None:
     parser = argparse.ArgumentParser(description="Parse /agent-pr command body")
-    parser.add_argument("--comment", required=True, help="Issue comment body")
+    parser.add_argument(
+        "--comment",
+        required=True,
+        help="Issue comment body; one /agent-pr command per line",
+    )
     parser.add_argument(
         "--output-file",
         required=True,
@@ -161,7 +267,7 @@ def main() -> None:
     )
     args = parser.parse_args()
 
-    result = parse_agent_pr_comment(args.comment)
+    result = parse_agent_pr_command_blocks(args.comment)
     _write_output(
         path=Path(args.output_file),
         result=result,
@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from app.agent_pr_command import (
+    AgentPrCommand,
+    commands_from_json,
+    parse_agent_pr_command_blocks,
+)
+
+if TYPE_CHECKING:
+    from core.service import AgentService
+
+
+def run_agent_pr_commands(
+    service: AgentService,
+    commands: list[AgentPrCommand],
+    *,
+    max_concurrency: int | None = None,
+) -> dict[str, Any]:
+    """Run parsed commands concurrently and pair each response with its command."""
+    batch = service.run_many(
+        [(command.task_id, json.loads(command.payload_json)) for command in commands],
+        max_concurrency=max_concurrency,
+    )
+    results = [
+        {
+            "task_id": command.task_id,
+            "payload_json": command.payload_json,
+            "status": response.get("status"),
+            "response": response,
+        }
+        for command, response in zip(commands, batch["results"], strict=True)
+    ]
+    return {**batch, "results": results}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run /agent-pr commands in one process")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--comment", help="Issue comment body with /agent-pr commands")
+    source.add_argument(
+        "--commands-json",
+        help="commands_json output of app.agent_pr_command",
+    )
+    parser.add_argument("--max-concurrency", type=int, default=None)
+    parser.add_argument("--output-file", help="Also write the JSON report to this path")
+    parser.add_argument(
+        "--fail-on-error",
+        action="store_true",
+        help="Exit with status 1 when any command fails",
+    )
+    args = parser.parse_args()
+
+    if args.comment is not None:
+        parsed = parse_agent_pr_command_blocks(args.comment)
+        if not parsed.valid:
+            parser.error(parsed.error_message or "Invalid /agent-pr comment")
+        commands = parsed.commands
+    else:
+        try:
+            commands = commands_from_json(args.commands_json)
+        except ValueError as exc:
+            parser.error(str(exc))
+    if not commands:
+        parser.error("No /agent-pr commands to run")
+
+    from core.service import AgentService
+
+    report = run_agent_pr_commands(
+        AgentService(),
+        commands,
+        max_concurrency=args.max_concurrency,
+    )
+    rendered = json.dumps(report, ensure_ascii=True, indent=2)
+    print(rendered)
+    if args.output_file:
+        Path(args.output_file).write_text(f"{rendered}\n", encoding="utf-8")
+    if args.fail_on_error and report["failed"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
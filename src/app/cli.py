@@ -1,19 +1,69 @@
 import argparse
 import json
-from typing import Any
+import sys
+from collections import deque
+from collections.abc import Iterable, Iterator
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import TYPE_CHECKING, Any, Protocol, TextIO
 
-from core.service import AgentService
+from app.daemon import default_socket_path, request_daemon
+
+if TYPE_CHECKING:
+    from core.service import AgentService
+
+
+class TaskRunner(Protocol):
+    def run_task(self, task_id: str, payload: dict[str, Any]) -> dict[str, Any]: ...
 
 
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Run p4agent demo tasks")
-    parser.add_argument("--task-id", required=True, help="Task identifier from configs/tasks")
+    parser.add_argument("--task-id", help="Task identifier from configs/tasks")
+    parser.add_argument("--input-json", help="Raw JSON payload object for the task")
+    parser.add_argument(
+        "--input-jsonl",
+        help=(
+            "File of JSON lines, or '-' for stdin. Each line is "
+            '{"task_id": ..., "payload": {...}}; task_id defaults to --task-id'
+        ),
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Parallel runs in --input-jsonl mode (default: P4AGENT_BATCH_MAX_CONCURRENCY)",
+    )
+    parser.add_argument(
+        "--unordered",
+        action="store_true",
+        help="Emit --input-jsonl results as they complete instead of in input order",
+    )
     parser.add_argument(
-        "--input-json",
-        required=True,
-        help="Raw JSON payload object for the task",
+        "--resume",
+        metavar="RUN_ID",
+        help="Continue a failed run from its last successful step",
     )
-    return parser.parse_args()
+    parser.add_argument(
+        "--daemon",
+        action="store_true",
+        help="Keep a warm service on a local Unix socket for later CLI calls",
+    )
+    parser.add_argument(
+        "--no-daemon",
+        action="store_true",
+        help="Always run in-process, even when a daemon is listening",
+    )
+    args = parser.parse_args()
+    if args.daemon or args.resume is not None:
+        return args
+    if args.input_jsonl is None:
+        if args.task_id is None or args.input_json is None:
+            parser.error("--task-id and --input-json are required without --input-jsonl")
+    elif args.input_json is not None:
+        parser.error("--input-json and --input-jsonl are mutually exclusive")
+    if args.workers is not None and args.workers < 1:
+        parser.error("--workers must be at least 1")
+    return args
 
 
 def build_payload(args: argparse.Namespace) -> dict[str, Any]:
@@ -23,9 +73,135 @@ def build_payload(args: argparse.Namespace) -> dict[str, Any]:
     return loaded
 
 
+def parse_jsonl_item(line: str, default_task_id: str | None) -> tuple[str, dict[str, Any]]:
+    loaded = json.loads(line)
+    if not isinstance(loaded, dict):
+        raise ValueError("line must decode to a JSON object")
+    task_id = loaded.get("task_id", default_task_id)
+    if not isinstance(task_id, str) or not task_id:
+        raise ValueError("line has no task_id and --task-id was not given")
+    payload = loaded.get("payload", {})
+    if not isinstance(payload, dict):
+        raise ValueError("payload must be a JSON object")
+    return task_id, payload
+
+
+def run_jsonl(
+    service: TaskRunner,
+    lines: Iterable[str],
+    *,
+    default_task_id: str | None,
+    workers: int,
+    ordered: bool = True,
+) -> Iterator[dict[str, Any]]:
+    """Run one task per non-blank line and yield a record per line.
+
+    At most `2 * workers` lines are in flight, so input is consumed lazily and
+    memory stays flat for arbitrarily long inputs.
+    """
+    window = 2 * workers
+    pending: deque[Future[dict[str, Any]]] = deque()
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="p4agent-cli") as pool:
+        for line_no, line in enumerate(lines, start=1):
+            if not line.strip():
+                continue
+            pending.append(pool.submit(_run_line, service, line_no, line, default_task_id))
+            if len(pending) >= window:
+                yield from _drain(pending, ordered=ordered, until=window - 1)
+        yield from _drain(pending, ordered=ordered, until=0)
+
+
+def _drain(
+    pending: deque[Future[dict[str, Any]]],
+    *,
+    ordered: bool,
+    until: int,
+) -> Iterator[dict[str, Any]]:
+    while len(pending) > until:
+        if ordered:
+            yield pending.popleft().result()
+            continue
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in [future for future in pending if future in done]:
+            pending.remove(future)
+            yield future.result()
+
+
+def _run_line(
+    service: TaskRunner,
+    line_no: int,
+    line: str,
+    default_task_id: str | None,
+) -> dict[str, Any]:
+    try:
+        task_id, payload = parse_jsonl_item(line, default_task_id)
+    except ValueError as exc:
+        result: dict[str, Any] = {
+            "status": "failed",
+            "error": {"code": "INVALID_INPUT", "message": str(exc)},
+        }
+        return {"line": line_no, "task_id": None, "result": result}
+    try:
+        result = service.run_task(task_id=task_id, payload=payload)
+    except Exception as exc:
+        result = {
+            "status": "failed",
+            "task_id": task_id,
+            "error": {"code": "INTERNAL_ERROR", "message": str(exc)},
+        }
+    return {"line": line_no, "task_id": task_id, "result": result}
+
+
+def build_service() -> "AgentService":
+    # Imported lazily: the daemon client path must not pay for langgraph/langchain.
+    from core.service import AgentService
+
+    return AgentService()
+
+
 def main() -> None:
     args = parse_args()
-    payload = build_payload(args)
-    service = AgentService()
-    result = service.run_task(task_id=args.task_id, payload=payload)
-    print(json.dumps(result, ensure_ascii=True, indent=2))
+    if args.daemon:
+        from app.daemon import serve_daemon
+
+        serve_daemon(default_socket_path())
+        return
+
+    if args.resume is not None:
+        resumed = build_service().resume(args.resume)
+        print(json.dumps(resumed, ensure_ascii=True, indent=2))
+        return
+
+    if args.input_jsonl is None:
+        payload = build_payload(args)
+        result = None
+        if not args.no_daemon:
+            result = request_daemon(default_socket_path(), args.task_id, payload)
+        if result is None:
+            result = build_service().run_task(task_id=args.task_id, payload=payload)
+        print(json.dumps(result, ensure_ascii=True, indent=2))
+        return
+
+    service = build_service()
+    if args.input_jsonl == "-":
+        _print_jsonl(service, sys.stdin, args)
+        return
+    with open(args.input_jsonl, encoding="utf-8") as file_obj:
+        _print_jsonl(service, file_obj, args)
+
+
+def _print_jsonl(service: TaskRunner, lines: TextIO, args: argparse.Namespace) -> None:
+    workers = args.workers
+    if workers is None:
+        from core.settings import settings
+
+        workers = settings.batch_max_concurrency
+    records = run_jsonl(
+        service,
+        lines,
+        default_task_id=args.task_id,
+        workers=workers,
+        ordered=not args.unordered,
+    )
+    for record in records:
+        print(json.dumps(record, ensure_ascii=True), flush=True)
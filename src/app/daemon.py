@@ -0,0 +1,209 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import signal
+import socket
+import socketserver
+import stat
+import tempfile
+import threading
+from contextlib import suppress
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from core.service import AgentService
+
+SOCKET_ENV = "P4AGENT_CLI_SOCKET"
+CONNECT_TIMEOUT_SECONDS = 0.2
+# Environment variables `core.settings.Settings` reads, by prefix.
+_SETTINGS_ENV_PREFIXES = ("P4AGENT_", "OPENAI_", "ANTHROPIC_", "AZURE_OPENAI_")
+
+
+class DaemonRequestError(RuntimeError):
+    """Raised when the daemon accepted a request but could not run it."""
+
+
+def default_socket_path() -> Path:
+    """Per-user socket path, overridable with `P4AGENT_CLI_SOCKET`.
+
+    Lives in `$XDG_RUNTIME_DIR` when set, otherwise in a private directory
+    under the temp dir. Read straight from the environment so the thin client
+    never has to import the settings stack.
+    """
+    configured = os.environ.get(SOCKET_ENV)
+    if configured:
+        return Path(configured)
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir:
+        return Path(runtime_dir) / "p4agent.sock"
+    return Path(tempfile.gettempdir()) / f"p4agent-{os.getuid()}" / "cli.sock"
+
+
+def settings_fingerprint() -> str:
+    """Hash of the settings inputs: the relevant environment and `./.env`.
+
+    Computed without importing the settings stack, so the thin client stays
+    cheap. A client and daemon with different fingerprints would run tasks
+    with different configs.
+    """
+    env = sorted(
+        (name, value)
+        for name, value in os.environ.items()
+        if name.startswith(_SETTINGS_ENV_PREFIXES) and name != SOCKET_ENV
+    )
+    digest = hashlib.sha256(json.dumps(env).encode("utf-8"))
+    with suppress(OSError):
+        digest.update(Path(".env").read_bytes())
+    return digest.hexdigest()
+
+
+def request_daemon(
+    socket_path: Path,
+    task_id: str,
+    payload: dict[str, Any],
+) -> dict[str, Any] | None:
+    """Run a task on the resident daemon; None when no compatible daemon is reachable.
+
+    Only a socket owned by the current user is used, so another local user
+    cannot receive the payload by binding the path first. Once the request is
+    sent, the task may have run, so a lost connection raises
+    `DaemonRequestError` instead of returning None for an in-process rerun.
+    """
+    if not _owned_socket(socket_path):
+        return None
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        client.settimeout(CONNECT_TIMEOUT_SECONDS)
+        try:
+            client.connect(str(socket_path))
+        except OSError:
+            return None
+        # Tasks may run for minutes; only the connect is time-boxed.
+        client.settimeout(None)
+        request = {
+            "task_id": task_id,
+            "payload": payload,
+            "cwd": os.getcwd(),
+            "settings": settings_fingerprint(),
+        }
+        try:
+            client.sendall(json.dumps(request, ensure_ascii=True).encode("utf-8") + b"\n")
+            with client.makefile("rb") as reader:
+                line = reader.readline()
+        except OSError as exc:
+            raise DaemonRequestError(f"Lost the connection to the daemon: {exc}") from exc
+    finally:
+        client.close()
+
+    if not line:
+        raise DaemonRequestError("The daemon closed the connection before replying")
+    reply = json.loads(line)
+    if reply.get("status") in ("cwd_mismatch", "settings_mismatch"):
+        return None
+    if reply.get("status") != "ok":
+        raise DaemonRequestError(str(reply.get("error", "daemon request failed")))
+    result: dict[str, Any] = reply["result"]
+    return result
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    server: DaemonServer
+
+    def handle(self) -> None:
+        line = self.rfile.readline()
+        if not line:
+            return
+        reply = self.server.dispatch(line)
+        self.wfile.write(json.dumps(reply, ensure_ascii=True, default=str).encode("utf-8"))
+        self.wfile.write(b"\n")
+
+
+class DaemonServer(socketserver.ThreadingUnixStreamServer):
+    """Unix-socket server that runs newline-delimited JSON task requests."""
+
+    daemon_threads = True
+
+    def __init__(self, socket_path: Path, service: AgentService) -> None:
+        self.service = service
+        self.socket_path = socket_path
+        self.cwd = os.getcwd()
+        self.settings_fingerprint = settings_fingerprint()
+        socket_path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+        _remove_stale_socket(socket_path)
+        # Created owner-only, with no window where other users could connect.
+        umask = os.umask(0o177)
+        try:
+            super().__init__(str(socket_path), _RequestHandler)
+        finally:
+            os.umask(umask)
+
+    def dispatch(self, line: bytes) -> dict[str, Any]:
+        try:
+            request = json.loads(line)
+            task_id = request["task_id"]
+            payload = request["payload"]
+        except (ValueError, KeyError, TypeError) as exc:
+            return {"status": "error", "error": f"Malformed request: {exc}"}
+        # Payload paths and the task config dir are resolved against the daemon's
+        # cwd, so callers elsewhere must run in-process instead.
+        if request.get("cwd") != self.cwd:
+            return {"status": "cwd_mismatch", "cwd": self.cwd}
+        # Likewise for settings: the daemon loaded its own at startup.
+        if request.get("settings") != self.settings_fingerprint:
+            return {"status": "settings_mismatch"}
+        try:
+            result = self.service.run_task(task_id=task_id, payload=payload)
+        except Exception as exc:
+            return {"status": "error", "error": str(exc)}
+        return {"status": "ok", "result": result}
+
+    def server_close(self) -> None:
+        super().server_close()
+        self.socket_path.unlink(missing_ok=True)
+
+
+def serve_daemon(socket_path: Path) -> None:
+    """Build a warm AgentService and serve it on `socket_path` until SIGTERM/SIGINT."""
+    from core.service import AgentService
+
+    service = AgentService()
+    service.warmup()
+    service.watch_task_configs()
+    server = DaemonServer(socket_path, service)
+
+    def _stop(signum: int, frame: object) -> None:
+        del signum, frame
+        threading.Thread(target=server.shutdown, daemon=True).start()
+
+    signal.signal(signal.SIGTERM, _stop)
+    signal.signal(signal.SIGINT, _stop)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        service.shutdown()
+
+
+def _owned_socket(socket_path: Path) -> bool:
+    try:
+        info = socket_path.stat()
+    except OSError:
+        return False
+    return stat.S_ISSOCK(info.st_mode) and info.st_uid == os.getuid()
+
+
+def _remove_stale_socket(socket_path: Path) -> None:
+    if not socket_path.exists():
+        return
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(str(socket_path))
+    except (ConnectionRefusedError, FileNotFoundError):
+        socket_path.unlink(missing_ok=True)
+        return
+    finally:
+        probe.close()
+    raise RuntimeError(f"A p4agent daemon is already listening on {socket_path}")
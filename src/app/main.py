@@ -1,10 +1,30 @@
-from collections.abc import Generator
+import json
+from collections.abc import AsyncIterator, Generator, Iterable, Iterator
+from contextlib import asynccontextmanager
+from threading import Lock
+from typing import Annotated, Any
 
-import uvicorn
-from fastapi import FastAPI, HTTPException
+from fastapi import Depends, FastAPI, Header, HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from pydantic import BaseModel, Field
 
+from app.webhook import (
+    CommentEvent,
+    MalformedEventError,
+    WebhookBot,
+    github_comment_event,
+    gitlab_comment_event,
+    verify_github_signature,
+    verify_gitlab_token,
+)
+from core.admission import TaskOverloadedError
+from core.jobs import JobNotCancellableError, JobNotFoundError, JobQueueFullError
+from core.metrics import REGISTRY
+from core.runs import RunInProgressError, RunNotFoundError
 from core.service import AgentService
+from core.settings import settings
+from infra.forge import build_publisher
 
 
 class RunTaskRequest(BaseModel):
@@ -12,11 +32,68 @@ class RunTaskRequest(BaseModel):
     payload: dict[str, object]
 
 
+class RunBatchRequest(BaseModel):
+    items: list[RunTaskRequest] = Field(min_length=1, max_length=settings.batch_max_items)
+    max_concurrency: int | None = Field(default=None, ge=1)
+
+
+_service: AgentService | None = None
+_service_lock = Lock()
+
+
+def get_shared_service() -> AgentService:
+    """Return the process-wide service, building it on first use."""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = AgentService()
+        return _service
+
+
+def shutdown_shared_service() -> None:
+    global _service
+    with _service_lock:
+        service, _service = _service, None
+    if service is not None:
+        service.shutdown()
+
+
 def service_provider() -> Generator[AgentService, None, None]:
-    yield AgentService()
+    yield get_shared_service()
+
+
+_bot: WebhookBot | None = None
+_bot_lock = Lock()
+
+
+def bot_provider() -> WebhookBot:
+    """Return the process-wide webhook bot, bound to the shared service."""
+    global _bot
+    with _bot_lock:
+        if _bot is None:
+            _bot = WebhookBot(get_shared_service(), build_publisher(settings))
+        return _bot
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI) -> AsyncIterator[None]:
+    service = get_shared_service()
+    if settings.api_worker_warmup:
+        service.warmup()
+    service.watch_task_configs()
+    try:
+        if settings.forge_provider.strip().lower() != "none":
+            # Fail startup, not the first webhook, on a missing token or an unsafe checkout.
+            bot_provider()
+        yield
+    finally:
+        shutdown_shared_service()
+
 
+app = FastAPI(title="p4agent-demo", version="0.1.0", lifespan=lifespan)
 
-app = FastAPI(title="p4agent-demo", version="0.1.0")
+ServiceDep = Annotated[AgentService, Depends(service_provider)]
+BotDep = Annotated[WebhookBot, Depends(bot_provider)]
 
 
 @app.get("/health")
@@ -24,23 +101,191 @@ def health() -> dict[str, str]:
     return {"status": "ok"}
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics() -> PlainTextResponse:
+    return PlainTextResponse(
+        REGISTRY.render(),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
+
+
 @app.get("/tasks")
-def list_tasks() -> dict[str, list[str]]:
-    service = AgentService()
-    return {"tasks": service.list_tasks()}
+def list_tasks(service: ServiceDep, verbose: bool = False) -> dict[str, list[object]]:
+    if verbose:
+        return {"tasks": list(service.describe_tasks())}
+    return {"tasks": list(service.list_tasks())}
 
 
 @app.post("/run")
-def run_task(req: RunTaskRequest) -> dict[str, object]:
-    service = AgentService()
+async def run_task(
+    req: RunTaskRequest,
+    service: ServiceDep,
+    idempotency_key: Annotated[str | None, Header()] = None,
+) -> dict[str, object]:
     try:
-        return service.run_task(task_id=req.task_id, payload=req.payload)
+        return await service.arun_task(
+            task_id=req.task_id,
+            payload=req.payload,
+            idempotency_key=idempotency_key,
+        )
     except KeyError as exc:
         raise HTTPException(status_code=404, detail=str(exc)) from exc
+    except TaskOverloadedError as exc:
+        raise _too_many_requests(exc) from exc
+
+
+@app.post("/run/batch")
+def run_batch(req: RunBatchRequest, service: ServiceDep) -> dict[str, object]:
+    return service.run_many(
+        [(item.task_id, item.payload) for item in req.items],
+        max_concurrency=req.max_concurrency,
+    )
+
+
+@app.post("/run/stream")
+def run_task_stream(req: RunTaskRequest, service: ServiceDep) -> StreamingResponse:
+    try:
+        events = service.stream_task(task_id=req.task_id, payload=req.payload)
+    except TaskOverloadedError as exc:
+        raise _too_many_requests(exc) from exc
+    return StreamingResponse(
+        _format_sse(events),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.post("/jobs", status_code=status.HTTP_202_ACCEPTED)
+def submit_job(req: RunTaskRequest, service: ServiceDep) -> dict[str, object]:
+    try:
+        job = service.submit_job(task_id=req.task_id, payload=req.payload)
+    except KeyError as exc:
+        raise HTTPException(status_code=404, detail=str(exc)) from exc
+    except JobQueueFullError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(exc),
+            headers={"Retry-After": "1"},
+        ) from exc
+    return {"job_id": job.id, "status": job.status.value}
+
+
+@app.get("/jobs/{job_id}")
+def get_job(job_id: str, service: ServiceDep) -> dict[str, object]:
+    try:
+        return service.get_job(job_id).to_dict()
+    except JobNotFoundError as exc:
+        raise HTTPException(status_code=404, detail=str(exc)) from exc
+
+
+@app.delete("/jobs/{job_id}")
+def cancel_job(job_id: str, service: ServiceDep) -> dict[str, object]:
+    try:
+        return service.cancel_job(job_id).to_dict()
+    except JobNotFoundError as exc:
+        raise HTTPException(status_code=404, detail=str(exc)) from exc
+    except JobNotCancellableError as exc:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(exc)) from exc
+
+
+@app.get("/runs/{run_id}")
+def get_run(run_id: str, service: ServiceDep) -> dict[str, object]:
+    try:
+        return service.get_run(run_id)
+    except RunNotFoundError as exc:
+        raise HTTPException(status_code=404, detail=str(exc)) from exc
+
+
+@app.post("/runs/{run_id}/resume")
+def resume_run(run_id: str, service: ServiceDep) -> dict[str, object]:
+    try:
+        return service.resume(run_id)
+    except RunNotFoundError as exc:
+        raise HTTPException(status_code=404, detail=str(exc)) from exc
+    except RunInProgressError as exc:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(exc)) from exc
+    except TaskOverloadedError as exc:
+        raise _too_many_requests(exc) from exc
+
+
+@app.post("/webhooks/github", status_code=status.HTTP_202_ACCEPTED)
+async def github_webhook(
+    request: Request,
+    bot: BotDep,
+    x_github_event: Annotated[str | None, Header()] = None,
+    x_hub_signature_256: Annotated[str | None, Header()] = None,
+) -> dict[str, object]:
+    if not settings.webhook_github_secret:
+        raise HTTPException(status_code=404, detail="GitHub webhook is not configured")
+    body = await request.body()
+    if not verify_github_signature(settings.webhook_github_secret, body, x_hub_signature_256):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Bad signature")
+    try:
+        event = github_comment_event(x_github_event, _json_body(body))
+    except MalformedEventError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return await _dispatch_comment(bot, event)
+
+
+@app.post("/webhooks/gitlab", status_code=status.HTTP_202_ACCEPTED)
+async def gitlab_webhook(
+    request: Request,
+    bot: BotDep,
+    x_gitlab_token: Annotated[str | None, Header()] = None,
+) -> dict[str, object]:
+    if not settings.webhook_gitlab_token:
+        raise HTTPException(status_code=404, detail="GitLab webhook is not configured")
+    if not verify_gitlab_token(settings.webhook_gitlab_token, x_gitlab_token):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Bad token")
+    try:
+        event = gitlab_comment_event(_json_body(await request.body()))
+    except MalformedEventError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return await _dispatch_comment(bot, event)
+
+
+async def _dispatch_comment(bot: WebhookBot, event: CommentEvent | None) -> dict[str, object]:
+    if event is None:
+        return {"status": "ignored"}
+    try:
+        # Parsing and rejection replies may hit the forge API; keep them off the event loop.
+        return await run_in_threadpool(bot.handle, event)
+    except JobQueueFullError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(exc),
+            headers={"Retry-After": "1"},
+        ) from exc
+
+
+def _json_body(body: bytes) -> dict[str, Any]:
+    try:
+        loaded = json.loads(body)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail="Body must be JSON") from exc
+    if not isinstance(loaded, dict):
+        raise HTTPException(status_code=400, detail="Body must be a JSON object")
+    return loaded
+
+
+def _format_sse(events: Iterable[dict[str, object]]) -> Iterator[str]:
+    for event in events:
+        data = json.dumps(event, ensure_ascii=True, default=str)
+        yield f"event: {event['event']}\ndata: {data}\n\n"
+
+
+def _too_many_requests(exc: TaskOverloadedError) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail=str(exc),
+        headers={"Retry-After": str(exc.retry_after)},
+    )
 
 
 def run() -> None:
-    uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=False)
+    from app.serve import main as serve_main
+
+    serve_main()
 
 
 # hello from p4agent
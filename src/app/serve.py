@@ -0,0 +1,285 @@
+from __future__ import annotations
+
+import gc
+import logging
+import os
+import signal
+import socket
+from collections.abc import Callable
+from contextlib import suppress
+from time import monotonic, sleep
+from types import FrameType
+from typing import Any
+
+import uvicorn
+
+from core.settings import settings
+
+logger = logging.getLogger(__name__)
+
+WorkerSpawner = Callable[[int], int]
+
+
+def serve(
+    *,
+    host: str,
+    port: int,
+    workers: int,
+    graceful_timeout: float,
+    max_requests: int | None = None,
+) -> None:
+    """Serve the API, pre-forking `workers` processes when more than one is requested.
+
+    In pre-fork mode the parent imports the app, loads the task registry and
+    compiles the graph before forking, so workers share those pages
+    copy-on-write. Each worker then runs the FastAPI lifespan, which warms its
+    own per-process resources (job workers, handler pools).
+    """
+    if workers <= 1:
+        uvicorn.run(
+            "app.main:app",
+            host=host,
+            port=port,
+            reload=False,
+            timeout_graceful_shutdown=int(graceful_timeout),
+            limit_max_requests=max_requests,
+        )
+        return
+
+    listener = bind_socket(host, port)
+    app = preload_app()
+
+    def _spawn(_: int) -> int:
+        return _fork_worker(
+            app,
+            listener,
+            graceful_timeout=graceful_timeout,
+            max_requests=max_requests,
+        )
+
+    supervisor = PreforkSupervisor(
+        workers=workers,
+        graceful_timeout=graceful_timeout,
+        spawn_worker=_spawn,
+    )
+    try:
+        supervisor.run()
+    finally:
+        listener.close()
+
+
+def bind_socket(host: str, port: int) -> socket.socket:
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    listener = socket.socket(family, socket.SOCK_STREAM)
+    listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    listener.bind((host, port))
+    listener.listen(2048)
+    listener.set_inheritable(True)
+    return listener
+
+
+def preload_app() -> Any:
+    """Import the app and build the shared service in the parent process."""
+    from app.main import app, get_shared_service
+
+    get_shared_service().preload()
+    # Move everything allocated so far out of the GC's reach so collections in
+    # workers do not touch (and un-share) the preloaded pages.
+    gc.freeze()
+    return app
+
+
+class PreforkSupervisor:
+    """Keep `workers` child processes alive; SIGHUP rolls them, SIGTERM/SIGINT stops.
+
+    A worker that crashes is respawned after `backoff_seconds`, doubling with
+    each further crash up to `max_backoff_seconds`. A clean exit (for example
+    after `max_requests`), or a crash after running longer than the maximum
+    delay, resets the delay.
+    """
+
+    def __init__(
+        self,
+        *,
+        workers: int,
+        graceful_timeout: float,
+        spawn_worker: WorkerSpawner,
+        poll_seconds: float = 0.2,
+        backoff_seconds: float = 0.5,
+        max_backoff_seconds: float = 30.0,
+    ) -> None:
+        self._workers = workers
+        self._graceful_timeout = graceful_timeout
+        self._spawn_worker = spawn_worker
+        self._poll_seconds = poll_seconds
+        self._backoff_seconds = backoff_seconds
+        self._max_backoff_seconds = max_backoff_seconds
+        self._pids: dict[int, int] = {}
+        self._started: dict[int, float] = {}
+        self._crashes: dict[int, int] = {}
+        self._respawn_at: dict[int, float] = {}
+        self._stopping = False
+        self._restart_requested = False
+
+    @property
+    def pids(self) -> dict[int, int]:
+        return dict(self._pids)
+
+    def run(self) -> None:
+        signal.signal(signal.SIGTERM, self._on_stop_signal)
+        signal.signal(signal.SIGINT, self._on_stop_signal)
+        signal.signal(signal.SIGHUP, self._on_restart_signal)
+        self.spawn_missing()
+        while not self._stopping:
+            self.reap()
+            if self._restart_requested:
+                self._restart_requested = False
+                self.rolling_restart()
+            self.spawn_missing()
+            sleep(self._poll_seconds)
+        self.shutdown()
+
+    def request_stop(self) -> None:
+        self._stopping = True
+
+    def request_restart(self) -> None:
+        self._restart_requested = True
+
+    def spawn_missing(self) -> None:
+        now = monotonic()
+        for index in range(self._workers):
+            if index in self._pids or self._stopping:
+                continue
+            if now < self._respawn_at.get(index, 0.0):
+                continue
+            self._start(index)
+
+    def reap(self) -> list[int]:
+        exited: list[int] = []
+        for index, pid in list(self._pids.items()):
+            status = _exit_status(pid)
+            if status is None:
+                continue
+            del self._pids[index]
+            exited.append(pid)
+            self._schedule_respawn(index, pid, status)
+        return exited
+
+    def rolling_restart(self) -> None:
+        """Replace workers one at a time so the socket always has a listener."""
+        for index, old_pid in list(self._pids.items()):
+            self._start(index)
+            self._terminate([old_pid])
+
+    def shutdown(self) -> None:
+        self._stopping = True
+        pids = list(self._pids.values())
+        self._pids.clear()
+        self._terminate(pids)
+
+    def _start(self, index: int) -> None:
+        self._pids[index] = self._spawn_worker(index)
+        self._started[index] = monotonic()
+
+    def _schedule_respawn(self, index: int, pid: int, status: int) -> None:
+        now = monotonic()
+        uptime = now - self._started.get(index, now)
+        if status == 0 or uptime > self._max_backoff_seconds:
+            self._crashes[index] = 0
+        if status == 0:
+            self._respawn_at[index] = 0.0
+            return
+        crashes = self._crashes[index] = self._crashes.get(index, 0) + 1
+        delay = min(self._backoff_seconds * 2 ** (crashes - 1), self._max_backoff_seconds)
+        self._respawn_at[index] = now + delay
+        logger.warning(
+            "Worker %d (pid %d) exited with status %d; respawning in %.1fs",
+            index,
+            pid,
+            status,
+            delay,
+        )
+
+    def _terminate(self, pids: list[int]) -> None:
+        for pid in pids:
+            _signal_quietly(pid, signal.SIGTERM)
+        deadline = monotonic() + self._graceful_timeout
+        remaining = list(pids)
+        while remaining and monotonic() < deadline:
+            remaining = [pid for pid in remaining if not _try_wait(pid)]
+            if remaining:
+                sleep(0.05)
+        for pid in remaining:
+            _signal_quietly(pid, signal.SIGKILL)
+            _try_wait(pid, block=True)
+
+    def _on_stop_signal(self, signum: int, frame: FrameType | None) -> None:
+        del signum, frame
+        self.request_stop()
+
+    def _on_restart_signal(self, signum: int, frame: FrameType | None) -> None:
+        del signum, frame
+        self.request_restart()
+
+
+def _fork_worker(
+    app: Any,
+    listener: socket.socket,
+    *,
+    graceful_timeout: float,
+    max_requests: int | None,
+) -> int:
+    pid = os.fork()
+    if pid != 0:
+        return pid
+
+    exit_code = 0
+    try:
+        for signum in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP):
+            signal.signal(signum, signal.SIG_DFL)
+        config = uvicorn.Config(
+            app,
+            lifespan="on",
+            timeout_graceful_shutdown=int(graceful_timeout),
+            limit_max_requests=max_requests,
+        )
+        uvicorn.Server(config).run(sockets=[listener])
+    except BaseException:
+        logger.exception("API worker %d crashed", os.getpid())
+        exit_code = 1
+    finally:
+        os._exit(exit_code)
+
+
+def _try_wait(pid: int, *, block: bool = False) -> bool:
+    try:
+        waited_pid, _ = os.waitpid(pid, 0 if block else os.WNOHANG)
+    except ChildProcessError:
+        return True
+    return waited_pid == pid
+
+
+def _exit_status(pid: int) -> int | None:
+    """The worker's exit code (negative for a signal), or None while it runs."""
+    try:
+        waited_pid, status = os.waitpid(pid, os.WNOHANG)
+    except ChildProcessError:
+        return 0
+    if waited_pid != pid:
+        return None
+    return os.waitstatus_to_exitcode(status)
+
+
+def _signal_quietly(pid: int, signum: int) -> None:
+    with suppress(ProcessLookupError):
+        os.kill(pid, signum)
+
+
+def main() -> None:
+    serve(
+        host=settings.api_host,
+        port=settings.api_port,
+        workers=settings.api_workers,
+        graceful_timeout=settings.api_graceful_timeout_seconds,
+        max_requests=settings.api_worker_max_requests,
+    )
@@ -0,0 +1,271 @@
+from __future__ import annotations
+
+import hashlib
+import hmac
+import json
+import logging
+from collections import deque
+from collections.abc import Callable
+from dataclasses import dataclass
+from functools import partial
+from threading import Lock
+from typing import Any, Protocol
+from uuid import uuid4
+
+from app.agent_pr_command import AGENT_PR_PREFIX, AgentPrCommand, parse_agent_pr_command_blocks
+from core.jobs import Job, JobCallback, JobStatus
+from infra.forge import ChangeRequest, ForgeThread, Publisher
+
+logger = logging.getLogger(__name__)
+
+
+class MalformedEventError(ValueError):
+    """A webhook payload is missing fields its event type requires."""
+
+
+class JobSubmitter(Protocol):
+    def submit_job(
+        self,
+        task_id: str,
+        payload: dict[str, Any],
+        *,
+        on_finished: JobCallback | None = None,
+    ) -> Job: ...
+
+
+@dataclass(frozen=True)
+class CommentEvent:
+    thread: ForgeThread
+    body: str
+    url: str
+    author: str
+
+
+def verify_github_signature(secret: str, body: bytes, signature: str | None) -> bool:
+    if not signature or not signature.startswith("sha256="):
+        return False
+    expected = hmac.new(secret.encode("utf-8"), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(f"sha256={expected}", signature)
+
+
+def verify_gitlab_token(expected: str, provided: str | None) -> bool:
+    return provided is not None and hmac.compare_digest(expected, provided)
+
+
+def github_comment_event(event_name: str | None, payload: dict[str, Any]) -> CommentEvent | None:
+    """Extract a newly created issue comment; PR comments and other events return None.
+
+    Commands are taken from issues only, as the GitHub Actions workflow does.
+    """
+    if event_name != "issue_comment" or payload.get("action") != "created":
+        return None
+    try:
+        issue = payload["issue"]
+        if issue.get("pull_request") is not None:
+            return None
+        comment = payload["comment"]
+        return CommentEvent(
+            thread=ForgeThread(
+                repository=payload["repository"]["full_name"],
+                number=int(issue["number"]),
+            ),
+            body=comment.get("body") or "",
+            url=comment.get("html_url", ""),
+            author=comment.get("user", {}).get("login", ""),
+        )
+    except (KeyError, TypeError, ValueError, AttributeError) as exc:
+        raise MalformedEventError(f"Malformed issue_comment payload: {exc!r}") from exc
+
+
+def gitlab_comment_event(payload: dict[str, Any]) -> CommentEvent | None:
+    """Extract an issue/MR note from a GitLab note hook; other events return None."""
+    if payload.get("object_kind") != "note":
+        return None
+    try:
+        attributes = payload["object_attributes"]
+        noteable_type = attributes.get("noteable_type")
+        if noteable_type == "Issue":
+            number, kind = payload["issue"]["iid"], "issue"
+        elif noteable_type == "MergeRequest":
+            number, kind = payload["merge_request"]["iid"], "merge_request"
+        else:
+            return None
+        return CommentEvent(
+            thread=ForgeThread(
+                repository=payload["project"]["path_with_namespace"],
+                number=int(number),
+                kind=kind,
+            ),
+            body=attributes.get("note") or "",
+            url=attributes.get("url", ""),
+            author=payload.get("user", {}).get("username", ""),
+        )
+    except (KeyError, TypeError, ValueError, AttributeError) as exc:
+        raise MalformedEventError(f"Malformed note payload: {exc!r}") from exc
+
+
+class _CommentRun:
+    """Collects the jobs of one comment and fires `on_complete` after the last one.
+
+    `abandon` stops waiting for jobs that were never submitted; `on_complete`
+    then fires once the submitted ones finish, with `abandoned=True`.
+    """
+
+    def __init__(self, expected: int, on_complete: Callable[[list[Job], bool], None]) -> None:
+        self._jobs: list[Job | None] = [None] * expected
+        self._remaining = expected
+        self._on_complete = on_complete
+        self._abandoned = False
+        self._lock = Lock()
+
+    def job_finished(self, index: int, job: Job) -> None:
+        with self._lock:
+            self._jobs[index] = job
+            self._remaining -= 1
+            done = self._remaining == 0
+        if done:
+            self._fire()
+
+    def abandon(self, submitted: int) -> None:
+        with self._lock:
+            self._abandoned = True
+            self._remaining -= len(self._jobs) - submitted
+            done = self._remaining == 0
+        if done:
+            self._fire()
+
+    def _fire(self) -> None:
+        self._on_complete([job for job in self._jobs if job is not None], self._abandoned)
+
+
+class WebhookBot:
+    """Queues `/agent-pr` comment commands on the service and publishes the outcome.
+
+    Every run shares one working tree, so comments take turns: a comment's
+    jobs are submitted only after the tree is reset to the base branch, and
+    the next comment starts once the previous one is published or discarded.
+    """
+
+    def __init__(self, service: JobSubmitter, publisher: Publisher) -> None:
+        self._service = service
+        self._publisher = publisher
+        self._lock = Lock()
+        self._busy = False
+        self._waiting: deque[tuple[CommentEvent, list[AgentPrCommand]]] = deque()
+
+    def handle(self, event: CommentEvent) -> dict[str, Any]:
+        if not event.body.strip().startswith(AGENT_PR_PREFIX):
+            return {"status": "ignored"}
+
+        parsed = parse_agent_pr_command_blocks(event.body)
+        if not parsed.valid:
+            self._publisher.reply(
+                event.thread,
+                f"I could not parse this command.\n\nReason: {parsed.error_message}",
+            )
+            return {"status": "rejected", "error": parsed.error_message}
+
+        with self._lock:
+            if self._busy:
+                self._waiting.append((event, parsed.commands))
+                return {"status": "waiting", "ahead": len(self._waiting)}
+            self._busy = True
+        return {"status": "queued", "job_ids": self._start(event, parsed.commands)}
+
+    def _start(self, event: CommentEvent, commands: list[AgentPrCommand]) -> list[str]:
+        # Whether it succeeds or not, this ends in exactly one `_finish` call,
+        # which hands the working tree to the next comment.
+        run = _CommentRun(len(commands), partial(self._finish, event, commands))
+        job_ids: list[str] = []
+        try:
+            self._publisher.prepare_workspace()
+            for index, command in enumerate(commands):
+                job = self._service.submit_job(
+                    command.task_id,
+                    json.loads(command.payload_json),
+                    on_finished=partial(run.job_finished, index),
+                )
+                job_ids.append(job.id)
+        except Exception:
+            run.abandon(len(job_ids))
+            raise
+        return job_ids
+
+    def _finish(
+        self,
+        event: CommentEvent,
+        commands: list[AgentPrCommand],
+        jobs: list[Job],
+        abandoned: bool,
+    ) -> None:
+        try:
+            if abandoned:
+                self._publisher.discard_changes()
+            else:
+                self._publish(event, commands, jobs)
+        except Exception:
+            logger.exception("Finishing comment %s failed", event.url)
+        finally:
+            self._start_next()
+
+    def _start_next(self) -> None:
+        with self._lock:
+            if not self._waiting:
+                self._busy = False
+                return
+            event, commands = self._waiting.popleft()
+        try:
+            self._start(event, commands)
+        except Exception as exc:
+            # `_start` already handed the tree on; only the author needs to know.
+            logger.exception("Starting queued comment %s failed", event.url)
+            self._publisher.reply(event.thread, f"Could not start the queued command: {exc}")
+
+    def _publish(
+        self, event: CommentEvent, commands: list[AgentPrCommand], jobs: list[Job]
+    ) -> None:
+        lines = [f"- `{command.task_id}` `{command.payload_json}`" for command in commands]
+        failed = [job for job in jobs if job.status != JobStatus.SUCCEEDED]
+        if failed:
+            self._publisher.discard_changes()
+            details = [f"- `{job.task_id}`: {_job_error(job)}" for job in failed]
+            self._publisher.reply(
+                event.thread,
+                "\n".join(["Task run failed; no changes were published.", "", *details]),
+            )
+            return
+
+        task_ids = ", ".join(dict.fromkeys(command.task_id for command in commands))
+        change = ChangeRequest(
+            branch=f"agent/{event.thread.kind}-{event.thread.number}-{uuid4().hex[:8]}",
+            title=f"agent: {task_ids} for #{event.thread.number}",
+            body="\n".join(
+                [
+                    "## Summary",
+                    "- Triggered by comment command.",
+                    *lines,
+                    "",
+                    "## Source",
+                    f"- Comment: {event.url}",
+                ]
+            ),
+            commit_message=f"feat(agent): run {task_ids} with payload",
+        )
+        try:
+            url = self._publisher.publish_changes(event.thread, change)
+        except Exception as exc:
+            self._publisher.discard_changes()
+            self._publisher.reply(event.thread, f"Publishing changes failed: {exc}")
+            return
+        if url is None:
+            message = "Task ran successfully, but no file changes were detected."
+        else:
+            message = f"Draft change request created.\n\nURL: {url}"
+        self._publisher.reply(event.thread, "\n".join([message, "", *lines]))
+
+
+def _job_error(job: Job) -> str:
+    if job.error:
+        return job.error
+    error = (job.result or {}).get("error") or {}
+    return f"{error.get('code', job.status.value)}: {error.get('message', '')}".rstrip(": ")
@@ -1,5 +1,17 @@
 """Core runtime abstractions and orchestration."""
 
-from core.service import AgentService
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from core.service import AgentService
 
 __all__ = ["AgentService"]
+
+
+def __getattr__(name: str) -> Any:
+    # Resolved lazily so importing e.g. core.settings does not build the service stack.
+    if name == "AgentService":
+        from core.service import AgentService
+
+        return AgentService
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
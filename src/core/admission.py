@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import math
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from threading import Condition, Lock
+from time import monotonic
+
+from core.metrics import ADMISSION_REJECTIONS
+
+
+class TaskOverloadedError(RuntimeError):
+    """Raised when a task's concurrency slots and wait queue are both full."""
+
+    def __init__(self, task_id: str, retry_after: int) -> None:
+        super().__init__(f"Task '{task_id}' is at capacity; retry after {retry_after}s")
+        self.task_id = task_id
+        self.retry_after = retry_after
+
+
+class _Gate:
+    def __init__(self, max_concurrency: int, max_queue_depth: int) -> None:
+        self.max_concurrency = max_concurrency
+        self.max_queue_depth = max_queue_depth
+        self.condition = Condition()
+        self.running = 0
+        self.waiting = 0
+        self.avg_seconds = 0.0
+
+
+class AdmissionController:
+    """Per-task concurrency slots with a bounded wait queue.
+
+    Up to `max_concurrency` runs of a task execute at once and up to
+    `max_queue_depth` more wait for a slot. Anything beyond that, or a waiter
+    that does not get a slot within `max_wait_seconds`, is rejected with a
+    Retry-After estimate based on the task's recent run time.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_wait_seconds: float,
+        clock: Callable[[], float] = monotonic,
+        smoothing: float = 0.2,
+    ) -> None:
+        self._max_wait_seconds = max_wait_seconds
+        self._clock = clock
+        self._smoothing = smoothing
+        self._gates: dict[str, _Gate] = {}
+        self._lock = Lock()
+
+    @contextmanager
+    def admit(
+        self,
+        task_id: str,
+        *,
+        max_concurrency: int | None,
+        max_queue_depth: int,
+    ) -> Iterator[None]:
+        release = self.acquire(
+            task_id,
+            max_concurrency=max_concurrency,
+            max_queue_depth=max_queue_depth,
+        )
+        try:
+            yield
+        finally:
+            release()
+
+    def acquire(
+        self,
+        task_id: str,
+        *,
+        max_concurrency: int | None,
+        max_queue_depth: int,
+    ) -> Callable[[], None]:
+        """Take a slot for `task_id`, returning the callable that gives it back."""
+        if max_concurrency is None:
+            return _noop
+        gate = self._gate(task_id, max_concurrency, max_queue_depth)
+        with gate.condition:
+            if (gate.max_concurrency, gate.max_queue_depth) != (max_concurrency, max_queue_depth):
+                # The task's constraints changed, e.g. after a config reload.
+                gate.max_concurrency = max_concurrency
+                gate.max_queue_depth = max_queue_depth
+                gate.condition.notify_all()
+            if gate.running >= gate.max_concurrency:
+                if gate.waiting >= gate.max_queue_depth:
+                    raise self._reject(task_id, gate)
+                gate.waiting += 1
+                try:
+                    admitted = gate.condition.wait_for(
+                        lambda: gate.running < gate.max_concurrency,
+                        timeout=self._max_wait_seconds,
+                    )
+                finally:
+                    gate.waiting -= 1
+                if not admitted:
+                    raise self._reject(task_id, gate)
+            gate.running += 1
+        started = self._clock()
+        released = False
+
+        def release() -> None:
+            nonlocal released
+            if released:
+                return
+            released = True
+            self._release(gate, self._clock() - started)
+
+        return release
+
+    def snapshot(self, task_id: str) -> dict[str, int]:
+        with self._lock:
+            gate = self._gates.get(task_id)
+        if gate is None:
+            return {"running": 0, "waiting": 0}
+        with gate.condition:
+            return {"running": gate.running, "waiting": gate.waiting}
+
+    def _gate(self, task_id: str, max_concurrency: int, max_queue_depth: int) -> _Gate:
+        with self._lock:
+            gate = self._gates.get(task_id)
+            if gate is None:
+                gate = self._gates[task_id] = _Gate(max_concurrency, max_queue_depth)
+            return gate
+
+    def _release(self, gate: _Gate, elapsed: float) -> None:
+        with gate.condition:
+            gate.running -= 1
+            if gate.avg_seconds == 0.0:
+                gate.avg_seconds = elapsed
+            else:
+                gate.avg_seconds += self._smoothing * (elapsed - gate.avg_seconds)
+            gate.condition.notify()
+
+    @staticmethod
+    def _reject(task_id: str, gate: _Gate) -> TaskOverloadedError:
+        ADMISSION_REJECTIONS.inc(task_id=task_id)
+        backlog = gate.waiting + 1
+        estimate = gate.avg_seconds * backlog / gate.max_concurrency
+        return TaskOverloadedError(task_id, retry_after=max(1, math.ceil(estimate)))
+
+
+def _noop() -> None:
+    return None
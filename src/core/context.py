@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from time import perf_counter
+from typing import TYPE_CHECKING, Any
+
+from core.metrics import HANDLER_DURATION, TASK_ERRORS
+from core.routing import TaskRouter
+from tasks.registry import TaskRegistry, TaskSpec
+
+if TYPE_CHECKING:
+    from tasks.handlers.base import TaskHandler
+
+
+class SubtaskError(RuntimeError):
+    """A sub-task failed; `code` uses the same values as a failed task response."""
+
+    def __init__(self, task_id: str, code: str, message: str) -> None:
+        super().__init__(message)
+        self.task_id = task_id
+        self.code = code
+
+
+class ExecutionContext:
+    """Lets a running handler invoke other tasks by id.
+
+    Sub-tasks go through the service's loaded registry and router, so they use
+    the same warm handler instances, and get the orchestrator's payload
+    validation, handler metrics and error codes. Each call is recorded in
+    `spans`; calls made by the sub-task itself become its `children`. `path`
+    holds the span names leading to the sub-task that owns this context.
+    """
+
+    def __init__(
+        self,
+        task_registry: TaskRegistry,
+        task_router: TaskRouter,
+        *,
+        path: tuple[str, ...] = (),
+    ) -> None:
+        self._task_registry = task_registry
+        self._task_router = task_router
+        self.path = path
+        self._started = perf_counter()
+        self.spans: list[dict[str, Any]] = []
+
+    def run_subtask(
+        self,
+        task_id: str,
+        payload: dict[str, Any],
+        *,
+        name: str | None = None,
+    ) -> dict[str, Any]:
+        with self._subtask(task_id, payload, name) as call:
+            call.result = call.handler.execute(call.payload, call.spec)
+        return call.result
+
+    async def arun_subtask(
+        self,
+        task_id: str,
+        payload: dict[str, Any],
+        *,
+        name: str | None = None,
+    ) -> dict[str, Any]:
+        with self._subtask(task_id, payload, name) as call:
+            call.result = await call.handler.aexecute(call.payload, call.spec)
+        return call.result
+
+    @contextmanager
+    def _subtask(
+        self,
+        task_id: str,
+        payload: dict[str, Any],
+        name: str | None,
+    ) -> Iterator[_SubtaskCall]:
+        started = perf_counter()
+        span: dict[str, Any] = {
+            "name": name or task_id,
+            "task_id": task_id,
+            "started_ms": int((started - self._started) * 1000),
+        }
+        self.spans.append(span)
+        child = ExecutionContext(
+            self._task_registry, self._task_router, path=(*self.path, span["name"])
+        )
+        try:
+            code = "TASK_NOT_FOUND"
+            spec = self._task_registry.get(task_id)
+            code = "TASK_NOT_ROUTED"
+            handler = self._task_router.route(task_id)
+            code = "INVALID_PAYLOAD"
+            call = _SubtaskCall(handler, spec, handler.validate_payload(payload, spec))
+            code = "EXECUTION_ERROR"
+            with HANDLER_DURATION.time(task_id=task_id), context_scope(child):
+                yield call
+            code = "INVALID_OUTPUT"
+            response = handler.format_response(spec=spec, result=call.result, llm_error=None)
+            handler.validate_output(response, spec)
+        except Exception as exc:
+            _finish_span(span, started, child, status="failed", code=code, message=str(exc))
+            TASK_ERRORS.inc(task_id=task_id, code=code)
+            raise SubtaskError(task_id, code, str(exc)) from exc
+        except BaseException:
+            _finish_span(span, started, child, status="cancelled")
+            raise
+        _finish_span(span, started, child, status="ok")
+
+
+@dataclass
+class _SubtaskCall:
+    handler: TaskHandler
+    spec: TaskSpec
+    payload: dict[str, Any]
+    result: dict[str, Any] = field(default_factory=dict)
+
+
+def _finish_span(
+    span: dict[str, Any],
+    started: float,
+    child: ExecutionContext,
+    *,
+    status: str,
+    code: str | None = None,
+    message: str | None = None,
+) -> None:
+    span["status"] = status
+    span["duration_ms"] = int((perf_counter() - started) * 1000)
+    if code is not None:
+        span["error"] = {"code": code, "message": message}
+    if child.spans:
+        span["children"] = child.spans
+
+
+_current_context: ContextVar[ExecutionContext | None] = ContextVar(
+    "p4agent_execution_context",
+    default=None,
+)
+
+
+def current_context() -> ExecutionContext:
+    """The context of the task being executed; sub-tasks need one."""
+    context = _current_context.get()
+    if context is None:
+        raise RuntimeError("Sub-tasks can only be invoked while the orchestrator runs a task")
+    return context
+
+
+@contextmanager
+def context_scope(context: ExecutionContext) -> Iterator[None]:
+    token = _current_context.set(context)
+    try:
+        yield
+    finally:
+        _current_context.reset(token)
@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any
+
+StepEventSink = Callable[[dict[str, Any]], None]
+
+_step_event_sink: ContextVar[StepEventSink | None] = ContextVar(
+    "p4agent_step_event_sink",
+    default=None,
+)
+
+
+def emit_step_event(event: dict[str, Any]) -> None:
+    """Forward a sub-step progress event to the active sink, if any."""
+    sink = _step_event_sink.get()
+    if sink is not None:
+        sink(event)
+
+
+@contextmanager
+def step_event_sink(sink: StepEventSink) -> Iterator[None]:
+    """Route `emit_step_event` calls made in this context to `sink`."""
+    token = _step_event_sink.set(sink)
+    try:
+        yield
+    finally:
+        _step_event_sink.reset(token)
@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from contextlib import suppress
+from dataclasses import dataclass, field
+from threading import Event, Lock
+from time import monotonic
+from typing import Any
+
+Result = dict[str, Any]
+
+
+def payload_fingerprint(task_id: str, payload: dict[str, Any]) -> str:
+    """Stable hash of a task invocation, independent of payload key order."""
+    canonical = json.dumps(
+        {"task_id": task_id, "payload": payload},
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=True,
+        default=str,
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class _Flight:
+    done: Event = field(default_factory=Event)
+    result: Result | None = None
+    error: BaseException | None = None
+    cacheable: bool = True
+    # Wake-ups for async followers, which cannot block on `done`.
+    callbacks: list[Callable[[], object]] = field(default_factory=list)
+
+
+class SingleFlightCache:
+    """Collapse concurrent calls sharing a key and replay recent results.
+
+    The first caller for a key executes; concurrent callers wait for and share
+    its outcome. Results accepted by `should_cache` are kept for `ttl_seconds`
+    in an LRU bounded by `max_entries`.
+    """
+
+    def __init__(
+        self,
+        *,
+        ttl_seconds: float,
+        max_entries: int,
+        should_cache: Callable[[Result], bool] = lambda _: True,
+        clock: Callable[[], float] = monotonic,
+    ) -> None:
+        self._ttl_seconds = ttl_seconds
+        self._max_entries = max_entries
+        self._should_cache = should_cache
+        self._clock = clock
+        self._lock = Lock()
+        self._inflight: dict[str, _Flight] = {}
+        self._results: OrderedDict[str, tuple[float, Result]] = OrderedDict()
+
+    def run(self, key: str, fn: Callable[[], Result]) -> Result:
+        cached, flight, leader = self._join(key)
+        if cached is not None:
+            return cached
+        if not leader:
+            flight.done.wait()
+            return self._shared(key, flight)
+
+        try:
+            flight.result = fn()
+        except BaseException as exc:
+            flight.error = exc
+            raise
+        finally:
+            self._land(key, flight)
+        return dict(flight.result)
+
+    async def arun(self, key: str, fn: Callable[[], Awaitable[Result]]) -> Result:
+        """Async `run`: followers await the leader without holding a thread.
+
+        Sync and async callers for one key share a single flight either way.
+        """
+        loop = asyncio.get_running_loop()
+        woken: asyncio.Future[None] = loop.create_future()
+        cached, flight, leader = self._join(
+            key, on_done=lambda: loop.call_soon_threadsafe(_resolve, woken)
+        )
+        if cached is not None:
+            return cached
+        if not leader:
+            await woken
+            return self._shared(key, flight)
+
+        try:
+            flight.result = await fn()
+        except BaseException as exc:
+            flight.error = exc
+            raise
+        finally:
+            self._land(key, flight)
+        return dict(flight.result)
+
+    def forget(self, matches: Callable[[str], bool]) -> None:
+        """Drop cached results whose key `matches`.
+
+        Matching in-flight calls still share their outcome but do not cache it.
+        """
+        with self._lock:
+            for key in [key for key in self._results if matches(key)]:
+                del self._results[key]
+            for key, flight in self._inflight.items():
+                if matches(key):
+                    flight.cacheable = False
+
+    def _join(
+        self,
+        key: str,
+        on_done: Callable[[], object] | None = None,
+    ) -> tuple[Result | None, _Flight, bool]:
+        with self._lock:
+            cached = self._lookup(key)
+            if cached is not None:
+                return dict(cached), _Flight(), False
+            flight = self._inflight.get(key)
+            if flight is None:
+                flight = self._inflight[key] = _Flight()
+                return None, flight, True
+            if on_done is not None:
+                flight.callbacks.append(on_done)
+            return None, flight, False
+
+    def _land(self, key: str, flight: _Flight) -> None:
+        with self._lock:
+            if flight.result is not None and flight.cacheable:
+                self._store(key, flight.result)
+            del self._inflight[key]
+        flight.done.set()
+        for callback in flight.callbacks:
+            # A follower's loop may already be closed; it no longer waits then.
+            with suppress(RuntimeError):
+                callback()
+
+    def _shared(self, key: str, flight: _Flight) -> Result:
+        if flight.error is not None:
+            raise flight.error
+        if flight.result is None:
+            raise RuntimeError(f"Single-flight leader for '{key}' produced no result")
+        return dict(flight.result)
+
+    def _lookup(self, key: str) -> Result | None:
+        entry = self._results.get(key)
+        if entry is None:
+            return None
+        expires_at, result = entry
+        if expires_at <= self._clock():
+            del self._results[key]
+            return None
+        self._results.move_to_end(key)
+        return result
+
+    def _store(self, key: str, result: Result) -> None:
+        if self._ttl_seconds <= 0 or self._max_entries <= 0 or not self._should_cache(result):
+            return
+        self._results[key] = (self._clock() + self._ttl_seconds, result)
+        self._results.move_to_end(key)
+        while len(self._results) > self._max_entries:
+            self._results.popitem(last=False)
+
+
+def _resolve(future: asyncio.Future[None]) -> None:
+    if not future.done():
+        future.set_result(None)
@@ -0,0 +1,212 @@
+from __future__ import annotations
+
+import logging
+from collections import OrderedDict, deque
+from collections.abc import Callable
+from dataclasses import dataclass, field, replace
+from enum import StrEnum
+from threading import Condition, Lock, Thread
+from time import time
+from typing import Any
+from uuid import uuid4
+
+logger = logging.getLogger(__name__)
+
+JobRunner = Callable[[str, dict[str, Any]], dict[str, Any]]
+JobCallback = Callable[["Job"], None]
+
+
+class JobStatus(StrEnum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+_FINISHED = {JobStatus.SUCCEEDED, JobStatus.FAILED, JobStatus.CANCELLED}
+
+
+class JobQueueFullError(RuntimeError):
+    pass
+
+
+class JobNotFoundError(KeyError):
+    pass
+
+
+class JobNotCancellableError(RuntimeError):
+    pass
+
+
+@dataclass
+class Job:
+    id: str
+    task_id: str
+    payload: dict[str, Any]
+    status: JobStatus = JobStatus.QUEUED
+    result: dict[str, Any] | None = None
+    error: str | None = None
+    submitted_at: float = field(default_factory=time)
+    started_at: float | None = None
+    finished_at: float | None = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in _FINISHED
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "task_id": self.task_id,
+            "status": self.status.value,
+            "result": self.result,
+            "error": self.error,
+            "submitted_at": self.submitted_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class JobQueue:
+    """Bounded in-process work queue drained by a fixed pool of worker threads."""
+
+    def __init__(
+        self,
+        runner: JobRunner,
+        *,
+        workers: int,
+        max_queued: int,
+        retention: int,
+    ) -> None:
+        if workers <= 0:
+            raise ValueError("workers must be > 0")
+        self._runner = runner
+        self._worker_count = workers
+        self._retention = retention
+        self._max_queued = max_queued
+        # Ids of queued jobs, in order; a cancelled job leaves it at once, so it
+        # frees its slot before a worker gets to it. `None` tells a worker to stop.
+        self._pending: deque[str | None] = deque()
+        self._jobs: OrderedDict[str, Job] = OrderedDict()
+        self._callbacks: dict[str, JobCallback] = {}
+        self._lock = Lock()
+        self._wakeup = Condition(self._lock)
+        self._threads: list[Thread] = []
+
+    def start(self) -> None:
+        with self._lock:
+            if self._threads:
+                return
+            for index in range(self._worker_count):
+                thread = Thread(target=self._work, name=f"p4agent-job-{index}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def stop(self, timeout: float | None = None) -> None:
+        notify: list[Job] = []
+        with self._lock:
+            threads, self._threads = self._threads, []
+            for job in self._jobs.values():
+                if job.status == JobStatus.QUEUED:
+                    notify.append(self._finish(job, JobStatus.CANCELLED, error="Job queue stopped"))
+            self._pending.extend([None] * len(threads))
+            self._wakeup.notify_all()
+        self._notify(notify)
+        for thread in threads:
+            thread.join(timeout)
+
+    def submit(
+        self,
+        task_id: str,
+        payload: dict[str, Any],
+        *,
+        on_finished: JobCallback | None = None,
+    ) -> Job:
+        """Queue a job; `on_finished` receives a snapshot once it succeeds, fails or is cancelled.
+
+        The callback runs on the thread that finished the job, outside the queue lock.
+        """
+        job = Job(id=uuid4().hex, task_id=task_id, payload=payload)
+        with self._lock:
+            if len(self._pending) >= self._max_queued:
+                raise JobQueueFullError(f"Job queue is full ({self._max_queued} queued jobs)")
+            self._pending.append(job.id)
+            self._wakeup.notify()
+            self._jobs[job.id] = job
+            if on_finished is not None:
+                self._callbacks[job.id] = on_finished
+            return replace(job)
+
+    def get(self, job_id: str) -> Job:
+        with self._lock:
+            return replace(self._lookup(job_id))
+
+    def cancel(self, job_id: str) -> Job:
+        notify: list[Job] = []
+        with self._lock:
+            job = self._lookup(job_id)
+            if job.status == JobStatus.RUNNING:
+                raise JobNotCancellableError(f"Job '{job_id}' is already running")
+            if job.status == JobStatus.QUEUED:
+                notify.append(self._finish(job, JobStatus.CANCELLED, error="Cancelled by client"))
+            snapshot = replace(job)
+        self._notify(notify)
+        return snapshot
+
+    def _lookup(self, job_id: str) -> Job:
+        job = self._jobs.get(job_id)
+        if job is None:
+            raise JobNotFoundError(f"Unknown job_id '{job_id}'")
+        return job
+
+    def _work(self) -> None:
+        while True:
+            with self._wakeup:
+                while not self._pending:
+                    self._wakeup.wait()
+                job_id = self._pending.popleft()
+                if job_id is None:
+                    return
+                job = self._jobs[job_id]
+                job.status = JobStatus.RUNNING
+                job.started_at = time()
+
+            try:
+                result = self._runner(job.task_id, job.payload)
+            except Exception as exc:
+                with self._lock:
+                    finished = self._finish(job, JobStatus.FAILED, error=str(exc))
+                self._notify([finished])
+                continue
+
+            status = JobStatus.SUCCEEDED if result.get("status") == "ok" else JobStatus.FAILED
+            with self._lock:
+                job.result = result
+                finished = self._finish(job, status)
+            self._notify([finished])
+
+    def _finish(self, job: Job, status: JobStatus, *, error: str | None = None) -> Job:
+        if job.status == JobStatus.QUEUED:
+            self._pending.remove(job.id)
+        job.status = status
+        job.error = error
+        job.finished_at = time()
+        self._evict_finished()
+        return replace(job)
+
+    def _notify(self, jobs: list[Job]) -> None:
+        for job in jobs:
+            with self._lock:
+                callback = self._callbacks.pop(job.id, None)
+            if callback is None:
+                continue
+            try:
+                callback(job)
+            except Exception:
+                logger.exception("on_finished callback for job %s failed", job.id)
+
+    def _evict_finished(self) -> None:
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+        for job_id in finished[: max(0, len(finished) - self._retention)]:
+            del self._jobs[job_id]
@@ -0,0 +1,242 @@
+from __future__ import annotations
+
+from bisect import bisect_left
+from collections.abc import Iterator, Sequence
+from contextlib import contextmanager
+from threading import Lock
+from time import perf_counter
+
+DEFAULT_BUCKETS: tuple[float, ...] = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+    120.0,
+)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str]) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = Lock()
+
+    def _label_values(self, labels: dict[str, str]) -> tuple[str, ...]:
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {sorted(labels)}")
+        try:
+            return tuple(str(labels[name]) for name in self.labelnames)
+        except KeyError as exc:
+            raise ValueError(f"{self.name} expects labels {self.labelnames}") from exc
+
+    def _format_labels(self, values: tuple[str, ...], extra: str = "") -> str:
+        pairs = [
+            f'{name}="{_escape(value)}"'
+            for name, value in zip(self.labelnames, values, strict=True)
+        ]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    def render(self) -> list[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+            *self._samples(),
+        ]
+
+    def _samples(self) -> list[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._label_values(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        with self._lock:
+            return self._values.get(self._label_values(labels), 0.0)
+
+    def _samples(self) -> list[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{self._format_labels(key)} {_number(value)}" for key, value in items]
+
+
+class _HistogramSeries:
+    __slots__ = ("buckets", "count", "total")
+
+    def __init__(self, size: int) -> None:
+        self.buckets = [0] * size
+        self.count = 0
+        self.total = 0.0
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._bounds = tuple(sorted(buckets))
+        self._series: dict[tuple[str, ...], _HistogramSeries] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._label_values(labels)
+        index = bisect_left(self._bounds, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = _HistogramSeries(len(self._bounds) + 1)
+            series.buckets[index] += 1
+            series.count += 1
+            series.total += value
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        """Observe the wall-clock duration of the block, including when it raises."""
+        started = perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(perf_counter() - started, **labels)
+
+    def count(self, **labels: str) -> int:
+        with self._lock:
+            series = self._series.get(self._label_values(labels))
+            return 0 if series is None else series.count
+
+    def _samples(self) -> list[str]:
+        with self._lock:
+            snapshot = [
+                (key, list(series.buckets), series.count, series.total)
+                for key, series in sorted(self._series.items())
+            ]
+
+        lines: list[str] = []
+        bounds = [*(_number(bound) for bound in self._bounds), "+Inf"]
+        for key, buckets, count, total in snapshot:
+            cumulative = 0
+            for bound, bucket_count in zip(bounds, buckets, strict=True):
+                cumulative += bucket_count
+                labels = self._format_labels(key, f'le="{bound}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            lines.append(f"{self.name}_sum{self._format_labels(key)} {_number(total)}")
+            lines.append(f"{self.name}_count{self._format_labels(key)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Process-local metrics rendered in the Prometheus text exposition format."""
+
+    def __init__(self) -> None:
+        self._metrics: dict[str, _Metric] = {}
+        self._lock = Lock()
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines: list[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def _register[M: _Metric](self, metric: M) -> M:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric '{metric.name}' is already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+REGISTRY = MetricsRegistry()
+
+NODE_DURATION = REGISTRY.histogram(
+    "p4agent_node_duration_seconds",
+    "Latency of orchestrator graph nodes.",
+    ("node",),
+)
+HANDLER_DURATION = REGISTRY.histogram(
+    "p4agent_handler_execute_duration_seconds",
+    "Latency of TaskHandler.execute per task.",
+    ("task_id",),
+)
+PIPELINE_STEP_DURATION = REGISTRY.histogram(
+    "p4agent_pipeline_step_duration_seconds",
+    "Latency of pipeline sub-steps.",
+    ("step", "status"),
+)
+LLM_INVOKE_DURATION = REGISTRY.histogram(
+    "p4agent_llm_invoke_duration_seconds",
+    "Latency of structured LLM calls.",
+    ("provider", "schema"),
+)
+LLM_STRUCTURED_OUTCOMES = REGISTRY.counter(
+    "p4agent_llm_structured_outcomes_total",
+    "How structured LLM calls ended: parsed, repaired, reinvoked, failed or error.",
+    ("provider", "schema", "outcome"),
+)
+BROWSER_NAVIGATION_DURATION = REGISTRY.histogram(
+    "p4agent_browser_navigation_duration_seconds",
+    "Latency of Playwright page navigations.",
+)
+TASK_ERRORS = REGISTRY.counter(
+    "p4agent_task_errors_total",
+    "Task runs that ended with an error code.",
+    ("task_id", "code"),
+)
+ADMISSION_REJECTIONS = REGISTRY.counter(
+    "p4agent_admission_rejections_total",
+    "Task runs rejected because the task was at capacity.",
+    ("task_id",),
+)
+RETRIES = REGISTRY.counter(
+    "p4agent_retries_total",
+    "Retried operations.",
+    ("operation",),
+)
@@ -1,15 +1,67 @@
-from typing import Any, cast
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable, Iterator
+from copy import copy
+from enum import StrEnum
+from threading import Lock
+from time import perf_counter
+from typing import TYPE_CHECKING, Any, Protocol, cast
 
-from langgraph.graph import END, StateGraph
-from langgraph.graph.state import CompiledStateGraph
 from pydantic import ValidationError
 
+from core.context import ExecutionContext, context_scope
+from core.events import StepEventSink, step_event_sink
+from core.metrics import HANDLER_DURATION, NODE_DURATION, TASK_ERRORS
 from core.routing import RouteNotFoundError, TaskRouter
+from core.runs import RunRecorder, run_scope
 from core.settings import settings
 from core.state import AgentState
-from infra.llm.chains import CommentNormChain
-from infra.llm.factory import build_llm_adapter
-from tasks.registry import TaskRegistry
+from infra.llm.factory import get_llm_adapter
+from tasks.registry import TaskRegistry, TaskSpec
+
+if TYPE_CHECKING:
+    from langchain_core.runnables import RunnableConfig
+    from langgraph.graph.state import CompiledStateGraph
+
+    from infra.llm.chains import CommentNormChain
+    from tasks.handlers.base import TaskHandler
+
+    CompiledAgentGraph = CompiledStateGraph[AgentState, Any, AgentState, AgentState]
+
+_ORCHESTRATOR_KEY = "p4agent_orchestrator"
+_RUN_KEY = "p4agent_run"
+
+
+class GraphVariant(StrEnum):
+    """Graph shapes compiled once per process and shared by every orchestrator."""
+
+    FULL = "full"
+    """planning -> validation -> llm_generate -> execute -> response"""
+    DIRECT = "direct"
+    """Same without llm_generate, for handlers with `requires_llm = False`."""
+
+
+_compiled_graphs: dict[tuple[GraphVariant, bool], CompiledAgentGraph] = {}
+_compile_lock = Lock()
+
+
+def compiled_graph(variant: GraphVariant, *, asynchronous: bool = False) -> CompiledAgentGraph:
+    """Return the process-wide compiled graph for `variant`, building it on first use.
+
+    Nodes look up the running orchestrator in the invoke config, so one compiled
+    graph serves any number of `AgentOrchestrator` instances. The asynchronous
+    graph has coroutine nodes and must be driven with `ainvoke`.
+    """
+    key = (variant, asynchronous)
+    compiled = _compiled_graphs.get(key)
+    if compiled is None:
+        with _compile_lock:
+            compiled = _compiled_graphs.get(key)
+            if compiled is None:
+                compiled = _build(variant, asynchronous=asynchronous)
+                _compiled_graphs[key] = compiled
+    return compiled
 
 
 class AgentOrchestrator:
@@ -19,46 +71,110 @@ class AgentOrchestrator:
         self._comment_chain: CommentNormChain | None = None
         self._llm_bootstrap_error: str | None = None
         if settings.llm_enabled:
+            from infra.llm.chains import CommentNormChain
+
             try:
-                adapter = build_llm_adapter(settings)
+                adapter = get_llm_adapter(settings)
                 self._comment_chain = CommentNormChain(adapter)
             except ValueError as exc:
                 self._llm_bootstrap_error = str(exc)
-        self._compiled = self._build()
-
-    def invoke(self, task_id: str, payload: dict[str, Any]) -> AgentState:
-        start_state: AgentState = {
-            "task_id": task_id,
-            "input_payload": payload,
-            "task_spec": None,
-            "handler": None,
-            "validated_payload": None,
-            "plan": "",
-            "llm_error": None,
-            "execution_result": None,
-            "response": None,
-            "error_code": None,
-            "error_message": None,
-        }
-        result = self._compiled.invoke(start_state)
+
+    def with_tasks(self, task_registry: TaskRegistry, task_router: TaskRouter) -> AgentOrchestrator:
+        """A copy serving other task specs that shares this one's LLM chain."""
+        clone = copy(self)
+        clone._task_registry = task_registry
+        clone._task_router = task_router
+        return clone
+
+    def compile(self) -> None:
+        """Build the graphs now rather than on the first run; this imports langgraph."""
+        for variant in GraphVariant:
+            compiled_graph(variant)
+            compiled_graph(variant, asynchronous=True)
+
+    def variant_for(self, task_id: str) -> GraphVariant:
+        """Pick the smallest graph that covers the task's handler.
+
+        Unknown tasks use the full graph; planning reports the routing error.
+        """
+        try:
+            handler = self._task_router.route(task_id)
+        except KeyError:
+            return GraphVariant.FULL
+        return GraphVariant.FULL if handler.requires_llm else GraphVariant.DIRECT
+
+    def invoke(
+        self,
+        task_id: str,
+        payload: dict[str, Any],
+        *,
+        run: RunRecorder | None = None,
+    ) -> AgentState:
+        """Run the graph; with `run`, nodes are checkpointed and completed ones skipped."""
+        graph = compiled_graph(self.variant_for(task_id))
+        result = graph.invoke(_start_state(task_id, payload), self._config(run))
+        return cast(AgentState, result)
+
+    async def ainvoke(
+        self,
+        task_id: str,
+        payload: dict[str, Any],
+        *,
+        run: RunRecorder | None = None,
+    ) -> AgentState:
+        """Run the graph on the event loop.
+
+        Handlers run through `aexecute`, so sync-only handlers are offloaded to a
+        worker thread while async ones hold no thread at all. A handler's first
+        build, with its module import, also runs on a worker thread.
+        """
+        if self._task_registry.handler_built(task_id):
+            variant = self.variant_for(task_id)
+        else:
+            variant = await asyncio.to_thread(self.variant_for, task_id)
+        graph = compiled_graph(variant, asynchronous=True)
+        result = await graph.ainvoke(_start_state(task_id, payload), self._config(run))
         return cast(AgentState, result)
 
-    def _build(self) -> CompiledStateGraph[AgentState, Any, AgentState, AgentState]:
-        graph: StateGraph[AgentState, Any, AgentState, AgentState] = StateGraph(AgentState)
-        graph.add_node("planning", self._planning_node)
-        graph.add_node("validation", self._validation_node)
-        graph.add_node("llm_generate", self._llm_generate_node)
-        graph.add_node("execute", self._execute_node)
-        graph.add_node("response", self._response_node)
+    def stream(
+        self,
+        task_id: str,
+        payload: dict[str, Any],
+        *,
+        run: RunRecorder | None = None,
+    ) -> Iterator[dict[str, Any]]:
+        """Run the graph and yield progress events as nodes and pipeline steps finish.
 
-        graph.set_entry_point("planning")
-        graph.add_edge("planning", "validation")
-        graph.add_edge("validation", "llm_generate")
-        graph.add_edge("llm_generate", "execute")
-        graph.add_edge("execute", "response")
-        graph.add_edge("response", END)
+        Yields `node` events after each graph node, `step` events for handler
+        sub-steps, and a final `result` event carrying the response.
+        """
+        started = perf_counter()
+        state = _start_state(task_id, payload)
+        graph = compiled_graph(self.variant_for(task_id))
+        for mode, raw_chunk in graph.stream(
+            state, self._config(run), stream_mode=["updates", "custom"]
+        ):
+            elapsed_ms = int((perf_counter() - started) * 1000)
+            chunk = cast(dict[str, Any], raw_chunk)
+            if mode == "custom":
+                yield {"event": "step", "elapsed_ms": elapsed_ms, **chunk}
+                continue
+            for node, update in chunk.items():
+                state = cast(AgentState, update)
+                yield {
+                    "event": "node",
+                    "node": node,
+                    "elapsed_ms": elapsed_ms,
+                    "error_code": state["error_code"],
+                }
+        yield {
+            "event": "result",
+            "elapsed_ms": int((perf_counter() - started) * 1000),
+            "response": state["response"],
+        }
 
-        return graph.compile()
+    def _config(self, run: RunRecorder | None) -> RunnableConfig:
+        return {"configurable": {_ORCHESTRATOR_KEY: self, _RUN_KEY: run}}
 
     def _planning_node(self, state: AgentState) -> AgentState:
         try:
@@ -78,10 +194,14 @@ class AgentOrchestrator:
         state["plan"] = handler.plan(state["input_payload"], task_spec)
         return state
 
-    def _validation_node(self, state: AgentState) -> AgentState:
-        if state["error_code"] is not None:
-            return state
+    async def _aplanning_node(self, state: AgentState) -> AgentState:
+        if self._task_registry.handler_built(state["task_id"]):
+            return self._planning_node(state)
+        # Routing builds the handler on first use, importing its module; keep that off the loop.
+        # `ainvoke` usually built it already, but a failed build is retried here.
+        return await asyncio.to_thread(self._planning_node, state)
 
+    def _validation_node(self, state: AgentState) -> AgentState:
         handler = state["handler"]
         task_spec = state["task_spec"]
         if handler is None or task_spec is None:
@@ -98,90 +218,256 @@ class AgentOrchestrator:
         return state
 
     def _llm_generate_node(self, state: AgentState) -> AgentState:
-        if state["error_code"] is not None:
-            return state
+        prepared = self._llm_call(state)
+        if prepared is not None:
+            handler, kwargs = prepared
+            _apply_llm_result(state, handler.preprocess_with_llm(**kwargs))
+        return state
+
+    async def _allm_generate_node(self, state: AgentState) -> AgentState:
+        prepared = self._llm_call(state)
+        if prepared is not None:
+            handler, kwargs = prepared
+            _apply_llm_result(state, await handler.apreprocess_with_llm(**kwargs))
+        return state
 
+    def _llm_call(self, state: AgentState) -> tuple[TaskHandler, dict[str, Any]] | None:
         handler = state["handler"]
         task_spec = state["task_spec"]
         payload = state["validated_payload"]
         if handler is None or task_spec is None or payload is None:
             state["error_code"] = "INTERNAL_ERROR"
             state["error_message"] = "Validator did not initialize execution context"
-            return state
+            return None
 
         if not handler.requires_llm:
-            return state
+            return None
 
         chain = self._comment_chain
         if chain is None and self._llm_bootstrap_error is not None:
             # Surface bootstrap errors in handler-level semantics.
             state["llm_error"] = self._llm_bootstrap_error
 
-        next_payload, llm_error, fatal_error = handler.preprocess_with_llm(
-            payload=payload,
-            spec=task_spec,
-            llm_enabled=settings.llm_enabled,
-            llm_fallback_to_rules=settings.llm_fallback_to_rules,
-            comment_chain=chain,
-        )
-        state["validated_payload"] = next_payload
-        if llm_error is not None:
-            state["llm_error"] = llm_error
-        if fatal_error is not None:
-            state["error_code"] = "LLM_PREPROCESS_FAILED"
-            state["error_message"] = fatal_error
-
-        return state
+        return handler, {
+            "payload": payload,
+            "spec": task_spec,
+            "llm_enabled": settings.llm_enabled,
+            "llm_fallback_to_rules": settings.llm_fallback_to_rules,
+            "comment_chain": chain,
+        }
 
     def _execute_node(self, state: AgentState) -> AgentState:
-        if state["error_code"] is not None:
+        prepared = _execution_context(state)
+        if prepared is None:
             return state
 
-        handler = state["handler"]
-        task_spec = state["task_spec"]
-        payload = state["validated_payload"]
-        if handler is None or task_spec is None or payload is None:
-            state["error_code"] = "INTERNAL_ERROR"
-            state["error_message"] = "Execution context is incomplete"
+        handler, task_spec, payload = prepared
+        context = ExecutionContext(self._task_registry, self._task_router)
+        try:
+            with (
+                step_event_sink(_stream_writer()),
+                context_scope(context),
+                HANDLER_DURATION.time(task_id=task_spec.id),
+            ):
+                result = handler.execute(payload, task_spec)
+        except Exception as exc:
+            state["error_code"] = "EXECUTION_ERROR"
+            state["error_message"] = str(exc)
+        else:
+            state["execution_result"] = _with_subtasks(result, context)
+
+        return state
+
+    async def _aexecute_node(self, state: AgentState) -> AgentState:
+        prepared = _execution_context(state)
+        if prepared is None:
             return state
 
+        handler, task_spec, payload = prepared
+        context = ExecutionContext(self._task_registry, self._task_router)
         try:
-            state["execution_result"] = handler.execute(payload, task_spec)
+            with (
+                step_event_sink(_stream_writer()),
+                context_scope(context),
+                HANDLER_DURATION.time(task_id=task_spec.id),
+            ):
+                result = await handler.aexecute(payload, task_spec)
         except Exception as exc:
             state["error_code"] = "EXECUTION_ERROR"
             state["error_message"] = str(exc)
+        else:
+            state["execution_result"] = _with_subtasks(result, context)
 
         return state
 
     def _response_node(self, state: AgentState) -> AgentState:
         if state["error_code"] is not None:
-            state["response"] = {
-                "status": "failed",
-                "task_id": state["task_id"],
-                "error": {
-                    "code": state["error_code"],
-                    "message": state["error_message"] or "Unknown error",
-                },
-            }
+            _fail(state, state["error_code"], state["error_message"] or "Unknown error")
             return state
 
         handler = state["handler"]
         task_spec = state["task_spec"]
         result = state["execution_result"]
         if handler is None or task_spec is None or result is None:
-            state["response"] = {
-                "status": "failed",
-                "task_id": state["task_id"],
-                "error": {
-                    "code": "INTERNAL_ERROR",
-                    "message": "Task completed without output",
-                },
-            }
+            _fail(state, "INTERNAL_ERROR", "Task completed without output")
             return state
 
-        state["response"] = handler.format_response(
+        response = handler.format_response(
             spec=task_spec,
             result=result,
             llm_error=state["llm_error"],
         )
+        try:
+            handler.validate_output(response, task_spec)
+        except ValidationError as exc:
+            _fail(state, "INVALID_OUTPUT", str(exc))
+            return state
+
+        state["response"] = response
         return state
+
+
+def _fail(state: AgentState, code: str, message: str) -> None:
+    task_spec = state["task_spec"]
+    TASK_ERRORS.inc(task_id=task_spec.id if task_spec is not None else "unknown", code=code)
+    state["response"] = {
+        "status": "failed",
+        "task_id": state["task_id"],
+        "error": {"code": code, "message": message},
+    }
+
+
+def _apply_llm_result(
+    state: AgentState,
+    result: tuple[dict[str, Any], str | None, str | None],
+) -> None:
+    next_payload, llm_error, fatal_error = result
+    state["validated_payload"] = next_payload
+    if llm_error is not None:
+        state["llm_error"] = llm_error
+    if fatal_error is not None:
+        state["error_code"] = "LLM_PREPROCESS_FAILED"
+        state["error_message"] = fatal_error
+
+
+def _execution_context(
+    state: AgentState,
+) -> tuple[TaskHandler, TaskSpec, dict[str, Any]] | None:
+    handler = state["handler"]
+    task_spec = state["task_spec"]
+    payload = state["validated_payload"]
+    if handler is None or task_spec is None or payload is None:
+        state["error_code"] = "INTERNAL_ERROR"
+        state["error_message"] = "Execution context is incomplete"
+        return None
+    return handler, task_spec, payload
+
+
+def _with_subtasks(result: dict[str, Any], context: ExecutionContext) -> dict[str, Any]:
+    if not context.spans:
+        return result
+    return {**result, "subtasks": context.spans}
+
+
+def _build(variant: GraphVariant, *, asynchronous: bool) -> CompiledAgentGraph:
+    from langgraph.graph import END, StateGraph
+
+    stages = ["planning", "validation"]
+    if variant == GraphVariant.FULL:
+        stages.append("llm_generate")
+    stages.append("execute")
+
+    graph: StateGraph[AgentState, Any, AgentState, AgentState] = StateGraph(AgentState)
+    for node in [*stages, "response"]:
+        graph.add_node(node, _bound_async_node(node) if asynchronous else _bound_node(node))
+
+    graph.set_entry_point(stages[0])
+    # A failed stage jumps straight to `response` instead of traversing the rest.
+    for node, next_node in zip(stages, [*stages[1:], "response"], strict=True):
+        graph.add_conditional_edges(node, _continue_to(next_node), [next_node, "response"])
+    graph.add_edge("response", END)
+
+    return graph.compile()
+
+
+def _continue_to(next_node: str) -> Callable[[AgentState], str]:
+    def _route(state: AgentState) -> str:
+        return "response" if state["error_code"] is not None else next_node
+
+    return _route
+
+
+def _start_state(task_id: str, payload: dict[str, Any]) -> AgentState:
+    return {
+        "task_id": task_id,
+        "input_payload": payload,
+        "task_spec": None,
+        "handler": None,
+        "validated_payload": None,
+        "plan": "",
+        "llm_error": None,
+        "execution_result": None,
+        "response": None,
+        "error_code": None,
+        "error_message": None,
+    }
+
+
+class _NodeFn(Protocol):
+    def __call__(self, state: AgentState, config: RunnableConfig) -> AgentState: ...
+
+
+def _bound_node(node: str) -> _NodeFn:
+    method_name = f"_{node}_node"
+
+    def _node(state: AgentState, config: RunnableConfig) -> AgentState:
+        orchestrator = config["configurable"][_ORCHESTRATOR_KEY]
+        run: RunRecorder | None = config["configurable"].get(_RUN_KEY)
+        method: Callable[[AgentState], AgentState] = getattr(orchestrator, method_name)
+        with NODE_DURATION.time(node=node):
+            if run is not None and run.restore_node(node, state):
+                return state
+            with run_scope(run):
+                state = method(state)
+        if run is not None:
+            run.record_node(node, state)
+        return state
+
+    return _node
+
+
+class _AsyncNodeFn(Protocol):
+    def __call__(self, state: AgentState, config: RunnableConfig) -> Awaitable[AgentState]: ...
+
+
+def _bound_async_node(node: str) -> _AsyncNodeFn:
+    """Prefer the orchestrator's `_a<node>_node` coroutine; cheap nodes run inline."""
+    method_name = f"_{node}_node"
+    async_method_name = f"_a{node}_node"
+
+    async def _node(state: AgentState, config: RunnableConfig) -> AgentState:
+        orchestrator = config["configurable"][_ORCHESTRATOR_KEY]
+        run: RunRecorder | None = config["configurable"].get(_RUN_KEY)
+        async_method: Callable[[AgentState], Awaitable[AgentState]] | None = getattr(
+            orchestrator, async_method_name, None
+        )
+        with NODE_DURATION.time(node=node):
+            if run is not None and run.restore_node(node, state):
+                return state
+            with run_scope(run):
+                if async_method is not None:
+                    state = await async_method(state)
+                else:
+                    method: Callable[[AgentState], AgentState] = getattr(orchestrator, method_name)
+                    state = method(state)
+        if run is not None:
+            run.record_node(node, state)
+        return state
+
+    return _node
+
+
+def _stream_writer() -> StepEventSink:
+    from langgraph.config import get_stream_writer
+
+    return get_stream_writer()
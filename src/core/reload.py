@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import logging
+from collections.abc import Callable
+from pathlib import Path
+from threading import Event, Thread
+
+from tasks.manifest import config_fingerprint
+
+logger = logging.getLogger(__name__)
+
+
+class TaskConfigWatcher:
+    """Polls a task config directory and calls `on_change` after a YAML file changes.
+
+    Polling stats the files (name, mtime, size), so it needs no platform file
+    notification support. A failing `on_change` is logged and retried only
+    after the next change.
+    """
+
+    def __init__(
+        self,
+        task_dir: Path,
+        on_change: Callable[[], object],
+        *,
+        interval_seconds: float,
+    ) -> None:
+        self._task_dir = task_dir
+        self._on_change = on_change
+        self._interval_seconds = interval_seconds
+        self._stop = Event()
+        self._thread: Thread | None = None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        fingerprint = config_fingerprint(self._task_dir)
+        self._thread = Thread(
+            target=self._run,
+            args=(fingerprint,),
+            name="p4agent-task-watcher",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self, fingerprint: list[tuple[str, int, int]]) -> None:
+        while not self._stop.wait(self._interval_seconds):
+            try:
+                current = config_fingerprint(self._task_dir)
+            except OSError:
+                logger.exception("Could not scan task configs in %s", self._task_dir)
+                continue
+            if current == fingerprint:
+                continue
+            fingerprint = current
+            try:
+                self._on_change()
+            except Exception:
+                logger.exception("Reloading task configs from %s failed", self._task_dir)
@@ -3,6 +3,7 @@ from __future__ import annotations
 from collections.abc import Mapping
 
 from tasks.handlers.base import TaskHandler
+from tasks.registry import HandlerBuildError
 
 
 class RouteNotFoundError(KeyError):
@@ -11,10 +12,15 @@ class RouteNotFoundError(KeyError):
 
 class TaskRouter:
     def __init__(self, handlers: Mapping[str, TaskHandler]):
-        self._handlers = dict(handlers)
+        # Kept as given, so a lazy registry view only builds handlers that get routed.
+        self._handlers = handlers
 
     def route(self, task_id: str) -> TaskHandler:
-        handler = self._handlers.get(task_id)
+        try:
+            handler = self._handlers.get(task_id)
+        except HandlerBuildError as exc:
+            # A lazily built handler with a bad `handler:` path is unroutable, not a crash.
+            raise RouteNotFoundError(str(exc)) from exc
         if handler is None:
             known = ", ".join(sorted(self._handlers))
             raise RouteNotFoundError(f"No handler for task_id '{task_id}'. Known handlers: {known}")
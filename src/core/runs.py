@@ -0,0 +1,319 @@
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from pathlib import Path
+from threading import Lock
+from time import time
+from typing import TYPE_CHECKING, Any
+from uuid import uuid4
+
+if TYPE_CHECKING:
+    from core.state import AgentState
+
+# Nodes whose output is reused on resume. Planning and validation are cheap and
+# rebuild the non-serializable handler/spec, so they always run again.
+RESUMABLE_NODES = frozenset({"llm_generate", "execute"})
+_CHECKPOINT_FIELDS = (
+    "plan",
+    "validated_payload",
+    "llm_error",
+    "execution_result",
+    "error_code",
+    "error_message",
+)
+_PRUNE_EVERY = 64
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    task_id TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL,
+    last_node TEXT,
+    response TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    owner_pid INTEGER
+);
+CREATE INDEX IF NOT EXISTS runs_created_at ON runs (created_at);
+CREATE TABLE IF NOT EXISTS run_nodes (
+    run_id TEXT NOT NULL,
+    node TEXT NOT NULL,
+    checkpoint TEXT NOT NULL,
+    PRIMARY KEY (run_id, node)
+);
+CREATE TABLE IF NOT EXISTS run_steps (
+    run_id TEXT NOT NULL,
+    name TEXT NOT NULL,
+    result TEXT NOT NULL,
+    PRIMARY KEY (run_id, name)
+);
+"""
+
+
+class RunNotFoundError(KeyError):
+    pass
+
+
+class RunInProgressError(RuntimeError):
+    pass
+
+
+def _process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+@dataclass(frozen=True)
+class RunRecord:
+    run_id: str
+    task_id: str
+    payload: dict[str, Any]
+    status: str
+    last_node: str | None
+    response: dict[str, Any] | None
+    created_at: float
+    updated_at: float
+    owner_pid: int | None = None
+
+    @property
+    def abandoned(self) -> bool:
+        """A `running` run whose owning process is gone, so nothing will finish it."""
+        if self.status != "running":
+            return False
+        if self.owner_pid == os.getpid():
+            return False
+        return self.owner_pid is None or not _process_alive(self.owner_pid)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "run_id": self.run_id,
+            "task_id": self.task_id,
+            "status": self.status,
+            "last_node": self.last_node,
+            "response": self.response,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+        }
+
+
+class RunStore:
+    """SQLite checkpoints for graph nodes and pipeline sub-steps, keyed by run_id.
+
+    Only the newest `retention` runs are kept. Each run records the pid of the
+    process executing it, so a run left `running` by a dead process can be resumed.
+    """
+
+    def __init__(self, path: Path, *, retention: int) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._retention = retention
+        self._lock = Lock()
+        self._created = 0
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(runs)")}
+        if "owner_pid" not in columns:
+            # Stores created before owner tracking; their running rows count as abandoned.
+            self._conn.execute("ALTER TABLE runs ADD COLUMN owner_pid INTEGER")
+
+    def start(self, task_id: str, payload: dict[str, Any]) -> RunRecorder:
+        run_id = uuid4().hex
+        now = time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO runs VALUES (?, ?, ?, 'running', NULL, NULL, ?, ?, ?)",
+                (run_id, task_id, _dumps(payload), now, now, os.getpid()),
+            )
+            self._created += 1
+            if self._created % _PRUNE_EVERY == 0:
+                self._prune()
+        return RunRecorder(self, run_id)
+
+    def reopen(self, run_id: str) -> RunRecorder:
+        """Mark a finished or abandoned run as running again and return its recorder.
+
+        Raises `RunInProgressError` if the run is still running in a live process,
+        so two resumes never execute the same run at once.
+        """
+        record = self.get(run_id)
+        if record.status == "running" and not record.abandoned:
+            raise RunInProgressError(f"Run '{run_id}' is still running")
+        with self._lock, self._conn:
+            # Compare-and-set, in case another process reopened the run in between.
+            updated = self._conn.execute(
+                "UPDATE runs SET status = 'running', owner_pid = ?, updated_at = ?"
+                " WHERE run_id = ? AND status = ? AND owner_pid IS ?",
+                (os.getpid(), time(), run_id, record.status, record.owner_pid),
+            ).rowcount
+        if updated == 0:
+            raise RunInProgressError(f"Run '{run_id}' is still running")
+        return RunRecorder(self, run_id)
+
+    def get(self, run_id: str) -> RunRecord:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT run_id, task_id, payload, status, last_node, response, created_at,"
+                " updated_at, owner_pid FROM runs WHERE run_id = ?",
+                (run_id,),
+            ).fetchone()
+        if row is None:
+            raise RunNotFoundError(f"Unknown run_id '{run_id}'")
+        return RunRecord(
+            run_id=row[0],
+            task_id=row[1],
+            payload=json.loads(row[2]),
+            status=row[3],
+            last_node=row[4],
+            response=json.loads(row[5]) if row[5] is not None else None,
+            created_at=row[6],
+            updated_at=row[7],
+            owner_pid=row[8],
+        )
+
+    def record_node(self, run_id: str, node: str, checkpoint: dict[str, Any]) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO run_nodes VALUES (?, ?, ?)",
+                (run_id, node, _dumps(checkpoint)),
+            )
+            self._conn.execute(
+                "UPDATE runs SET last_node = ?, updated_at = ? WHERE run_id = ?",
+                (node, time(), run_id),
+            )
+
+    def node_checkpoint(self, run_id: str, node: str) -> dict[str, Any] | None:
+        return self._load(
+            "SELECT checkpoint FROM run_nodes WHERE run_id = ? AND node = ?", run_id, node
+        )
+
+    def record_step(self, run_id: str, name: str, result: dict[str, Any]) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO run_steps VALUES (?, ?, ?)",
+                (run_id, name, _dumps(result)),
+            )
+
+    def step_result(self, run_id: str, name: str) -> dict[str, Any] | None:
+        return self._load(
+            "SELECT result FROM run_steps WHERE run_id = ? AND name = ?", run_id, name
+        )
+
+    def finish(self, run_id: str, response: dict[str, Any]) -> None:
+        status = "succeeded" if response.get("status") == "ok" else "failed"
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE runs SET status = ?, response = ?, updated_at = ? WHERE run_id = ?",
+                (status, _dumps(response), time(), run_id),
+            )
+
+    def interrupt(self, run_id: str) -> None:
+        """Mark a run that stopped before its response node as resumable."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE runs SET status = 'interrupted', updated_at = ?"
+                " WHERE run_id = ? AND status = 'running'",
+                (time(), run_id),
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _load(self, query: str, *params: str) -> dict[str, Any] | None:
+        with self._lock:
+            row = self._conn.execute(query, params).fetchone()
+        if row is None:
+            return None
+        loaded: dict[str, Any] = json.loads(row[0])
+        return loaded
+
+    def _prune(self) -> None:
+        stale = "SELECT run_id FROM runs ORDER BY created_at DESC LIMIT -1 OFFSET ?"
+        for table in ("run_steps", "run_nodes", "runs"):
+            self._conn.execute(f"DELETE FROM {table} WHERE run_id IN ({stale})", (self._retention,))
+
+
+class RunRecorder:
+    """The checkpoint handle for one run, passed through the graph config."""
+
+    def __init__(self, store: RunStore, run_id: str) -> None:
+        self._store = store
+        self.run_id = run_id
+
+    def restore_node(self, node: str, state: AgentState) -> bool:
+        """Load a successful checkpoint of `node` into `state`; False when it must run."""
+        if node not in RESUMABLE_NODES:
+            return False
+        checkpoint = self._store.node_checkpoint(self.run_id, node)
+        if checkpoint is None or checkpoint.get("error_code") is not None:
+            return False
+        for field in _CHECKPOINT_FIELDS:
+            state[field] = checkpoint.get(field)  # type: ignore[literal-required]
+        return True
+
+    def record_node(self, node: str, state: AgentState) -> None:
+        self._store.record_node(
+            self.run_id,
+            node,
+            {field: state[field] for field in _CHECKPOINT_FIELDS},  # type: ignore[literal-required]
+        )
+        if node == "response" and state["response"] is not None:
+            self._store.finish(self.run_id, state["response"])
+
+    def interrupt(self) -> None:
+        self._store.interrupt(self.run_id)
+
+    def step_result(self, name: str) -> dict[str, Any] | None:
+        return self._store.step_result(self.run_id, name)
+
+    def record_step(self, name: str, result: dict[str, Any]) -> None:
+        self._store.record_step(self.run_id, name, result)
+
+
+_active_run: ContextVar[RunRecorder | None] = ContextVar("p4agent_active_run", default=None)
+
+
+def active_run() -> RunRecorder | None:
+    """The run the current node belongs to, for handlers that checkpoint sub-steps."""
+    return _active_run.get()
+
+
+@contextmanager
+def interrupt_on_exit(run: RunRecorder | None) -> Iterator[None]:
+    """Mark `run` interrupted if the graph is left early.
+
+    Covers exceptions escaping the graph, cancelled coroutines and streams closed
+    by a disconnecting client; a finished run is left as it is.
+    """
+    try:
+        yield
+    except BaseException:
+        if run is not None:
+            run.interrupt()
+        raise
+
+
+@contextmanager
+def run_scope(run: RunRecorder | None) -> Iterator[None]:
+    token = _active_run.set(run)
+    try:
+        yield
+    finally:
+        _active_run.reset(token)
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=True, default=str)
@@ -1,8 +1,29 @@
+import asyncio
+import weakref
+from collections.abc import Callable, Iterator, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from threading import Lock
+from time import perf_counter
 from typing import Any
 
+from core.admission import AdmissionController, TaskOverloadedError
+from core.idempotency import SingleFlightCache, payload_fingerprint
+from core.jobs import Job, JobCallback, JobQueue
 from core.orchestrator import AgentOrchestrator
+from core.reload import TaskConfigWatcher
 from core.routing import TaskRouter
+from core.runs import (
+    RunInProgressError,
+    RunNotFoundError,
+    RunRecorder,
+    RunStore,
+    interrupt_on_exit,
+)
 from core.settings import settings
+from tasks.handlers.base import TaskHandler
+from tasks.manifest import load_task_manifest
 from tasks.registry import TaskRegistry
 
 
@@ -10,40 +31,479 @@ class AgentService:
     """Application-facing service wrapper around the agent graph."""
 
     def __init__(self) -> None:
-        self._task_registry = TaskRegistry(settings.task_config_dir)
-        self._task_router = TaskRouter(self._task_registry.get_handler_map())
-        self._ensure_routes_cover_registry()
-        self._orchestrator = AgentOrchestrator(
-            task_registry=self._task_registry,
-            task_router=self._task_router,
+        registry = TaskRegistry(settings.task_config_dir, cache_dir=settings.cache_dir)
+        router = TaskRouter(registry.get_handler_map())
+        self._tasks = _TaskSet(
+            registry=registry,
+            router=router,
+            orchestrator=AgentOrchestrator(task_registry=registry, task_router=router),
         )
+        self._reload_lock = Lock()
+        # Runs in flight per task set, and the sets a reload replaced while they
+        # were still busy; their handlers shut down when the last run ends.
+        self._usage_lock = Lock()
+        self._in_use: dict[_TaskSet, int] = {}
+        self._draining: set[_TaskSet] = set()
+        self._watcher: TaskConfigWatcher | None = None
+        self._single_flight = SingleFlightCache(
+            ttl_seconds=settings.idempotency_ttl_seconds,
+            max_entries=settings.idempotency_cache_size,
+            should_cache=lambda result: result.get("status") == "ok",
+        )
+        self._admission = AdmissionController(
+            max_wait_seconds=settings.admission_max_wait_seconds,
+        )
+        self._job_queue: JobQueue | None = None
+        self._job_queue_lock = Lock()
+        self._run_store: RunStore | None = None
+        self._run_store_lock = Lock()
+
+    def run_task(
+        self,
+        task_id: str,
+        payload: dict[str, Any],
+        *,
+        idempotency_key: str | None = None,
+    ) -> dict[str, Any]:
+        """Run a task, collapsing duplicate in-flight or recent identical runs.
+
+        Deduplication applies when `idempotency_key` is given or the task spec
+        sets `constraints.idempotent`, in which case the payload hash is the key.
+        """
+        dedupe_key = self._dedupe_key(task_id, payload, idempotency_key)
+        if dedupe_key is None:
+            return self._invoke(task_id, payload)
+        return self._single_flight.run(dedupe_key, lambda: self._invoke(task_id, payload))
+
+    async def arun_task(
+        self,
+        task_id: str,
+        payload: dict[str, Any],
+        *,
+        idempotency_key: str | None = None,
+    ) -> dict[str, Any]:
+        """Async `run_task`: the run holds no thread unless its handler is sync-only.
+
+        Deduplicated runs share in-flight results with sync `run_task` callers.
+        """
+        dedupe_key = self._dedupe_key(task_id, payload, idempotency_key)
+        if dedupe_key is None:
+            return await self._ainvoke(task_id, payload)
+        return await self._single_flight.arun(dedupe_key, lambda: self._ainvoke(task_id, payload))
+
+    def resume(self, run_id: str) -> dict[str, Any]:
+        """Continue a checkpointed run from its last successful node or pipeline step.
+
+        A run that already succeeded returns its stored response without running;
+        one that is still running raises `RunInProgressError`, unless the process
+        running it is gone.
+        """
+        store = self._runs()
+        record = store.get(run_id)
+        if record.status == "succeeded" and record.response is not None:
+            return {**record.response, "run_id": run_id}
+        if record.status == "running" and not record.abandoned:
+            raise RunInProgressError(f"Run '{run_id}' is still running")
+        limits = self._admission_limits(record.task_id)
+        with self._using_tasks() as tasks, self._admission.admit(record.task_id, **limits):
+            run = store.reopen(run_id)
+            with interrupt_on_exit(run):
+                end_state = tasks.orchestrator.invoke(
+                    task_id=record.task_id,
+                    payload=record.payload,
+                    run=run,
+                )
+        return _with_run_id(_response_or_internal_error(record.task_id, end_state["response"]), run)
+
+    def get_run(self, run_id: str) -> dict[str, Any]:
+        return self._runs().get(run_id).to_dict()
+
+    def stream_task(self, task_id: str, payload: dict[str, Any]) -> Iterator[dict[str, Any]]:
+        """Run a task and yield progress events, ending with a `result` event.
+
+        Admission happens before the iterator is returned, so an overloaded task
+        raises `TaskOverloadedError` here rather than mid-stream.
+        """
+        release = self._admit(task_id)
+        events = self._stream_admitted(task_id, payload, release)
+        # A generator that is never started skips its `finally`; free the slot on GC.
+        weakref.finalize(events, release)
+        return events
+
+    def preload(self) -> None:
+        """Import handlers and build the graph without starting per-process resources."""
+        tasks = self._tasks
+        tasks.orchestrator.compile()
+        for task_id in self.list_tasks():
+            tasks.router.route(task_id)
+
+    def warmup(self) -> None:
+        """Prepare handler resources so the first request only pays for execution."""
+        self.preload()
+        router = self._tasks.router
+        for task_id in self.list_tasks():
+            router.route(task_id).warmup()
+
+    def reload_tasks(self) -> dict[str, list[str]]:
+        """Swap in the task configs as they are on disk now.
+
+        Only changed YAML files are parsed. Built handlers whose handler path is
+        unchanged are kept, warm. Runs already in flight finish on the old specs;
+        replaced handlers shut down once the last of them ends. Cached results of
+        changed or removed tasks are dropped. If the new configs are invalid, a
+        new handler cannot be built or any other handler path does not resolve,
+        this raises and the old ones stay active.
+        """
+        with self._reload_lock:
+            current = self._tasks
+            registry = current.registry.reloaded()
+            router = TaskRouter(registry.get_handler_map())
+            changes = registry.changes_since(current.registry)
+            # Build the new handlers, and import the classes of carried-over ones
+            # not built yet, so a bad handler path fails the reload, not a request.
+            for task_id in changes["added"] + changes["changed"]:
+                router.route(task_id)
+            for task_id in registry.list_ids():
+                if not registry.handler_built(task_id):
+                    registry.check_handler(task_id)
+            tasks = _TaskSet(
+                registry=registry,
+                router=router,
+                orchestrator=current.orchestrator.with_tasks(registry, router),
+            )
+            retired = []
+            with self._usage_lock:
+                self._tasks = tasks
+                if self._in_use.get(current):
+                    self._draining.add(current)
+                else:
+                    retired = self._retired_handlers(current)
+            stale = set(changes["changed"] + changes["removed"])
+            self._single_flight.forget(lambda key: _dedupe_task_id(key) in stale)
+        for handler in retired:
+            handler.shutdown()
+        return changes
+
+    def watch_task_configs(self) -> None:
+        """Reload task configs whenever a YAML file changes, until `shutdown`.
+
+        Disabled when `settings.task_reload_interval_seconds` is 0.
+        """
+        if settings.task_reload_interval_seconds <= 0:
+            return
+        with self._reload_lock:
+            if self._watcher is None:
+                self._watcher = TaskConfigWatcher(
+                    settings.task_config_dir,
+                    self.reload_tasks,
+                    interval_seconds=settings.task_reload_interval_seconds,
+                )
+                self._watcher.start()
+
+    def shutdown(self) -> None:
+        """Release handler resources; safe to call more than once."""
+        with self._reload_lock:
+            watcher, self._watcher = self._watcher, None
+        with self._usage_lock:
+            draining, self._draining = self._draining, set()
+            retired = {
+                id(handler): handler
+                for tasks in draining
+                for handler in tasks.registry.loaded_handlers()
+            }
+            for handler in self._tasks.registry.loaded_handlers():
+                retired.pop(id(handler), None)
+        if watcher is not None:
+            watcher.stop()
+        with self._job_queue_lock:
+            job_queue, self._job_queue = self._job_queue, None
+        if job_queue is not None:
+            job_queue.stop()
+        with self._run_store_lock:
+            run_store, self._run_store = self._run_store, None
+        if run_store is not None:
+            run_store.close()
+        # Handlers are built on first use; ones never routed hold nothing to release.
+        for handler in [*self._tasks.registry.loaded_handlers(), *retired.values()]:
+            handler.shutdown()
+
+    def run_many(
+        self,
+        items: Sequence[tuple[str, dict[str, Any]]],
+        *,
+        max_concurrency: int | None = None,
+    ) -> dict[str, Any]:
+        """Run `(task_id, payload)` items in parallel and return their responses in order.
+
+        Concurrency defaults to and is capped by `settings.batch_max_concurrency`.
+        A failing item never aborts the rest of the batch.
+        """
+        limit = settings.batch_max_concurrency
+        if max_concurrency is not None:
+            limit = max(1, min(max_concurrency, limit))
+
+        started = perf_counter()
+        if not items:
+            results: list[dict[str, Any]] = []
+        else:
+            with ThreadPoolExecutor(
+                max_workers=min(limit, len(items)),
+                thread_name_prefix="p4agent-batch",
+            ) as pool:
+                results = list(pool.map(lambda item: self._run_isolated(*item), items))
+
+        succeeded = sum(1 for result in results if result.get("status") == "ok")
+        return {
+            "results": results,
+            "total": len(results),
+            "succeeded": succeeded,
+            "failed": len(results) - succeeded,
+            "duration_ms": int((perf_counter() - started) * 1000),
+        }
+
+    def submit_job(
+        self,
+        task_id: str,
+        payload: dict[str, Any],
+        *,
+        on_finished: JobCallback | None = None,
+    ) -> Job:
+        """Queue a task run on the background workers and return immediately.
+
+        Raises `KeyError` for a task id the service does not serve.
+        """
+        if task_id not in self.list_tasks():
+            raise KeyError(f"Unknown task_id '{task_id}'")
+        return self._jobs().submit(task_id, payload, on_finished=on_finished)
+
+    def get_job(self, job_id: str) -> Job:
+        return self._jobs().get(job_id)
+
+    def cancel_job(self, job_id: str) -> Job:
+        return self._jobs().cancel(job_id)
+
+    def describe_tasks(self) -> list[dict[str, Any]]:
+        """Manifest entries (handler path, goal, input schema) for the served tasks."""
+        manifest = load_task_manifest(settings.task_config_dir, cache_dir=settings.cache_dir)
+        served = set(self.list_tasks())
+        return [entry.to_dict() for entry in manifest.entries if entry.id in served]
+
+    def list_tasks(self) -> list[str]:
+        tasks = self._tasks
+        return sorted(set(tasks.registry.list_ids()) & set(tasks.router.list_ids()))
+
+    def _invoke(self, task_id: str, payload: dict[str, Any]) -> dict[str, Any]:
+        limits = self._admission_limits(task_id)
+        with self._using_tasks() as tasks, self._admission.admit(task_id, **limits):
+            run = self._start_run(task_id, payload)
+            with interrupt_on_exit(run):
+                end_state = tasks.orchestrator.invoke(task_id=task_id, payload=payload, run=run)
+        return _with_run_id(_response_or_internal_error(task_id, end_state["response"]), run)
+
+    async def _ainvoke(self, task_id: str, payload: dict[str, Any]) -> dict[str, Any]:
+        release = await self._aadmit(task_id)
+        try:
+            with self._using_tasks() as tasks:
+                run = self._start_run(task_id, payload)
+                with interrupt_on_exit(run):
+                    end_state = await tasks.orchestrator.ainvoke(
+                        task_id=task_id, payload=payload, run=run
+                    )
+        finally:
+            release()
+        return _with_run_id(_response_or_internal_error(task_id, end_state["response"]), run)
+
+    def _stream_admitted(
+        self,
+        task_id: str,
+        payload: dict[str, Any],
+        release: Callable[[], None],
+    ) -> Iterator[dict[str, Any]]:
+        try:
+            with self._using_tasks() as tasks:
+                run = self._start_run(task_id, payload)
+                start: dict[str, Any] = {"event": "start", "task_id": task_id, "elapsed_ms": 0}
+                if run is not None:
+                    start["run_id"] = run.run_id
+                # A client that disconnects mid-stream closes this generator.
+                with interrupt_on_exit(run):
+                    yield start
+                    events = tasks.orchestrator.stream(task_id=task_id, payload=payload, run=run)
+                    for event in events:
+                        if event["event"] == "result":
+                            response = _response_or_internal_error(task_id, event["response"])
+                            event = {**event, "response": _with_run_id(response, run)}
+                        yield event
+        finally:
+            release()
+
+    @contextmanager
+    def _using_tasks(self) -> Iterator["_TaskSet"]:
+        """The current task set, kept from retiring its handlers until the run ends."""
+        with self._usage_lock:
+            tasks = self._tasks
+            self._in_use[tasks] = self._in_use.get(tasks, 0) + 1
+        try:
+            yield tasks
+        finally:
+            with self._usage_lock:
+                self._in_use[tasks] -= 1
+                retired = []
+                if not self._in_use[tasks]:
+                    del self._in_use[tasks]
+                    if tasks in self._draining:
+                        self._draining.discard(tasks)
+                        retired = self._retired_handlers(tasks)
+            for handler in retired:
+                handler.shutdown()
+
+    def _admit(self, task_id: str) -> Callable[[], None]:
+        return self._admission.acquire(task_id, **self._admission_limits(task_id))
+
+    async def _aadmit(self, task_id: str) -> Callable[[], None]:
+        limits = self._admission_limits(task_id)
+        if limits["max_concurrency"] is None:
+            return self._admit(task_id)
+        # Waiting for a slot blocks, so it happens off the event loop. A caller
+        # cancelled mid-wait must still hand back a slot granted afterwards.
+        waiter = asyncio.ensure_future(asyncio.to_thread(self._admit, task_id))
+        try:
+            return await asyncio.shield(waiter)
+        except asyncio.CancelledError:
+            waiter.add_done_callback(_release_if_granted)
+            raise
+
+    def _retired_handlers(self, tasks: "_TaskSet") -> list[TaskHandler]:
+        """Handlers built by a replaced `tasks` that no live task set still uses.
 
-    def run_task(self, task_id: str, payload: dict[str, Any]) -> dict[str, Any]:
-        end_state = self._orchestrator.invoke(task_id=task_id, payload=payload)
-        response = end_state["response"]
-        if response is None:
+        Read when the set is retired rather than at reload time, so a handler
+        an in-flight run built on it after the swap is shut down too. Call with
+        `_usage_lock` held.
+        """
+        live = {
+            id(handler)
+            for other in [self._tasks, *self._in_use]
+            if other is not tasks
+            for handler in other.registry.loaded_handlers()
+        }
+        return [handler for handler in tasks.registry.loaded_handlers() if id(handler) not in live]
+
+    def _admission_limits(self, task_id: str) -> dict[str, Any]:
+        try:
+            constraints = self._tasks.registry.get(task_id).constraints
+        except KeyError:
+            return {"max_concurrency": None, "max_queue_depth": 0}
+        return {
+            "max_concurrency": constraints.max_concurrency,
+            "max_queue_depth": constraints.max_queue_depth,
+        }
+
+    def _dedupe_key(
+        self,
+        task_id: str,
+        payload: dict[str, Any],
+        idempotency_key: str | None,
+    ) -> str | None:
+        if idempotency_key:
+            # Bound to the payload: a reused key with another payload runs anew
+            # instead of replaying the other payload's result.
+            return f"{task_id}:key:{idempotency_key}:{payload_fingerprint(task_id, payload)}"
+        try:
+            spec = self._tasks.registry.get(task_id)
+        except KeyError:
+            return None
+        if not spec.constraints.idempotent:
+            return None
+        return f"{task_id}:payload:{payload_fingerprint(task_id, payload)}"
+
+    def _run_isolated(self, task_id: str, payload: dict[str, Any]) -> dict[str, Any]:
+        try:
+            return self.run_task(task_id=task_id, payload=payload)
+        except TaskOverloadedError as exc:
             return {
                 "status": "failed",
                 "task_id": task_id,
                 "error": {
-                    "code": "INTERNAL_ERROR",
-                    "message": "Agent did not produce a response",
+                    "code": "TASK_OVERLOADED",
+                    "message": str(exc),
+                    "retry_after": exc.retry_after,
                 },
             }
+        except Exception as exc:
+            return {
+                "status": "failed",
+                "task_id": task_id,
+                "error": {"code": "INTERNAL_ERROR", "message": str(exc)},
+            }
+
+    def _jobs(self) -> JobQueue:
+        with self._job_queue_lock:
+            if self._job_queue is None:
+                self._job_queue = JobQueue(
+                    self.run_task,
+                    workers=settings.job_workers,
+                    max_queued=settings.job_queue_size,
+                    retention=settings.job_retention,
+                )
+                self._job_queue.start()
+            return self._job_queue
+
+    def _start_run(self, task_id: str, payload: dict[str, Any]) -> RunRecorder | None:
+        # Checkpoints cost a SQLite commit per node, so only tasks that ask for them pay it.
+        if not settings.run_store_enabled:
+            return None
+        try:
+            if not self._tasks.registry.get(task_id).constraints.resumable:
+                return None
+        except KeyError:
+            return None
+        return self._runs().start(task_id, payload)
+
+    def _runs(self) -> RunStore:
+        if not settings.run_store_enabled:
+            raise RunNotFoundError("Run checkpoints are disabled (P4AGENT_RUN_STORE_ENABLED)")
+        with self._run_store_lock:
+            # Opened lazily so a preforked parent never shares a connection with workers.
+            if self._run_store is None:
+                self._run_store = RunStore(
+                    settings.run_store_path or settings.cache_dir / "runs.sqlite3",
+                    retention=settings.run_store_retention,
+                )
+            return self._run_store
+
+
+@dataclass(frozen=True, eq=False)
+class _TaskSet:
+    """Specs, routes and the orchestrator serving them; replaced as a unit on reload."""
+
+    registry: TaskRegistry
+    router: TaskRouter
+    orchestrator: AgentOrchestrator
+
+
+def _dedupe_task_id(dedupe_key: str) -> str:
+    return dedupe_key.partition(":")[0]
+
+
+def _release_if_granted(waiter: asyncio.Future[Callable[[], None]]) -> None:
+    if not waiter.cancelled() and waiter.exception() is None:
+        waiter.result()()
+
+
+def _with_run_id(response: dict[str, Any], run: RunRecorder | None) -> dict[str, Any]:
+    if run is None:
         return response
+    return {**response, "run_id": run.run_id}
 
-    def list_tasks(self) -> list[str]:
-        registry_ids = set(self._task_registry.list_ids())
-        routed_ids = set(self._task_router.list_ids())
-        return sorted(registry_ids & routed_ids)
-
-    def _ensure_routes_cover_registry(self) -> None:
-        registry_ids = set(self._task_registry.list_ids())
-        routed_ids = set(self._task_router.list_ids())
-        missing_routes = sorted(registry_ids - routed_ids)
-        missing_specs = sorted(routed_ids - registry_ids)
-        if missing_routes or missing_specs:
-            raise ValueError(
-                f"Router and registry mismatch. missing_routes={missing_routes}, "
-                f"missing_specs={missing_specs}"
-            )
+
+def _response_or_internal_error(task_id: str, response: dict[str, Any] | None) -> dict[str, Any]:
+    if response is None:
+        return {
+            "status": "failed",
+            "task_id": task_id,
+            "error": {
+                "code": "INTERNAL_ERROR",
+                "message": "Agent did not produce a response",
+            },
+        }
+    return response
@@ -8,12 +8,40 @@ class Settings(BaseSettings):
     """Runtime settings for paths and environment."""
 
     task_config_dir: Path = Path("configs/tasks")
+    task_reload_interval_seconds: float = Field(default=2.0, ge=0)
+    cache_dir: Path = Path(".cache/p4agent")
     llm_enabled: bool = False
     llm_provider: str = "openai"
     llm_model: str = "gpt-4o-mini"
     llm_temperature: float = 0.0
     llm_timeout_seconds: int = 30
+    llm_http_pool_size: int = Field(default=20, ge=1)
     llm_fallback_to_rules: bool = True
+    job_workers: int = Field(default=4, ge=1)
+    job_queue_size: int = Field(default=100, ge=1)
+    job_retention: int = Field(default=1000, ge=0)
+    batch_max_concurrency: int = Field(default=4, ge=1)
+    batch_max_items: int = Field(default=100, ge=1)
+    idempotency_ttl_seconds: float = Field(default=300.0, ge=0)
+    idempotency_cache_size: int = Field(default=1024, ge=0)
+    run_store_enabled: bool = True
+    run_store_path: Path | None = None
+    run_store_retention: int = Field(default=1000, ge=1)
+    admission_max_wait_seconds: float = Field(default=30.0, ge=0)
+    webhook_github_secret: str | None = None
+    webhook_gitlab_token: str | None = None
+    forge_provider: str = "none"
+    forge_api_url: str | None = None
+    forge_token: str | None = None
+    forge_repo_dir: Path | None = None
+    forge_base_branch: str = "main"
+    forge_timeout_seconds: float = Field(default=30.0, gt=0)
+    api_host: str = "0.0.0.0"
+    api_port: int = Field(default=8000, ge=0)
+    api_workers: int = Field(default=1, ge=1)
+    api_graceful_timeout_seconds: float = Field(default=30.0, ge=0)
+    api_worker_max_requests: int | None = Field(default=None, ge=1)
+    api_worker_warmup: bool = True
     openai_api_key: str | None = Field(default=None, validation_alias="OPENAI_API_KEY")
     openai_base_url: str | None = Field(default=None, validation_alias="OPENAI_BASE_URL")
     anthropic_api_key: str | None = Field(default=None, validation_alias="ANTHROPIC_API_KEY")
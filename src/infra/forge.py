@@ -0,0 +1,281 @@
+from __future__ import annotations
+
+import json
+import subprocess
+import urllib.request
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+from urllib.parse import quote
+
+from core.settings import Settings
+
+BOT_CLONE_CONFIG_KEY = "p4agent.botClone"
+
+
+@dataclass(frozen=True)
+class ForgeThread:
+    """The issue or merge request a command was posted on."""
+
+    repository: str
+    number: int
+    kind: str = "issue"
+
+
+@dataclass(frozen=True)
+class ChangeRequest:
+    branch: str
+    title: str
+    body: str
+    commit_message: str
+
+
+class Publisher(ABC):
+    """Reports task outcomes back to a forge and turns file changes into a PR/MR."""
+
+    @abstractmethod
+    def reply(self, thread: ForgeThread, body: str) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def publish_changes(self, thread: ForgeThread, change: ChangeRequest) -> str | None:
+        """Commit pending changes and open a change request; None when nothing changed."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def prepare_workspace(self) -> None:
+        """Reset the working tree to the base branch before a comment's tasks run."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def discard_changes(self) -> None:
+        """Drop uncommitted changes left behind by a failed run."""
+        raise NotImplementedError
+
+
+class NullPublisher(Publisher):
+    """Records calls without touching git or the network."""
+
+    def __init__(self) -> None:
+        self.replies: list[tuple[ForgeThread, str]] = []
+        self.changes: list[tuple[ForgeThread, ChangeRequest]] = []
+        self.prepared = 0
+        self.discarded = 0
+
+    def reply(self, thread: ForgeThread, body: str) -> None:
+        self.replies.append((thread, body))
+
+    def publish_changes(self, thread: ForgeThread, change: ChangeRequest) -> str | None:
+        self.changes.append((thread, change))
+        return None
+
+    def prepare_workspace(self) -> None:
+        self.prepared += 1
+
+    def discard_changes(self) -> None:
+        self.discarded += 1
+
+
+class GitWorkspace:
+    """Branch, commit and push pending changes in a local checkout."""
+
+    def __init__(self, repo_dir: Path, *, remote: str = "origin") -> None:
+        self._repo_dir = repo_dir
+        self._remote = remote
+
+    def ensure_bot_clone(self) -> None:
+        """Refuse any checkout not marked as the bot's own.
+
+        Every comment resets and cleans the checkout, so pointing the bot at a
+        developer's working copy would destroy their work. The clone opts in with
+        `git config p4agent.botClone true`.
+        """
+        try:
+            top_level = Path(self._git("rev-parse", "--show-toplevel").strip())
+            marked = self._git(
+                "config", "--bool", "--default", "false", BOT_CLONE_CONFIG_KEY
+            ).strip()
+        except (OSError, subprocess.CalledProcessError) as exc:
+            raise ValueError(f"{self._repo_dir} is not a git checkout") from exc
+        if top_level.resolve() != self._repo_dir.resolve():
+            raise ValueError(f"{self._repo_dir} is not the top level of a git checkout")
+        if marked != "true":
+            raise ValueError(
+                f"{self._repo_dir} is not marked as a dedicated bot clone; "
+                f"run `git config {BOT_CLONE_CONFIG_KEY} true` in a clone used only by the bot"
+            )
+
+    def reset_to(self, base_branch: str) -> None:
+        """Check out `base_branch` as it is on the remote, without local changes."""
+        self._git("fetch", self._remote, base_branch)
+        self._git("checkout", "--force", "-B", base_branch, f"{self._remote}/{base_branch}")
+        self._git("clean", "-fd")
+
+    def discard(self) -> None:
+        """Drop uncommitted changes and untracked files; ignored files are kept."""
+        self._git("reset", "--hard")
+        self._git("clean", "-fd")
+
+    def has_changes(self) -> bool:
+        return bool(self._git("status", "--porcelain").strip())
+
+    def commit_and_push(self, branch: str, message: str) -> None:
+        """Commit everything onto `branch`, push it, and return to the original branch."""
+        original = self._git("rev-parse", "--abbrev-ref", "HEAD").strip()
+        self._git("checkout", "-b", branch)
+        try:
+            self._git("add", "-A")
+            self._git("commit", "-m", message)
+            self._git("push", self._remote, branch)
+        finally:
+            self._git("checkout", original)
+
+    def _git(self, *args: str) -> str:
+        completed = subprocess.run(
+            ["git", *args],
+            cwd=self._repo_dir,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        return completed.stdout
+
+
+class _HttpPublisher(Publisher):
+    def __init__(
+        self,
+        *,
+        api_url: str,
+        token: str,
+        workspace: GitWorkspace,
+        base_branch: str,
+        timeout_seconds: float,
+    ) -> None:
+        self._api_url = api_url.rstrip("/")
+        self._token = token
+        self._workspace = workspace
+        self._base_branch = base_branch
+        self._timeout_seconds = timeout_seconds
+
+    def publish_changes(self, thread: ForgeThread, change: ChangeRequest) -> str | None:
+        if not self._workspace.has_changes():
+            return None
+        self._workspace.commit_and_push(change.branch, change.commit_message)
+        return self._open_change_request(thread, change)
+
+    def prepare_workspace(self) -> None:
+        self._workspace.reset_to(self._base_branch)
+
+    def discard_changes(self) -> None:
+        self._workspace.discard()
+
+    @abstractmethod
+    def _open_change_request(self, thread: ForgeThread, change: ChangeRequest) -> str:
+        raise NotImplementedError
+
+    @abstractmethod
+    def _auth_headers(self) -> dict[str, str]:
+        raise NotImplementedError
+
+    def _post(self, path: str, body: dict[str, Any]) -> dict[str, Any]:
+        request = urllib.request.Request(
+            f"{self._api_url}{path}",
+            data=json.dumps(body).encode("utf-8"),
+            headers={"Content-Type": "application/json", **self._auth_headers()},
+            method="POST",
+        )
+        with urllib.request.urlopen(request, timeout=self._timeout_seconds) as response:
+            loaded: dict[str, Any] = json.loads(response.read() or b"{}")
+        return loaded
+
+
+class GitHubPublisher(_HttpPublisher):
+    def reply(self, thread: ForgeThread, body: str) -> None:
+        self._post(f"/repos/{thread.repository}/issues/{thread.number}/comments", {"body": body})
+
+    def _open_change_request(self, thread: ForgeThread, change: ChangeRequest) -> str:
+        created = self._post(
+            f"/repos/{thread.repository}/pulls",
+            {
+                "title": change.title,
+                "head": change.branch,
+                "base": self._base_branch,
+                "body": change.body,
+                "draft": True,
+            },
+        )
+        return str(created.get("html_url", ""))
+
+    def _auth_headers(self) -> dict[str, str]:
+        return {
+            "Authorization": f"Bearer {self._token}",
+            "Accept": "application/vnd.github+json",
+        }
+
+
+class GitLabPublisher(_HttpPublisher):
+    def reply(self, thread: ForgeThread, body: str) -> None:
+        collection = "merge_requests" if thread.kind == "merge_request" else "issues"
+        self._post(
+            f"/projects/{_project_path(thread)}/{collection}/{thread.number}/notes",
+            {"body": body},
+        )
+
+    def _open_change_request(self, thread: ForgeThread, change: ChangeRequest) -> str:
+        created = self._post(
+            f"/projects/{_project_path(thread)}/merge_requests",
+            {
+                "source_branch": change.branch,
+                "target_branch": self._base_branch,
+                "title": f"Draft: {change.title}",
+                "description": change.body,
+            },
+        )
+        return str(created.get("web_url", ""))
+
+    def _auth_headers(self) -> dict[str, str]:
+        return {"PRIVATE-TOKEN": self._token}
+
+
+def _project_path(thread: ForgeThread) -> str:
+    return quote(thread.repository, safe="")
+
+
+def _bot_workspace(cfg: Settings, provider: str) -> GitWorkspace:
+    if cfg.forge_repo_dir is None:
+        raise ValueError(f"P4AGENT_FORGE_REPO_DIR is required when forge_provider={provider}")
+    workspace = GitWorkspace(cfg.forge_repo_dir)
+    workspace.ensure_bot_clone()
+    return workspace
+
+
+def build_publisher(cfg: Settings) -> Publisher:
+    provider = cfg.forge_provider.strip().lower()
+
+    if provider == "none":
+        return NullPublisher()
+
+    if provider == "github":
+        if not cfg.forge_token:
+            raise ValueError("P4AGENT_FORGE_TOKEN is required when forge_provider=github")
+        return GitHubPublisher(
+            api_url=cfg.forge_api_url or "https://api.github.com",
+            token=cfg.forge_token,
+            workspace=_bot_workspace(cfg, provider),
+            base_branch=cfg.forge_base_branch,
+            timeout_seconds=cfg.forge_timeout_seconds,
+        )
+
+    if provider == "gitlab":
+        if not cfg.forge_token:
+            raise ValueError("P4AGENT_FORGE_TOKEN is required when forge_provider=gitlab")
+        return GitLabPublisher(
+            api_url=cfg.forge_api_url or "https://gitlab.com/api/v4",
+            token=cfg.forge_token,
+            workspace=_bot_workspace(cfg, provider),
+            base_branch=cfg.forge_base_branch,
+            timeout_seconds=cfg.forge_timeout_seconds,
+        )
+
+    raise ValueError(f"Unsupported forge_provider '{cfg.forge_provider}'")
@@ -1,10 +1,13 @@
+import httpx
 from langchain_openai import AzureChatOpenAI
 from pydantic import SecretStr
 
-from infra.llm.base import ModelT, extract_text_content, parse_structured_result
+from infra.llm.base import ChatModelAdapter
 
 
-class AzureOpenAIAdapter:
+class AzureOpenAIAdapter(ChatModelAdapter):
+    provider = "azure"
+
     def __init__(
         self,
         *,
@@ -14,22 +17,18 @@ class AzureOpenAIAdapter:
         api_version: str,
         temperature: float,
         timeout_seconds: int,
+        http_client: httpx.Client | None = None,
+        http_async_client: httpx.AsyncClient | None = None,
     ) -> None:
-        self._model = AzureChatOpenAI(
-            azure_deployment=deployment,
-            azure_endpoint=endpoint,
-            api_key=SecretStr(api_key),
-            api_version=api_version,
-            temperature=temperature,
-            timeout=timeout_seconds,
+        super().__init__(
+            AzureChatOpenAI(
+                azure_deployment=deployment,
+                azure_endpoint=endpoint,
+                api_key=SecretStr(api_key),
+                api_version=api_version,
+                temperature=temperature,
+                timeout=timeout_seconds,
+                http_client=http_client,
+                http_async_client=http_async_client,
+            )
         )
-
-    def invoke_structured(self, prompt: str, schema: type[ModelT]) -> ModelT:
-        runner = self._model.with_structured_output(schema)
-        try:
-            result = runner.invoke(prompt)
-            return parse_structured_result(result, schema)
-        except Exception:
-            raw_result = self._model.invoke(prompt)
-            raw_text = extract_text_content(raw_result)
-            return parse_structured_result(raw_text, schema)
@@ -1,7 +1,9 @@
 import re
 from typing import Any, Protocol, TypeVar
 
-from pydantic import BaseModel
+from pydantic import BaseModel, ValidationError
+
+from core.metrics import LLM_INVOKE_DURATION, LLM_STRUCTURED_OUTCOMES, RETRIES
 
 ModelT = TypeVar("ModelT", bound=BaseModel)
 
@@ -11,6 +13,110 @@ class LLMAdapter(Protocol):
 
     def invoke_structured(self, prompt: str, schema: type[ModelT]) -> ModelT: ...
 
+    async def ainvoke_structured(self, prompt: str, schema: type[ModelT]) -> ModelT: ...
+
+
+class ChatModelAdapter:
+    """Structured generation on a LangChain chat model; subclasses pick the model.
+
+    The runner bound by `with_structured_output` is built once per schema class
+    and reused. It keeps the raw reply, so output the provider could not parse
+    is repaired locally (`repair_json_payload`). The model is called a second
+    time, as plain text, only when that fails or the provider rejects
+    structured output. Other errors (timeouts, rate limits, outages) propagate.
+    Each outcome, `error` included, is counted in `LLM_STRUCTURED_OUTCOMES`.
+    """
+
+    provider: str
+
+    def __init__(self, model: Any) -> None:
+        self._model = model
+        self._runners: dict[type[BaseModel], Any] = {}
+
+    def invoke_structured(self, prompt: str, schema: type[ModelT]) -> ModelT:
+        with LLM_INVOKE_DURATION.time(provider=self.provider, schema=schema.__name__):
+            try:
+                result = self._runner(schema).invoke(prompt)
+            except Exception as exc:
+                if not _structured_output_unsupported(exc):
+                    self._record(schema, "error")
+                    raise
+                result = None
+            parsed = self._recover(result, schema)
+            if parsed is not None:
+                return parsed
+            RETRIES.inc(operation="llm_structured_fallback")
+            try:
+                message = self._model.invoke(prompt)
+            except Exception:
+                self._record(schema, "error")
+                raise
+            return self._parse_reply(message, schema)
+
+    async def ainvoke_structured(self, prompt: str, schema: type[ModelT]) -> ModelT:
+        with LLM_INVOKE_DURATION.time(provider=self.provider, schema=schema.__name__):
+            try:
+                result = await self._runner(schema).ainvoke(prompt)
+            except Exception as exc:
+                if not _structured_output_unsupported(exc):
+                    self._record(schema, "error")
+                    raise
+                result = None
+            parsed = self._recover(result, schema)
+            if parsed is not None:
+                return parsed
+            RETRIES.inc(operation="llm_structured_fallback")
+            try:
+                message = await self._model.ainvoke(prompt)
+            except Exception:
+                self._record(schema, "error")
+                raise
+            return self._parse_reply(message, schema)
+
+    def _runner(self, schema: type[BaseModel]) -> Any:
+        # Adapters are shared across threads; a racing first call only builds
+        # the same runner twice.
+        runner = self._runners.get(schema)
+        if runner is None:
+            runner = self._runners[schema] = self._model.with_structured_output(
+                schema, include_raw=True
+            )
+        return runner
+
+    def _recover(self, result: dict[str, Any] | None, schema: type[ModelT]) -> ModelT | None:
+        if result is None:
+            return None
+        if result.get("parsed") is not None:
+            self._record(schema, "parsed")
+            return parse_structured_result(result["parsed"], schema)
+        for candidate in _raw_candidates(result.get("raw")):
+            try:
+                parsed = parse_structured_result(candidate, schema)
+            except ValueError:
+                continue
+            self._record(schema, "repaired")
+            return parsed
+        return None
+
+    def _parse_reply(self, message: Any, schema: type[ModelT]) -> ModelT:
+        try:
+            parsed = parse_structured_result(extract_text_content(message), schema)
+        except ValueError:
+            self._record(schema, "failed")
+            raise
+        self._record(schema, "reinvoked")
+        return parsed
+
+    def _record(self, schema: type[BaseModel], outcome: str) -> None:
+        LLM_STRUCTURED_OUTCOMES.inc(provider=self.provider, schema=schema.__name__, outcome=outcome)
+
+
+def _structured_output_unsupported(exc: Exception) -> bool:
+    # Endpoints without tool or JSON-schema support answer 400 (the SDKs'
+    # `BadRequestError`); LangChain models without the feature raise
+    # NotImplementedError when binding. Matched by status so no SDK is imported.
+    return isinstance(exc, NotImplementedError) or getattr(exc, "status_code", None) == 400
+
 
 def parse_structured_result[T: BaseModel](result: Any, schema: type[T]) -> T:
     """Normalize provider outputs into a validated schema object."""
@@ -24,8 +130,10 @@ def parse_structured_result[T: BaseModel](result: Any, schema: type[T]) -> T:
         return schema.model_validate(result)
 
     if isinstance(result, str):
-        normalized_json = _extract_json_payload(result)
-        return schema.model_validate_json(normalized_json)
+        try:
+            return schema.model_validate_json(_extract_json_payload(result))
+        except ValidationError:
+            return schema.model_validate_json(repair_json_payload(result))
 
     return schema.model_validate(result)
 
@@ -65,3 +173,77 @@ def _extract_json_payload(raw_text: str) -> str:
         return text[start : end + 1]
 
     return text
+
+
+def repair_json_payload(raw_text: str) -> str:
+    """Best-effort fix for JSON an LLM almost got right.
+
+    Strips code fences and surrounding prose, drops trailing commas, and closes
+    output cut off mid-array after its last complete element.
+    """
+    text = re.sub(r"^```(?:json)?|```$", "", raw_text.strip(), flags=re.IGNORECASE).strip()
+    start = min((i for i in (text.find("{"), text.find("[")) if i != -1), default=-1)
+    if start == -1:
+        return text
+
+    out: list[str] = []
+    closers: list[str] = []
+    # Where the last complete array element ended, and the brackets still open there.
+    complete: tuple[int, list[str]] | None = None
+    in_string = escaped = False
+    for char in text[start:]:
+        if in_string:
+            out.append(char)
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+                if closers and closers[-1] == "]":
+                    complete = (len(out), list(closers))
+            continue
+        if char == '"':
+            in_string = True
+        elif char in "{[":
+            closers.append("}" if char == "{" else "]")
+        elif char in "}]":
+            _drop_trailing_comma(out)
+            if not closers:
+                break
+            out.append(closers.pop())
+            if not closers:
+                return "".join(out)
+            if closers[-1] == "]":
+                complete = (len(out), list(closers))
+            continue
+        out.append(char)
+
+    # Truncated: keep what was complete and close the brackets still open.
+    if complete is not None:
+        length, closers = complete
+        del out[length:]
+    elif in_string:
+        out.append('"')
+    _drop_trailing_comma(out)
+    return "".join(out) + "".join(reversed(closers))
+
+
+def _drop_trailing_comma(out: list[str]) -> None:
+    while out and out[-1].isspace():
+        out.pop()
+    if out and out[-1] == ",":
+        out.pop()
+
+
+def _raw_candidates(message: Any) -> list[Any]:
+    if message is None:
+        return []
+    candidates: list[Any] = [
+        call.get("args") for call in getattr(message, "invalid_tool_calls", [])
+    ]
+    candidates += [call.get("args") for call in getattr(message, "tool_calls", [])]
+    text = extract_text_content(message)
+    if text:
+        candidates.append(text)
+    return [candidate for candidate in candidates if candidate]
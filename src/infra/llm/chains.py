@@ -1,17 +1,6 @@
-from pathlib import Path
-
-from jinja2 import Environment, FileSystemLoader
-
 from infra.llm.base import LLMAdapter
 from infra.llm.schema import CommentNormOutput
-
-_PROMPT_DIR = Path(__file__).resolve().parent / "prompts"
-_PROMPT_ENV = Environment(
-    loader=FileSystemLoader(_PROMPT_DIR),
-    autoescape=False,
-    trim_blocks=True,
-    lstrip_blocks=True,
-)
+from infra.llm.templates import render_prompt
 
 
 class CommentNormChain:
@@ -21,6 +10,15 @@ class CommentNormChain:
         self._adapter = adapter
 
     def run(self, task_goal: str, target_file: str) -> CommentNormOutput:
-        template = _PROMPT_ENV.get_template("comment_norm.j2")
-        prompt = template.render(task_goal=task_goal, target_file=target_file)
-        return self._adapter.invoke_structured(prompt=prompt, schema=CommentNormOutput)
+        return self._adapter.invoke_structured(
+            prompt=self._prompt(task_goal, target_file), schema=CommentNormOutput
+        )
+
+    async def arun(self, task_goal: str, target_file: str) -> CommentNormOutput:
+        return await self._adapter.ainvoke_structured(
+            prompt=self._prompt(task_goal, target_file), schema=CommentNormOutput
+        )
+
+    @staticmethod
+    def _prompt(task_goal: str, target_file: str) -> str:
+        return render_prompt("comment_norm.j2", task_goal=task_goal, target_file=target_file)
@@ -1,6 +1,36 @@
+from __future__ import annotations
+
+from threading import Lock
+from typing import TYPE_CHECKING, Any
+
 from core.settings import Settings
 from infra.llm.base import LLMAdapter
 
+if TYPE_CHECKING:
+    import httpx
+
+_adapters: dict[tuple[Any, ...], LLMAdapter] = {}
+_http_clients: dict[tuple[int, int], tuple[httpx.Client, httpx.AsyncClient]] = {}
+_pool_lock = Lock()
+# Separate from `_pool_lock`: `build_llm_adapter` is public and reaches the
+# client pool without going through `get_llm_adapter`.
+_http_clients_lock = Lock()
+
+
+def get_llm_adapter(cfg: Settings) -> LLMAdapter:
+    """The process-wide adapter for `cfg`'s provider, model, endpoint and timeout.
+
+    Adapters are built once and reused, so every chain shares the same chat
+    model clients and their keep-alive connections.
+    """
+    key = _adapter_key(cfg)
+    with _pool_lock:
+        adapter = _adapters.get(key)
+        if adapter is None:
+            adapter = build_llm_adapter(cfg)
+            _adapters[key] = adapter
+    return adapter
+
 
 def build_llm_adapter(cfg: Settings) -> LLMAdapter:
     provider = cfg.llm_provider.strip().lower()
@@ -16,6 +46,7 @@ def build_llm_adapter(cfg: Settings) -> LLMAdapter:
             base_url=cfg.openai_base_url,
             temperature=cfg.llm_temperature,
             timeout_seconds=cfg.llm_timeout_seconds,
+            **_shared_http_clients(cfg),
         )
 
     if provider == "anthropic":
@@ -48,6 +79,49 @@ def build_llm_adapter(cfg: Settings) -> LLMAdapter:
             api_version=cfg.azure_openai_api_version,
             temperature=cfg.llm_temperature,
             timeout_seconds=cfg.llm_timeout_seconds,
+            **_shared_http_clients(cfg),
         )
 
     raise ValueError(f"Unsupported llm_provider '{cfg.llm_provider}'")
+
+
+def _adapter_key(cfg: Settings) -> tuple[Any, ...]:
+    provider = cfg.llm_provider.strip().lower()
+    shared = (provider, cfg.llm_timeout_seconds, cfg.llm_temperature)
+    if provider == "azure":
+        return (
+            *shared,
+            cfg.azure_openai_deployment or cfg.llm_model,
+            cfg.azure_openai_endpoint,
+            cfg.azure_openai_api_version,
+            cfg.azure_openai_api_key,
+        )
+    if provider == "anthropic":
+        return (*shared, cfg.llm_model, cfg.anthropic_api_key)
+    return (*shared, cfg.llm_model, cfg.openai_base_url, cfg.openai_api_key)
+
+
+def _shared_http_clients(cfg: Settings) -> dict[str, Any]:
+    # langchain-anthropic builds its own cached httpx client and accepts none.
+    import httpx
+
+    from infra.llm.http_pool import LoopLocalTransport
+
+    key = (cfg.llm_timeout_seconds, cfg.llm_http_pool_size)
+    with _http_clients_lock:
+        clients = _http_clients.get(key)
+        if clients is None:
+            limits = httpx.Limits(
+                max_connections=cfg.llm_http_pool_size,
+                max_keepalive_connections=cfg.llm_http_pool_size,
+            )
+            clients = (
+                httpx.Client(timeout=cfg.llm_timeout_seconds, limits=limits),
+                # Async connections are bound to one event loop, so they pool per loop.
+                httpx.AsyncClient(
+                    timeout=cfg.llm_timeout_seconds,
+                    transport=LoopLocalTransport(limits=limits),
+                ),
+            )
+            _http_clients[key] = clients
+    return {"http_client": clients[0], "http_async_client": clients[1]}
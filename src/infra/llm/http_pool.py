@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+import asyncio
+from threading import Lock
+
+import httpx
+
+
+class LoopLocalTransport(httpx.AsyncBaseTransport):
+    """Async transport holding one connection pool per running event loop.
+
+    httpx connections belong to the loop that opened them, so one pool shared
+    by several loops fails with "Event loop is closed" once an earlier loop is
+    gone. A pool's connections reference their loop, so loops cannot be weak
+    keys; pools of closed loops are dropped on the next request instead.
+    """
+
+    def __init__(self, *, limits: httpx.Limits) -> None:
+        self._limits = limits
+        self._lock = Lock()
+        self._pools: dict[asyncio.AbstractEventLoop, httpx.AsyncHTTPTransport] = {}
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        return await self._pool().handle_async_request(request)
+
+    async def aclose(self) -> None:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            pool = self._pools.pop(loop, None)
+        if pool is not None:
+            await pool.aclose()
+
+    def _pool(self) -> httpx.AsyncHTTPTransport:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            for closed in [other for other in self._pools if other.is_closed()]:
+                # Their sockets cannot be closed gracefully without their loop.
+                del self._pools[closed]
+            pool = self._pools.get(loop)
+            if pool is None:
+                pool = self._pools[loop] = httpx.AsyncHTTPTransport(limits=self._limits)
+            return pool
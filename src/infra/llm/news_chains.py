@@ -1,20 +1,10 @@
 from __future__ import annotations
 
 import json
-from pathlib import Path
-
-from jinja2 import Environment, FileSystemLoader
 
 from infra.llm.base import LLMAdapter
 from infra.llm.news_schema import NewsExtractOutput, NewsTranslateOutput
-
-_PROMPT_DIR = Path(__file__).resolve().parent / "prompts"
-_PROMPT_ENV = Environment(
-    loader=FileSystemLoader(_PROMPT_DIR),
-    autoescape=False,
-    trim_blocks=True,
-    lstrip_blocks=True,
-)
+from infra.llm.templates import render_prompt
 
 
 class NewsExtractChain:
@@ -22,12 +12,20 @@ class NewsExtractChain:
         self._adapter = adapter
 
     def run(self, *, raw_cards: list[dict[str, str]], top_k: int) -> NewsExtractOutput:
-        template = _PROMPT_ENV.get_template("news_extract.j2")
-        prompt = template.render(
+        prompt = self._prompt(raw_cards=raw_cards, top_k=top_k)
+        return self._adapter.invoke_structured(prompt=prompt, schema=NewsExtractOutput)
+
+    async def arun(self, *, raw_cards: list[dict[str, str]], top_k: int) -> NewsExtractOutput:
+        prompt = self._prompt(raw_cards=raw_cards, top_k=top_k)
+        return await self._adapter.ainvoke_structured(prompt=prompt, schema=NewsExtractOutput)
+
+    @staticmethod
+    def _prompt(*, raw_cards: list[dict[str, str]], top_k: int) -> str:
+        return render_prompt(
+            "news_extract.j2",
             raw_cards_json=json.dumps(raw_cards, ensure_ascii=True),
             top_k=top_k,
         )
-        return self._adapter.invoke_structured(prompt=prompt, schema=NewsExtractOutput)
 
 
 class NewsTranslateChain:
@@ -35,6 +33,17 @@ class NewsTranslateChain:
         self._adapter = adapter
 
     def run(self, *, items_en: list[dict[str, str]], date: str) -> NewsTranslateOutput:
-        template = _PROMPT_ENV.get_template("news_translate.j2")
-        prompt = template.render(items_en_json=json.dumps(items_en, ensure_ascii=True), date=date)
+        prompt = self._prompt(items_en=items_en, date=date)
         return self._adapter.invoke_structured(prompt=prompt, schema=NewsTranslateOutput)
+
+    async def arun(self, *, items_en: list[dict[str, str]], date: str) -> NewsTranslateOutput:
+        prompt = self._prompt(items_en=items_en, date=date)
+        return await self._adapter.ainvoke_structured(prompt=prompt, schema=NewsTranslateOutput)
+
+    @staticmethod
+    def _prompt(*, items_en: list[dict[str, str]], date: str) -> str:
+        return render_prompt(
+            "news_translate.j2",
+            items_en_json=json.dumps(items_en, ensure_ascii=True),
+            date=date,
+        )
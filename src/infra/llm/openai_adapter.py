@@ -1,10 +1,13 @@
+import httpx
 from langchain_openai import ChatOpenAI
 from pydantic import SecretStr
 
-from infra.llm.base import ModelT, extract_text_content, parse_structured_result
+from infra.llm.base import ChatModelAdapter
 
 
-class OpenAIAdapter:
+class OpenAIAdapter(ChatModelAdapter):
+    provider = "openai"
+
     def __init__(
         self,
         *,
@@ -13,21 +16,17 @@ class OpenAIAdapter:
         base_url: str | None,
         temperature: float,
         timeout_seconds: int,
+        http_client: httpx.Client | None = None,
+        http_async_client: httpx.AsyncClient | None = None,
     ) -> None:
-        self._model = ChatOpenAI(
-            model=model,
-            api_key=SecretStr(api_key),
-            base_url=base_url,
-            temperature=temperature,
-            timeout=timeout_seconds,
+        super().__init__(
+            ChatOpenAI(
+                model=model,
+                api_key=SecretStr(api_key),
+                base_url=base_url,
+                temperature=temperature,
+                timeout=timeout_seconds,
+                http_client=http_client,
+                http_async_client=http_async_client,
+            )
         )
-
-    def invoke_structured(self, prompt: str, schema: type[ModelT]) -> ModelT:
-        runner = self._model.with_structured_output(schema)
-        try:
-            result = runner.invoke(prompt)
-            return parse_structured_result(result, schema)
-        except Exception:
-            raw_result = self._model.invoke(prompt)
-            raw_text = extract_text_content(raw_result)
-            return parse_structured_result(raw_text, schema)
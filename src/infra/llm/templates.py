@@ -0,0 +1,27 @@
+from __future__ import annotations
+
+from functools import cache
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from jinja2 import Environment
+
+_PROMPT_DIR = Path(__file__).resolve().parent / "prompts"
+
+
+@cache
+def prompt_environment() -> Environment:
+    """Jinja environment for prompt templates, built (and jinja2 imported) on first use."""
+    from jinja2 import Environment, FileSystemLoader
+
+    return Environment(
+        loader=FileSystemLoader(_PROMPT_DIR),
+        autoescape=False,
+        trim_blocks=True,
+        lstrip_blocks=True,
+    )
+
+
+def render_prompt(template_name: str, **context: Any) -> str:
+    return prompt_environment().get_template(template_name).render(**context)
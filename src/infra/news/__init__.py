@@ -1,3 +1,24 @@
-from infra.news.playwright_google_news import extract_cards_from_html, fetch_google_news_homepage
+from importlib import import_module
+from typing import TYPE_CHECKING, Any
 
-__all__ = ["extract_cards_from_html", "fetch_google_news_homepage"]
+if TYPE_CHECKING:
+    from infra.news.playwright_google_news import (
+        afetch_google_news_homepage,
+        extract_cards_from_html,
+        fetch_google_news_homepage,
+    )
+
+_EXPORTS = {
+    "afetch_google_news_homepage": "infra.news.playwright_google_news",
+    "extract_cards_from_html": "infra.news.playwright_google_news",
+    "fetch_google_news_homepage": "infra.news.playwright_google_news",
+}
+
+__all__ = ["afetch_google_news_homepage", "extract_cards_from_html", "fetch_google_news_homepage"]
+
+
+def __getattr__(name: str) -> Any:
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(import_module(module_name), name)
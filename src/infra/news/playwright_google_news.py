@@ -6,6 +6,8 @@ from pathlib import Path
 from typing import Any
 from urllib.parse import urljoin
 
+from core.metrics import BROWSER_NAVIGATION_DURATION
+
 _DEFAULT_URL = "https://news.ycombinator.com/"
 
 
@@ -72,13 +74,73 @@ def fetch_google_news_homepage(
     with sync_playwright() as playwright:
         browser = playwright.chromium.launch(headless=True)
         page = browser.new_page()
-        page.goto(source_url, wait_until="domcontentloaded", timeout=timeout_ms)
+        with BROWSER_NAVIGATION_DURATION.time():
+            page.goto(source_url, wait_until="domcontentloaded", timeout=timeout_ms)
         page.wait_for_timeout(500)
 
         cards = _extract_cards_from_page(page=page, source_url=source_url, max_items=max_items)
         html = page.content()
         browser.close()
 
+    return _fetch_result(
+        cards=cards,
+        html=html,
+        source_url=source_url,
+        max_items=max_items,
+        snapshot_dir=snapshot_dir,
+    )
+
+
+async def afetch_google_news_homepage(
+    *,
+    url: str,
+    max_items: int,
+    timeout_ms: int,
+    snapshot_dir: str,
+) -> dict[str, Any]:
+    """Async variant of `fetch_google_news_homepage` built on `playwright.async_api`."""
+    try:
+        from playwright.async_api import async_playwright
+    except Exception as exc:  # pragma: no cover - depends on local environment
+        raise RuntimeError(
+            "Playwright is required for fetch_google_news_homepage. "
+            "Install playwright and browsers."
+        ) from exc
+
+    source_url = url or _DEFAULT_URL
+
+    async with async_playwright() as playwright:
+        browser = await playwright.chromium.launch(headless=True)
+        try:
+            page = await browser.new_page()
+            with BROWSER_NAVIGATION_DURATION.time():
+                await page.goto(source_url, wait_until="domcontentloaded", timeout=timeout_ms)
+            await page.wait_for_timeout(500)
+
+            cards = await _aextract_cards_from_page(
+                page=page, source_url=source_url, max_items=max_items
+            )
+            html = await page.content()
+        finally:
+            await browser.close()
+
+    return _fetch_result(
+        cards=cards,
+        html=html,
+        source_url=source_url,
+        max_items=max_items,
+        snapshot_dir=snapshot_dir,
+    )
+
+
+def _fetch_result(
+    *,
+    cards: list[dict[str, str]],
+    html: str,
+    source_url: str,
+    max_items: int,
+    snapshot_dir: str,
+) -> dict[str, Any]:
     if not cards:
         cards = extract_cards_from_html(html=html, source_url=source_url, max_items=max_items)
 
@@ -122,6 +184,60 @@ def _extract_cards_from_page(*, page: Any, source_url: str, max_items: int) -> l
     return cards
 
 
+async def _aextract_cards_from_page(
+    *, page: Any, source_url: str, max_items: int
+) -> list[dict[str, str]]:
+    cards: list[dict[str, str]] = []
+    row_locator = page.locator("tr.athing")
+    row_count = min(await row_locator.count(), max_items * 3)
+
+    for index in range(row_count):
+        row = row_locator.nth(index)
+        title = await _asafe_text(row, "span.titleline > a")
+        href = await _asafe_attr(row, "span.titleline > a", "href")
+        subtext = row.locator("xpath=following-sibling::tr[1]").first
+        snippet = await _asafe_text(subtext, ".score")
+        if not snippet:
+            snippet = await _asafe_text(subtext, "a[href^='item?id=']")
+        if not title or not href:
+            continue
+
+        cards.append(
+            {
+                "title": title,
+                "url": urljoin(source_url, href),
+                "snippet": snippet,
+                "source": "Hacker News",
+            }
+        )
+        if len(cards) >= max_items:
+            break
+
+    return cards
+
+
+async def _asafe_text(node: Any, selector: str) -> str:
+    try:
+        found = node.locator(selector).first
+        if await found.count() == 0:
+            return ""
+        text = (await found.inner_text()).strip()
+        return " ".join(text.split())
+    except Exception:
+        return ""
+
+
+async def _asafe_attr(node: Any, selector: str, attribute: str) -> str:
+    try:
+        found = node.locator(selector).first
+        if await found.count() == 0:
+            return ""
+        value = await found.get_attribute(attribute)
+        return value.strip() if isinstance(value, str) else ""
+    except Exception:
+        return ""
+
+
 def _safe_text(node: Any, selector: str) -> str:
     try:
         found = node.locator(selector).first
@@ -178,4 +294,4 @@ def _write_html_snapshot(*, snapshot_dir: str, html: str) -> str:
     return str(path)
 
 
-__all__ = ["extract_cards_from_html", "fetch_google_news_homepage"]
+__all__ = ["afetch_google_news_homepage", "extract_cards_from_html", "fetch_google_news_homepage"]
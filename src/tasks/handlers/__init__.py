@@ -1,17 +1,39 @@
-from tasks.handlers.append_hello_agent_comment import AppendHelloAgentCommentHandler
-from tasks.handlers.base import TaskHandler
-from tasks.handlers.daily_google_news_report_pipeline import DailyGoogleNewsReportPipelineHandler
-from tasks.handlers.extract_top10_en_news import ExtractTop10EnNewsHandler
-from tasks.handlers.fetch_google_news_homepage import FetchGoogleNewsHomepageHandler
-from tasks.handlers.translate_news_and_render_markdown import (
-    TranslateNewsAndRenderMarkdownHandler,
-)
+from importlib import import_module
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from tasks.handlers.append_hello_agent_comment import AppendHelloAgentCommentHandler
+    from tasks.handlers.base import TaskHandler
+    from tasks.handlers.extract_top10_en_news import ExtractTop10EnNewsHandler
+    from tasks.handlers.fetch_google_news_homepage import FetchGoogleNewsHomepageHandler
+    from tasks.handlers.pipeline import PipelineHandler
+    from tasks.handlers.translate_news_and_render_markdown import (
+        TranslateNewsAndRenderMarkdownHandler,
+    )
+
+# Handlers are imported on first attribute access so importing one handler
+# module does not drag in the dependencies of all the others.
+_EXPORTS = {
+    "AppendHelloAgentCommentHandler": "tasks.handlers.append_hello_agent_comment",
+    "ExtractTop10EnNewsHandler": "tasks.handlers.extract_top10_en_news",
+    "FetchGoogleNewsHomepageHandler": "tasks.handlers.fetch_google_news_homepage",
+    "PipelineHandler": "tasks.handlers.pipeline",
+    "TaskHandler": "tasks.handlers.base",
+    "TranslateNewsAndRenderMarkdownHandler": "tasks.handlers.translate_news_and_render_markdown",
+}
 
 __all__ = [
     "AppendHelloAgentCommentHandler",
-    "DailyGoogleNewsReportPipelineHandler",
     "ExtractTop10EnNewsHandler",
     "FetchGoogleNewsHomepageHandler",
+    "PipelineHandler",
     "TaskHandler",
     "TranslateNewsAndRenderMarkdownHandler",
 ]
+
+
+def __getattr__(name: str) -> Any:
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(import_module(module_name), name)
@@ -1,13 +1,15 @@
 from __future__ import annotations
 
 from pathlib import Path
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
 from infra.fs import append_text
-from infra.llm.chains import CommentNormChain
 from tasks.handlers.base import TaskHandler
 from tasks.registry import TaskSpec
 
+if TYPE_CHECKING:
+    from infra.llm.chains import CommentNormChain
+
 
 class AppendHelloAgentCommentHandler(TaskHandler):
     task_id = "append_hello_agent_comment"
@@ -26,9 +28,7 @@ class AppendHelloAgentCommentHandler(TaskHandler):
             return payload, None, None
 
         if comment_chain is None:
-            error_message = "LLM chain was not initialized"
-            fatal_error = error_message if not llm_fallback_to_rules else None
-            return payload, error_message, fatal_error
+            return _llm_unavailable(payload, "LLM chain was not initialized", llm_fallback_to_rules)
 
         try:
             target_file = str(payload["target_file"])
@@ -36,9 +36,30 @@ class AppendHelloAgentCommentHandler(TaskHandler):
             next_payload = {**payload, "comment_text": generated.comment_text}
             return next_payload, None, None
         except Exception as exc:
-            error_message = f"LLM generation failed: {exc}"
-            fatal_error = error_message if not llm_fallback_to_rules else None
-            return payload, error_message, fatal_error
+            return _llm_unavailable(payload, f"LLM generation failed: {exc}", llm_fallback_to_rules)
+
+    async def apreprocess_with_llm(
+        self,
+        *,
+        payload: dict[str, Any],
+        spec: TaskSpec,
+        llm_enabled: bool,
+        llm_fallback_to_rules: bool,
+        comment_chain: CommentNormChain | None,
+    ) -> tuple[dict[str, Any], str | None, str | None]:
+        if not llm_enabled:
+            return payload, None, None
+
+        if comment_chain is None:
+            return _llm_unavailable(payload, "LLM chain was not initialized", llm_fallback_to_rules)
+
+        try:
+            target_file = str(payload["target_file"])
+            generated = await comment_chain.arun(task_goal=spec.goal, target_file=target_file)
+            next_payload = {**payload, "comment_text": generated.comment_text}
+            return next_payload, None, None
+        except Exception as exc:
+            return _llm_unavailable(payload, f"LLM generation failed: {exc}", llm_fallback_to_rules)
 
     def execute(self, payload: dict[str, Any], spec: TaskSpec) -> dict[str, Any]:
         target_file = str(payload["target_file"])
@@ -77,3 +98,12 @@ class AppendHelloAgentCommentHandler(TaskHandler):
         elif not normalized.startswith("# "):
             normalized = f"# {normalized.lstrip('#').strip()}"
         return normalized
+
+
+def _llm_unavailable(
+    payload: dict[str, Any],
+    error_message: str,
+    llm_fallback_to_rules: bool,
+) -> tuple[dict[str, Any], str | None, str | None]:
+    fatal_error = error_message if not llm_fallback_to_rules else None
+    return payload, error_message, fatal_error
@@ -1,20 +1,34 @@
 from __future__ import annotations
 
+import asyncio
 from abc import ABC, abstractmethod
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
-from infra.llm.chains import CommentNormChain
 from tasks.registry import TaskSpec
-from tasks.validation import validate_task_payload
+from tasks.validation import validate_task_output, validate_task_payload
+
+if TYPE_CHECKING:
+    from infra.llm.chains import CommentNormChain
 
 
 class TaskHandler(ABC):
     task_id: str
     requires_llm: bool = False
 
+    def warmup(self) -> None:
+        """Prepare long-lived resources before the first execution."""
+        return None
+
+    def shutdown(self) -> None:
+        """Release long-lived resources acquired by `warmup` or `execute`."""
+        return None
+
     def validate_payload(self, payload: dict[str, Any], spec: TaskSpec) -> dict[str, Any]:
         return validate_task_payload(spec, payload)
 
+    def validate_output(self, response: dict[str, Any], spec: TaskSpec) -> None:
+        validate_task_output(spec, response)
+
     def plan(self, payload: dict[str, Any], spec: TaskSpec) -> str:
         del payload
         return spec.goal
@@ -31,10 +45,37 @@ class TaskHandler(ABC):
         del spec, llm_enabled, llm_fallback_to_rules, comment_chain
         return payload, None, None
 
+    async def apreprocess_with_llm(
+        self,
+        *,
+        payload: dict[str, Any],
+        spec: TaskSpec,
+        llm_enabled: bool,
+        llm_fallback_to_rules: bool,
+        comment_chain: CommentNormChain | None,
+    ) -> tuple[dict[str, Any], str | None, str | None]:
+        """Async `preprocess_with_llm`; runs the sync version in a worker thread by default."""
+        return await asyncio.to_thread(
+            lambda: self.preprocess_with_llm(
+                payload=payload,
+                spec=spec,
+                llm_enabled=llm_enabled,
+                llm_fallback_to_rules=llm_fallback_to_rules,
+                comment_chain=comment_chain,
+            )
+        )
+
     @abstractmethod
     def execute(self, payload: dict[str, Any], spec: TaskSpec) -> dict[str, Any]:
         raise NotImplementedError
 
+    async def aexecute(self, payload: dict[str, Any], spec: TaskSpec) -> dict[str, Any]:
+        """Async `execute`; runs the sync version in a worker thread by default.
+
+        I/O-bound handlers override this so a run holds no thread while it waits.
+        """
+        return await asyncio.to_thread(self.execute, payload, spec)
+
     def format_response(
         self,
         *,
@@ -3,8 +3,9 @@ from __future__ import annotations
 from typing import Any
 
 from core.settings import settings
-from infra.llm.factory import build_llm_adapter
+from infra.llm.factory import get_llm_adapter
 from infra.llm.news_chains import NewsExtractChain
+from infra.llm.news_schema import NewsExtractOutput
 from tasks.handlers.base import TaskHandler
 from tasks.registry import TaskSpec
 
@@ -14,26 +15,37 @@ class ExtractTop10EnNewsHandler(TaskHandler):
 
     def execute(self, payload: dict[str, Any], spec: TaskSpec) -> dict[str, Any]:
         del spec
-        raw_cards = payload.get("raw_cards")
-        if not isinstance(raw_cards, list):
-            raise ValueError("raw_cards must be an array")
-
-        top_k = int(payload.get("top_k") or 10)
-        if top_k <= 0:
-            raise ValueError("top_k must be > 0")
-
-        if not settings.llm_enabled:
-            raise RuntimeError("LLM is required for extract_top10_en_news")
-
-        adapter = build_llm_adapter(settings)
-        chain = NewsExtractChain(adapter)
-        output = chain.run(raw_cards=_coerce_raw_cards(raw_cards), top_k=top_k)
-
-        normalized_items = _normalize_items(output.model_dump().get("items_en", []), top_k=top_k)
-        return {
-            "items_en": normalized_items,
-            "selection_notes": output.selection_notes,
-        }
+        raw_cards, top_k = _extract_options(payload)
+        chain = NewsExtractChain(get_llm_adapter(settings))
+        return _extract_result(chain.run(raw_cards=raw_cards, top_k=top_k), top_k=top_k)
+
+    async def aexecute(self, payload: dict[str, Any], spec: TaskSpec) -> dict[str, Any]:
+        del spec
+        raw_cards, top_k = _extract_options(payload)
+        chain = NewsExtractChain(get_llm_adapter(settings))
+        return _extract_result(await chain.arun(raw_cards=raw_cards, top_k=top_k), top_k=top_k)
+
+
+def _extract_options(payload: dict[str, Any]) -> tuple[list[dict[str, str]], int]:
+    raw_cards = payload.get("raw_cards")
+    if not isinstance(raw_cards, list):
+        raise ValueError("raw_cards must be an array")
+
+    top_k = int(payload.get("top_k") or 10)
+    if top_k <= 0:
+        raise ValueError("top_k must be > 0")
+
+    if not settings.llm_enabled:
+        raise RuntimeError("LLM is required for extract_top10_en_news")
+    return _coerce_raw_cards(raw_cards), top_k
+
+
+def _extract_result(output: NewsExtractOutput, *, top_k: int) -> dict[str, Any]:
+    normalized_items = _normalize_items(output.model_dump().get("items_en", []), top_k=top_k)
+    return {
+        "items_en": normalized_items,
+        "selection_notes": output.selection_notes,
+    }
 
 
 def _coerce_raw_cards(raw_cards: list[Any]) -> list[dict[str, str]]:
@@ -2,7 +2,10 @@ from __future__ import annotations
 
 from typing import Any
 
-from infra.news.playwright_google_news import fetch_google_news_homepage
+from infra.news.playwright_google_news import (
+    afetch_google_news_homepage,
+    fetch_google_news_homepage,
+)
 from tasks.handlers.base import TaskHandler
 from tasks.registry import TaskSpec
 
@@ -14,17 +17,20 @@ class FetchGoogleNewsHomepageHandler(TaskHandler):
 
     def execute(self, payload: dict[str, Any], spec: TaskSpec) -> dict[str, Any]:
         del spec
-        url = str(payload.get("url") or _DEFAULT_URL)
-        max_items = int(payload.get("max_items") or 10)
-        timeout_ms = int(payload.get("timeout_ms") or 30000)
-        snapshot_dir = str(payload.get("snapshot_dir") or "artifacts/news_raw")
-
-        if max_items <= 0:
-            raise ValueError("max_items must be > 0")
-
-        return fetch_google_news_homepage(
-            url=url,
-            max_items=max_items,
-            timeout_ms=timeout_ms,
-            snapshot_dir=snapshot_dir,
-        )
+        return fetch_google_news_homepage(**_fetch_options(payload))
+
+    async def aexecute(self, payload: dict[str, Any], spec: TaskSpec) -> dict[str, Any]:
+        del spec
+        return await afetch_google_news_homepage(**_fetch_options(payload))
+
+
+def _fetch_options(payload: dict[str, Any]) -> dict[str, Any]:
+    max_items = int(payload.get("max_items") or 10)
+    if max_items <= 0:
+        raise ValueError("max_items must be > 0")
+    return {
+        "url": str(payload.get("url") or _DEFAULT_URL),
+        "max_items": max_items,
+        "timeout_ms": int(payload.get("timeout_ms") or 30000),
+        "snapshot_dir": str(payload.get("snapshot_dir") or "artifacts/news_raw"),
+    }
@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import asyncio
+import os
+from threading import Lock, Thread
+from time import perf_counter
+from typing import Any
+
+from core.context import current_context
+from core.events import emit_step_event
+from core.metrics import PIPELINE_STEP_DURATION
+from core.runs import active_run
+from tasks.handlers.base import TaskHandler
+from tasks.pipeline import resolve
+from tasks.registry import PipelineStep, TaskPipeline, TaskSpec
+
+
+class PipelineHandler(TaskHandler):
+    """Runs the `pipeline` steps declared in a task YAML as sub-tasks.
+
+    A step starts as soon as the steps it reads from or `needs` have finished,
+    so independent steps run concurrently. The result is the `pipeline.output`
+    mapping (every step result by id when omitted) plus per-step `steps` timings.
+    """
+
+    def __init__(self, task_id: str) -> None:
+        self.task_id = task_id
+
+    @classmethod
+    def for_spec(cls, spec: TaskSpec) -> PipelineHandler:
+        if spec.pipeline is None:
+            raise ValueError(f"Task '{spec.id}' uses {cls.__name__} but declares no pipeline.")
+        return cls(spec.id)
+
+    def execute(self, payload: dict[str, Any], spec: TaskSpec) -> dict[str, Any]:
+        # Sync runs share one long-lived loop rather than a fresh `asyncio.run`
+        # each, so async resources pooled per loop stay usable across runs.
+        # Scheduling copies this thread's context, so the run scope carries over.
+        loop = _shared_loop()
+        if _running_loop() is loop:
+            raise RuntimeError("PipelineHandler.execute cannot block its own event loop")
+        return asyncio.run_coroutine_threadsafe(self.aexecute(payload, spec), loop).result()
+
+    async def aexecute(self, payload: dict[str, Any], spec: TaskSpec) -> dict[str, Any]:
+        pipeline = _pipeline(spec)
+        results: dict[str, dict[str, Any]] = {}
+        records: dict[str, dict[str, Any]] = {}
+        started = perf_counter()
+        running: dict[str, asyncio.Task[None]] = {}
+        try:
+            async with asyncio.TaskGroup() as group:
+                for step in pipeline.ordered_steps():
+                    after = [running[step_id] for step_id in step.dependencies()]
+                    running[step.id] = group.create_task(
+                        self._arun_step(step, after, payload, results, records, started)
+                    )
+        except BaseExceptionGroup as failures:
+            raise failures.exceptions[0] from None
+
+        steps = [records[step.id] for step in pipeline.steps]
+        if not pipeline.output:
+            return {**results, "steps": steps}
+        return {**resolve(pipeline.output, inputs=payload, results=results), "steps": steps}
+
+    async def _arun_step(
+        self,
+        step: PipelineStep,
+        after: list[asyncio.Task[None]],
+        payload: dict[str, Any],
+        results: dict[str, dict[str, Any]],
+        records: dict[str, dict[str, Any]],
+        pipeline_started: float,
+    ) -> None:
+        for dependency in after:
+            await dependency
+        started = perf_counter()
+        record: dict[str, Any] = {
+            "name": step.id,
+            "task_id": step.task,
+            "started_ms": int((started - pipeline_started) * 1000),
+        }
+        records[step.id] = record
+
+        run = active_run()
+        resumed = run.step_result(_checkpoint_name(step)) if run is not None else None
+        if resumed is not None:
+            results[step.id] = resumed
+            _finish_record(record, "resumed", 0)
+            return
+
+        step_payload = {
+            key: value
+            for key, value in resolve(step.inputs, inputs=payload, results=results).items()
+            if value is not None
+        }
+        try:
+            result = await current_context().arun_subtask(step.task, step_payload, name=step.id)
+        except Exception as exc:
+            elapsed = perf_counter() - started
+            PIPELINE_STEP_DURATION.observe(elapsed, step=step.id, status="failed")
+            _finish_record(record, "failed", elapsed, error=str(exc))
+            raise RuntimeError(f"Step '{step.id}' failed: {exc}") from exc
+
+        elapsed = perf_counter() - started
+        PIPELINE_STEP_DURATION.observe(elapsed, step=step.id, status="ok")
+        if run is not None:
+            run.record_step(_checkpoint_name(step), result)
+        results[step.id] = result
+        _finish_record(record, "ok", elapsed)
+
+
+_loop_lock = Lock()
+_loop: asyncio.AbstractEventLoop | None = None
+_loop_pid = 0
+
+
+def _shared_loop() -> asyncio.AbstractEventLoop:
+    global _loop, _loop_pid
+    with _loop_lock:
+        # A forked worker inherits the loop object but not the thread running it.
+        if _loop is None or _loop_pid != os.getpid():
+            loop = asyncio.new_event_loop()
+            Thread(target=loop.run_forever, name="p4agent-pipeline-loop", daemon=True).start()
+            _loop, _loop_pid = loop, os.getpid()
+        return _loop
+
+
+def _running_loop() -> asyncio.AbstractEventLoop | None:
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
+def _checkpoint_name(step: PipelineStep) -> str:
+    # Prefixed with the span path, so the steps of a nested pipeline keep their own checkpoints.
+    return "/".join((*current_context().path, step.id))
+
+
+def _pipeline(spec: TaskSpec) -> TaskPipeline:
+    if spec.pipeline is None:
+        raise ValueError(f"Task '{spec.id}' declares no pipeline.")
+    return spec.pipeline
+
+
+def _finish_record(record: dict[str, Any], status: str, elapsed: float, **extra: Any) -> None:
+    record.update(status=status, duration_ms=int(elapsed * 1000), **extra)
+    emit_step_event(record)
@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from threading import Lock
+from typing import Any
+
+# Version 2 replaced separate manifest and spec caches with one per-file cache.
+_CACHE_VERSION = 2
+
+Fingerprint = list[tuple[str, int, int]]
+
+
+@dataclass(frozen=True)
+class TaskManifestEntry:
+    id: str
+    handler: str
+    goal: str
+    inputs: dict[str, Any] = field(default_factory=dict)
+    source: str = ""
+
+    def to_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+@dataclass(frozen=True)
+class TaskManifest:
+    """Task ids, handler paths and input schemas, readable without importing handlers."""
+
+    entries: tuple[TaskManifestEntry, ...]
+
+    def ids(self) -> list[str]:
+        return sorted(entry.id for entry in self.entries)
+
+    def get(self, task_id: str) -> TaskManifestEntry:
+        for entry in self.entries:
+            if entry.id == task_id:
+                return entry
+        known = ", ".join(self.ids())
+        raise KeyError(f"Unknown task_id '{task_id}'. Known tasks: {known}")
+
+
+_memory_cache: dict[Path, dict[str, dict[str, Any]]] = {}
+_memory_lock = Lock()
+
+
+def load_task_manifest(task_dir: Path, *, cache_dir: Path | None = None) -> TaskManifest:
+    """Return task ids, handler paths and input schemas without importing handlers.
+
+    Built from the same per-file cache as `load_task_specs`, so both see the
+    same YAML files and are invalidated together.
+    """
+    return TaskManifest(
+        entries=tuple(
+            TaskManifestEntry(
+                id=spec["id"],
+                handler=spec["handler"],
+                goal=spec["goal"],
+                inputs=spec["inputs"],
+                source=name,
+            )
+            for name, spec in _load_documents(task_dir, cache_dir).items()
+        )
+    )
+
+
+def load_task_specs(task_dir: Path, *, cache_dir: Path | None = None) -> dict[str, dict[str, Any]]:
+    """Return validated `TaskSpec` documents by task id, parsing only changed YAML files."""
+    # Later files win on duplicate ids, as when the specs were loaded directly.
+    return {spec["id"]: spec for spec in _load_documents(task_dir, cache_dir).values()}
+
+
+def _load_documents(task_dir: Path, cache_dir: Path | None) -> dict[str, dict[str, Any]]:
+    """Validated spec documents by YAML file name.
+
+    Each file's document is cached in process and as JSON under `cache_dir`
+    with the file's mtime and size. Unchanged files skip YAML parsing and
+    pydantic validation, so a cold process with a warm cache parses nothing;
+    a changed file is validated again so config errors still surface on load.
+    """
+    resolved = task_dir.resolve()
+    cache_path = _cache_path(cache_dir, resolved) if cache_dir is not None else None
+    with _memory_lock:
+        cached = _memory_cache.get(resolved)
+    if cached is None:
+        cached = _read_cache(cache_path) if cache_path is not None else {}
+
+    files: dict[str, dict[str, Any]] = {}
+    for path in sorted(resolved.glob("*.yaml")):
+        stat = path.stat()
+        entry = cached.get(path.name)
+        if (
+            not isinstance(entry, dict)
+            or not isinstance(entry.get("spec"), dict)
+            or [entry.get("mtime_ns"), entry.get("size")] != [stat.st_mtime_ns, stat.st_size]
+        ):
+            entry = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "spec": _parse_spec(path)}
+        files[path.name] = entry
+    if cache_path is not None and (files != cached or not cache_path.exists()):
+        _write_cache(cache_path, files)
+    with _memory_lock:
+        _memory_cache[resolved] = files
+    return {name: entry["spec"] for name, entry in files.items()}
+
+
+def _parse_spec(path: Path) -> dict[str, Any]:
+    import yaml  # type: ignore[import-untyped]
+
+    from tasks.registry import TaskSpec
+
+    with path.open("r", encoding="utf-8") as file_obj:
+        raw = yaml.safe_load(file_obj)
+    if not isinstance(raw, dict):
+        raise ValueError(f"Task config {path} must be a mapping")
+    if not isinstance(raw.get("id"), str) or not isinstance(raw.get("handler"), str):
+        raise ValueError(f"Task config {path} must define string 'id' and 'handler'")
+    document: dict[str, Any] = TaskSpec.model_validate(raw).model_dump(mode="json")
+    return document
+
+
+def config_fingerprint(task_dir: Path) -> Fingerprint:
+    """Name, mtime and size of every task YAML file; changes whenever a file does."""
+    fingerprint: Fingerprint = []
+    for path in sorted(task_dir.glob("*.yaml")):
+        stat = path.stat()
+        fingerprint.append((path.name, stat.st_mtime_ns, stat.st_size))
+    return fingerprint
+
+
+def _cache_path(cache_dir: Path, task_dir: Path) -> Path:
+    digest = hashlib.sha256(str(task_dir).encode("utf-8")).hexdigest()[:16]
+    return cache_dir / f"task_configs-{digest}.json"
+
+
+def _read_cache(path: Path) -> dict[str, Any]:
+    """Cached entries by file name; an unreadable or foreign cache is a miss."""
+    try:
+        raw = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(raw, dict) or raw.get("version") != _CACHE_VERSION:
+        return {}
+    files = raw.get("files")
+    return files if isinstance(files, dict) else {}
+
+
+def _write_cache(path: Path, files: dict[str, dict[str, Any]]) -> None:
+    tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        document = {"version": _CACHE_VERSION, "files": files}
+        tmp_path.write_text(json.dumps(document, ensure_ascii=True), encoding="utf-8")
+        os.replace(tmp_path, path)
+    except OSError:
+        # The cache is an optimization; a read-only checkout just re-parses.
+        tmp_path.unlink(missing_ok=True)
@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+from typing import Any
+
+# Step inputs and pipeline outputs are literals, or strings referring to the
+# pipeline payload (`$input.<field>`) or an earlier step's result
+# (`$steps.<step_id>.<field>[.<nested>...]`). Nested dicts and lists are
+# resolved recursively.
+_INPUT_PREFIX = "$input."
+_STEPS_PREFIX = "$steps."
+
+
+def referenced_steps(value: Any) -> set[str]:
+    """Ids of the steps whose results `value` reads."""
+    if isinstance(value, str) and value.startswith(_STEPS_PREFIX):
+        step_id, _, _ = value.removeprefix(_STEPS_PREFIX).partition(".")
+        return {step_id}
+    if isinstance(value, dict):
+        return set().union(*(referenced_steps(item) for item in value.values()))
+    if isinstance(value, list):
+        return set().union(*(referenced_steps(item) for item in value))
+    return set()
+
+
+def resolve(value: Any, *, inputs: dict[str, Any], results: dict[str, dict[str, Any]]) -> Any:
+    """Replace references in `value`; a missing field resolves to None."""
+    if isinstance(value, str):
+        if value.startswith(_INPUT_PREFIX):
+            return _lookup(inputs, value.removeprefix(_INPUT_PREFIX).split("."))
+        if value.startswith(_STEPS_PREFIX):
+            step_id, *path = value.removeprefix(_STEPS_PREFIX).split(".")
+            return _lookup(results.get(step_id), path)
+        return value
+    if isinstance(value, dict):
+        return {key: resolve(item, inputs=inputs, results=results) for key, item in value.items()}
+    if isinstance(value, list):
+        return [resolve(item, inputs=inputs, results=results) for item in value]
+    return value
+
+
+def _lookup(source: Any, path: list[str]) -> Any:
+    for key in path:
+        if not isinstance(source, dict):
+            return None
+        source = source.get(key)
+    return source
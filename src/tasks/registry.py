@@ -1,11 +1,16 @@
 from __future__ import annotations
 
+from collections.abc import Iterator, Mapping
 from importlib import import_module
 from pathlib import Path
-from typing import TYPE_CHECKING
+from threading import RLock
+from typing import TYPE_CHECKING, Any, Self
 
-import yaml  # type: ignore[import-untyped]
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr, model_validator
+
+from tasks.manifest import load_task_specs
+from tasks.pipeline import referenced_steps
+from tasks.validation import TaskValidators, compile_validators
 
 if TYPE_CHECKING:
     from tasks.handlers.base import TaskHandler
@@ -13,6 +18,10 @@ if TYPE_CHECKING:
 
 class TaskConstraint(BaseModel):
     max_attempts: int = Field(default=1, ge=1)
+    idempotent: bool = False
+    resumable: bool = False
+    max_concurrency: int | None = Field(default=None, ge=1)
+    max_queue_depth: int = Field(default=0, ge=0)
 
 
 class TaskOutput(BaseModel):
@@ -27,6 +36,54 @@ class TaskInput(BaseModel):
     required: list[str]
 
 
+class PipelineStep(BaseModel):
+    id: str
+    task: str
+    inputs: dict[str, Any] = Field(default_factory=dict)
+    needs: list[str] = Field(default_factory=list)
+
+    def dependencies(self) -> set[str]:
+        """Steps that must finish first: `needs` plus every step the inputs read."""
+        return set(self.needs) | referenced_steps(self.inputs)
+
+
+class TaskPipeline(BaseModel):
+    steps: list[PipelineStep] = Field(min_length=1)
+    output: dict[str, Any] = Field(default_factory=dict)
+
+    @model_validator(mode="after")
+    def _check_graph(self) -> Self:
+        known: set[str] = set()
+        for step in self.steps:
+            if step.id in known:
+                raise ValueError(f"Duplicate pipeline step id '{step.id}'")
+            known.add(step.id)
+        for step in self.steps:
+            unknown = sorted(step.dependencies() - known)
+            if unknown:
+                raise ValueError(f"Pipeline step '{step.id}' depends on unknown steps {unknown}")
+        unknown = sorted(referenced_steps(self.output) - known)
+        if unknown:
+            raise ValueError(f"Pipeline output references unknown steps {unknown}")
+        self.ordered_steps()
+        return self
+
+    def ordered_steps(self) -> list[PipelineStep]:
+        """Steps in dependency order; raises ValueError on a cycle."""
+        ordered: list[PipelineStep] = []
+        done: set[str] = set()
+        pending = list(self.steps)
+        while pending:
+            ready = [step for step in pending if step.dependencies() <= done]
+            if not ready:
+                cycle = ", ".join(step.id for step in pending)
+                raise ValueError(f"Pipeline steps form a cycle: {cycle}")
+            ordered.extend(ready)
+            done.update(step.id for step in ready)
+            pending = [step for step in pending if step.id not in done]
+        return ordered
+
+
 class TaskSpec(BaseModel):
     id: str
     handler: str
@@ -35,64 +92,183 @@ class TaskSpec(BaseModel):
     tools_allowed: list[str]
     constraints: TaskConstraint
     outputs: TaskOutput
+    pipeline: TaskPipeline | None = None
+
+    _validators: TaskValidators | None = PrivateAttr(default=None)
+
+
+class HandlerBuildError(RuntimeError):
+    """A task's handler could not be imported or constructed."""
 
 
 class TaskRegistry:
-    def __init__(self, task_dir: Path):
+    """Task specs and their handlers, built on first use.
+
+    Startup only reads the spec documents (see `load_task_specs`); a spec is
+    constructed on its first `get`, and a handler, with its module import, on
+    its first `get_handler`.
+    """
+
+    def __init__(self, task_dir: Path, *, cache_dir: Path | None = None):
         self._task_dir = task_dir
-        self._tasks = self._load(task_dir)
-        self._handlers = self._load_handlers(self._tasks)
+        self._cache_dir = cache_dir
+        self._documents = load_task_specs(task_dir, cache_dir=cache_dir)
+        _check_pipeline_tasks(self._documents)
+        self._tasks: dict[str, TaskSpec] = {}
+        self._handlers: dict[str, TaskHandler] = {}
+        self._lock = RLock()
 
     def get(self, task_id: str) -> TaskSpec:
-        if task_id not in self._tasks:
-            known = ", ".join(sorted(self._tasks))
+        spec = self._tasks.get(task_id)
+        if spec is not None:
+            return spec
+        if task_id not in self._documents:
+            known = ", ".join(sorted(self._documents))
             raise KeyError(f"Unknown task_id '{task_id}'. Known tasks: {known}")
-        return self._tasks[task_id]
+        with self._lock:
+            spec = self._tasks.get(task_id)
+            if spec is None:
+                spec = TaskSpec.model_validate(self._documents[task_id])
+                compile_validators(spec)
+                self._tasks[task_id] = spec
+            return spec
 
     def list_ids(self) -> list[str]:
-        return sorted(self._tasks.keys())
+        return sorted(self._documents)
 
     def get_handler(self, task_id: str) -> TaskHandler:
-        if task_id not in self._handlers:
-            known = ", ".join(sorted(self._handlers))
+        handler = self._handlers.get(task_id)
+        if handler is not None:
+            return handler
+        if task_id not in self._documents:
+            known = ", ".join(sorted(self._documents))
             raise KeyError(f"Unknown task_id '{task_id}'. Known handlers: {known}")
-        return self._handlers[task_id]
+        with self._lock:
+            # Handlers own warm resources, so exactly one is built per task.
+            handler = self._handlers.get(task_id)
+            if handler is None:
+                spec = self.get(task_id)
+                try:
+                    handler = _build_handler(spec)
+                except Exception as exc:
+                    raise HandlerBuildError(
+                        f"Could not build handler '{spec.handler}' for task_id '{task_id}': {exc}"
+                    ) from exc
+                self._handlers[task_id] = handler
+            return handler
 
-    def get_handler_map(self) -> dict[str, TaskHandler]:
-        return dict(self._handlers)
+    def check_handler(self, task_id: str) -> None:
+        """Import the handler class of `task_id` without building the handler.
 
-    @staticmethod
-    def _load(task_dir: Path) -> dict[str, TaskSpec]:
-        tasks: dict[str, TaskSpec] = {}
-        for path in sorted(task_dir.glob("*.yaml")):
-            with path.open("r", encoding="utf-8") as file_obj:
-                raw = yaml.safe_load(file_obj)
-            spec = TaskSpec.model_validate(raw)
-            tasks[spec.id] = spec
-        return tasks
+        Raises `HandlerBuildError` when the spec's handler path does not resolve.
+        """
+        spec = self.get(task_id)
+        try:
+            _handler_class(spec)
+        except Exception as exc:
+            raise HandlerBuildError(
+                f"Could not resolve handler '{spec.handler}' for task_id '{task_id}': {exc}"
+            ) from exc
 
-    @staticmethod
-    def _load_handlers(tasks: dict[str, TaskSpec]) -> dict[str, TaskHandler]:
-        handlers: dict[str, TaskHandler] = {}
-        for task_id, spec in tasks.items():
-            handlers[task_id] = _build_handler(spec)
-        return handlers
+    def handler_built(self, task_id: str) -> bool:
+        """Whether `get_handler(task_id)` would return without importing or building."""
+        return task_id in self._handlers
 
+    def get_handler_map(self) -> Mapping[str, TaskHandler]:
+        """A read-only view that builds each handler when it is first looked up."""
+        return _HandlerMap(self)
 
-def _build_handler(spec: TaskSpec) -> TaskHandler:
-    module_name, _, class_name = spec.handler.rpartition(".")
-    if not module_name or not class_name:
-        raise ValueError(
-            f"Invalid handler path '{spec.handler}' for task_id '{spec.id}'. "
-            "Expected format '<module>.<ClassName>'."
-        )
+    def loaded_handlers(self) -> list[TaskHandler]:
+        with self._lock:
+            return list(self._handlers.values())
 
-    module = import_module(module_name)
-    handler_class = getattr(module, class_name, None)
-    if handler_class is None:
-        raise ValueError(f"Handler class '{class_name}' was not found in module '{module_name}'.")
+    def reloaded(self) -> TaskRegistry:
+        """A registry for the YAML files as they are now; this one is left untouched.
+
+        Unchanged specs are carried over, and so is every built handler whose
+        task still uses the same handler path, with its warm resources.
+        """
+        fresh = TaskRegistry(self._task_dir, cache_dir=self._cache_dir)
+        with self._lock:
+            for task_id, spec in self._tasks.items():
+                if fresh._documents.get(task_id) == self._documents[task_id]:
+                    fresh._tasks[task_id] = spec
+            for task_id, handler in self._handlers.items():
+                document = fresh._documents.get(task_id)
+                if (
+                    document is not None
+                    and document["handler"] == self._documents[task_id]["handler"]
+                ):
+                    fresh._handlers[task_id] = handler
+        return fresh
+
+    def changes_since(self, previous: TaskRegistry) -> dict[str, list[str]]:
+        """Task ids added, removed or changed relative to `previous`."""
+        before, after = previous._documents, self._documents
+        return {
+            "added": sorted(after.keys() - before.keys()),
+            "removed": sorted(before.keys() - after.keys()),
+            "changed": sorted(
+                task_id
+                for task_id in after.keys() & before.keys()
+                if after[task_id] != before[task_id]
+            ),
+        }
 
-    handler = handler_class()
+
+class _HandlerMap(Mapping[str, "TaskHandler"]):
+    def __init__(self, registry: TaskRegistry) -> None:
+        self._registry = registry
+
+    def __getitem__(self, task_id: str) -> TaskHandler:
+        return self._registry.get_handler(task_id)
+
+    def __contains__(self, task_id: object) -> bool:
+        return task_id in self._registry._documents
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._registry.list_ids())
+
+    def __len__(self) -> int:
+        return len(self._registry.list_ids())
+
+
+def _check_pipeline_tasks(documents: dict[str, dict[str, Any]]) -> None:
+    calls: dict[str, list[str]] = {}
+    for task_id, document in documents.items():
+        calls[task_id] = []
+        for step in (document.get("pipeline") or {}).get("steps", []):
+            if step["task"] not in documents or step["task"] == task_id:
+                raise ValueError(
+                    f"Pipeline step '{step['id']}' of task_id '{task_id}' runs "
+                    f"unknown or recursive task '{step['task']}'."
+                )
+            calls[task_id].append(step["task"])
+
+    # Depth-first search for pipelines that reach themselves through other pipelines.
+    finished: set[str] = set()
+
+    def visit(task_id: str, chain: list[str]) -> None:
+        if task_id in chain:
+            cycle = " -> ".join([*chain[chain.index(task_id) :], task_id])
+            raise ValueError(f"Pipeline tasks run each other recursively: {cycle}.")
+        if task_id in finished:
+            return
+        for callee in calls[task_id]:
+            visit(callee, [*chain, task_id])
+        finished.add(task_id)
+
+    for task_id in calls:
+        visit(task_id, [])
+
+
+def _build_handler(spec: TaskSpec) -> TaskHandler:
+    handler_class = _handler_class(spec)
+
+    # Generic handlers (e.g. declarative pipelines) serve many specs and are
+    # built from the spec; task-specific handlers take no arguments.
+    for_spec = getattr(handler_class, "for_spec", None)
+    handler = for_spec(spec) if for_spec is not None else handler_class()
     from tasks.handlers.base import TaskHandler as TaskHandlerBase
 
     if not isinstance(handler, TaskHandlerBase):
@@ -103,3 +279,18 @@ def _build_handler(spec: TaskSpec) -> TaskHandler:
             f"Handler '{spec.handler}' has task_id '{resolved_task_id}', expected '{spec.id}'."
         )
     return handler
+
+
+def _handler_class(spec: TaskSpec) -> Any:
+    module_name, _, class_name = spec.handler.rpartition(".")
+    if not module_name or not class_name:
+        raise ValueError(
+            f"Invalid handler path '{spec.handler}' for task_id '{spec.id}'. "
+            "Expected format '<module>.<ClassName>'."
+        )
+
+    module = import_module(module_name)
+    handler_class = getattr(module, class_name, None)
+    if handler_class is None:
+        raise ValueError(f"Handler class '{class_name}' was not found in module '{module_name}'.")
+    return handler_class
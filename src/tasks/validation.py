@@ -1,10 +1,12 @@
 from __future__ import annotations
 
-from typing import Any
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any
 
-from pydantic import ConfigDict, ValidationError, create_model
+from pydantic import BaseModel, ConfigDict, ValidationError, create_model
 
-from tasks.registry import TaskSpec
+if TYPE_CHECKING:
+    from tasks.registry import TaskInput, TaskOutput, TaskSpec
 
 _TYPE_MAP: dict[str, type[Any]] = {
     "string": str,
@@ -16,23 +18,83 @@ _TYPE_MAP: dict[str, type[Any]] = {
 }
 
 
+@dataclass(frozen=True)
+class TaskValidators:
+    """Pydantic models built from a spec's `inputs` and `outputs` schemas."""
+
+    payload: type[BaseModel]
+    output: type[BaseModel]
+
+
+def compile_validators(spec: TaskSpec) -> TaskValidators:
+    """Build the spec's validators and keep them on the spec for reuse."""
+    validators = TaskValidators(
+        payload=_payload_model(spec.id, spec.inputs),
+        output=_output_model(spec.id, spec.outputs),
+    )
+    spec._validators = validators
+    return validators
+
+
 def validate_task_payload(spec: TaskSpec, payload: dict[str, Any]) -> dict[str, Any]:
     """Validate payload strictly from the task input schema."""
+    validated = _validators(spec).payload.model_validate(payload)
+    return dict(validated)
+
+
+def validate_task_output(spec: TaskSpec, response: dict[str, Any]) -> None:
+    """Check a successful response against the task output schema.
+
+    Required properties must be present with their declared type; extra keys
+    such as `steps` or `subtasks` are allowed.
+    """
+    _validators(spec).output.model_validate(response)
+
+
+def _validators(spec: TaskSpec) -> TaskValidators:
+    # Specs loaded by the registry are compiled up front; others on first use.
+    validators = spec._validators
+    return validators if validators is not None else compile_validators(spec)
+
+
+def _payload_model(task_id: str, schema: TaskInput) -> type[BaseModel]:
     fields: dict[str, tuple[type[Any], Any]] = {}
-    required = set(spec.inputs.required)
+    required = set(schema.required)
 
-    for field_name, property_schema in spec.inputs.properties.items():
+    for field_name, property_schema in schema.properties.items():
         field_type = _TYPE_MAP.get(property_schema.get("type", "string"), Any)
         default = ... if field_name in required else None
         fields[field_name] = (field_type, default)
 
-    model = create_model(  # type: ignore[call-overload]
-        f"Payload_{spec.id}",
+    return create_model(  # type: ignore[call-overload,no-any-return]
+        f"Payload_{task_id}",
         __config__=ConfigDict(extra="forbid"),
         **fields,
     )
-    validated = model.model_validate(payload)
-    return dict(validated)
 
 
-__all__ = ["ValidationError", "validate_task_payload"]
+def _output_model(task_id: str, schema: TaskOutput) -> type[BaseModel]:
+    fields: dict[str, tuple[Any, Any]] = {}
+    required = set(schema.required)
+
+    for field_name, property_schema in schema.properties.items():
+        field_type = _TYPE_MAP.get(property_schema.get("type", "string"), Any)
+        if field_name in required:
+            fields[field_name] = (field_type, ...)
+        else:
+            fields[field_name] = (field_type | None, None)
+
+    return create_model(  # type: ignore[call-overload,no-any-return]
+        f"Output_{task_id}",
+        __config__=ConfigDict(extra="ignore"),
+        **fields,
+    )
+
+
+__all__ = [
+    "TaskValidators",
+    "ValidationError",
+    "compile_validators",
+    "validate_task_output",
+    "validate_task_payload",
+]
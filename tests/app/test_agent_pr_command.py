@@ -1,6 +1,14 @@
 from pathlib import Path
 
-from app.agent_pr_command import OutputFormat, _write_output, parse_agent_pr_comment
+import pytest
+
+from app.agent_pr_command import (
+    OutputFormat,
+    _write_output,
+    commands_from_json,
+    parse_agent_pr_command_blocks,
+    parse_agent_pr_comment,
+)
 
 
 def test_parse_valid_command() -> None:
@@ -86,3 +94,54 @@ def test_write_output_dotenv_format(tmp_path: Path) -> None:
     assert "TASK_ID=\n" in text
     assert "PAYLOAD_JSON=\n" in text
     assert "ERROR_MESSAGE=Unsupported task_id" in text
+
+
+def test_parse_multiple_commands() -> None:
+    result = parse_agent_pr_command_blocks(
+        '/agent-pr append_hello_agent_comment \'{"target_file":"./a.txt"}\'\n'
+        '/agent-pr append_hello_agent_comment \'{\n  "target_file": "./b.txt"\n}\'\n',
+        supported_task_ids={"append_hello_agent_comment"},
+    )
+
+    assert result.valid is True
+    assert [command.payload_json for command in result.commands] == [
+        '{"target_file":"./a.txt"}',
+        '{"target_file":"./b.txt"}',
+    ]
+
+
+def test_parse_multiple_commands_rejects_batch_with_invalid_command() -> None:
+    result = parse_agent_pr_command_blocks(
+        '/agent-pr append_hello_agent_comment \'{"target_file":"./a.txt"}\'\n'
+        "/agent-pr arbitrary_task '{}'",
+        supported_task_ids={"append_hello_agent_comment"},
+    )
+
+    assert result.valid is False
+    assert result.commands == []
+    assert (result.error_message or "").startswith("Command 2: Unsupported task_id")
+
+
+def test_write_output_batch_formats(tmp_path: Path) -> None:
+    result = parse_agent_pr_command_blocks(
+        '/agent-pr append_hello_agent_comment \'{"target_file":"./a.txt"}\'\n'
+        '/agent-pr append_hello_agent_comment \'{"target_file":"./b.txt"}\'',
+        supported_task_ids={"append_hello_agent_comment"},
+    )
+    github_file = tmp_path / "gh_output.txt"
+    dotenv_file = tmp_path / "agent.env"
+
+    _write_output(github_file, result, OutputFormat.GITHUB)
+    _write_output(dotenv_file, result, OutputFormat.DOTENV)
+
+    github_lines = github_file.read_text(encoding="utf-8").splitlines()
+    assert github_lines[:2] == ["valid=true", "task_id=append_hello_agent_comment"]
+    assert "command_count=2" in github_lines
+    commands_json = github_lines[-1].removeprefix("commands_json=")
+    assert commands_from_json(commands_json) == result.commands
+    assert "COMMAND_COUNT=2\n" in dotenv_file.read_text(encoding="utf-8")
+
+
+def test_commands_from_json_rejects_malformed_items() -> None:
+    with pytest.raises(ValueError, match="task_id and payload"):
+        commands_from_json('[{"task_id": "x", "payload": [1]}]')
@@ -0,0 +1,36 @@
+from typing import Any
+
+from app.agent_pr_command import AgentPrCommand
+from app.agent_pr_runner import run_agent_pr_commands
+
+
+def test_run_agent_pr_commands_pairs_results_with_commands() -> None:
+    class FakeService:
+        def run_many(
+            self,
+            items: list[tuple[str, dict[str, Any]]],
+            *,
+            max_concurrency: int | None = None,
+        ) -> dict[str, Any]:
+            assert items == [("a", {"n": 1}), ("b", {})]
+            assert max_concurrency == 2
+            return {
+                "results": [{"status": "ok"}, {"status": "failed"}],
+                "total": 2,
+                "succeeded": 1,
+                "failed": 1,
+                "duration_ms": 3,
+            }
+
+    report = run_agent_pr_commands(
+        FakeService(),  # type: ignore[arg-type]
+        [
+            AgentPrCommand(task_id="a", payload_json='{"n":1}'),
+            AgentPrCommand(task_id="b", payload_json="{}"),
+        ],
+        max_concurrency=2,
+    )
+
+    assert [result["task_id"] for result in report["results"]] == ["a", "b"]
+    assert [result["status"] for result in report["results"]] == ["ok", "failed"]
+    assert report["failed"] == 1
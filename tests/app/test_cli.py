@@ -1,6 +1,8 @@
 import argparse
 import json
 import sys
+from pathlib import Path
+from threading import Event
 
 import pytest
 
@@ -44,6 +46,7 @@ def test_build_payload_rejects_non_object_json() -> None:
 def test_main_prints_result(
     monkeypatch: pytest.MonkeyPatch,
     capsys: pytest.CaptureFixture[str],
+    tmp_path: Path,
 ) -> None:
     class FakeService:
         def run_task(self, task_id: str, payload: dict[str, object]) -> dict[str, object]:
@@ -57,11 +60,115 @@ def test_main_prints_result(
         lambda: argparse.Namespace(
             task_id="append_hello_agent_comment",
             input_json='{"target_file":"demo.py"}',
+            input_jsonl=None,
+            resume=None,
+            daemon=False,
+            no_daemon=False,
         ),
     )
-    monkeypatch.setattr(cli, "AgentService", FakeService)
+    monkeypatch.setenv("P4AGENT_CLI_SOCKET", str(tmp_path / "absent.sock"))
+    monkeypatch.setattr(cli, "build_service", FakeService)
 
     cli.main()
 
     out = capsys.readouterr().out
     assert json.loads(out) == {"status": "ok", "task_id": "append_hello_agent_comment"}
+
+
+class _EchoService:
+    def __init__(self, slow_task: str | None = None) -> None:
+        self.release = Event()
+        self._slow_task = slow_task
+
+    def run_task(self, task_id: str, payload: dict[str, object]) -> dict[str, object]:
+        if task_id == self._slow_task:
+            self.release.wait(5)
+        if task_id == "boom":
+            raise RuntimeError("boom")
+        return {"status": "ok", "task_id": task_id, "payload": payload}
+
+
+def test_parse_jsonl_item_uses_default_task_id() -> None:
+    assert cli.parse_jsonl_item('{"payload": {"a": 1}}', "demo") == ("demo", {"a": 1})
+    assert cli.parse_jsonl_item('{"task_id": "other"}', "demo") == ("other", {})
+    with pytest.raises(ValueError, match="no task_id"):
+        cli.parse_jsonl_item('{"payload": {}}', None)
+
+
+def test_run_jsonl_keeps_input_order_and_isolates_bad_lines() -> None:
+    lines = [
+        '{"task_id": "a", "payload": {"n": 1}}\n',
+        "\n",
+        "not json\n",
+        '{"task_id": "boom"}\n',
+        '{"payload": {"n": 2}}\n',
+    ]
+
+    records = list(cli.run_jsonl(_EchoService(), lines, default_task_id="b", workers=2))
+
+    assert [record["line"] for record in records] == [1, 3, 4, 5]
+    assert [record["result"]["status"] for record in records] == ["ok", "failed", "failed", "ok"]
+    assert records[1]["result"]["error"]["code"] == "INVALID_INPUT"
+    assert records[2]["result"]["error"]["code"] == "INTERNAL_ERROR"
+    assert records[3]["result"]["payload"] == {"n": 2}
+
+
+def test_run_jsonl_unordered_emits_fast_results_first() -> None:
+    service = _EchoService(slow_task="slow")
+    lines = ['{"task_id": "slow"}', '{"task_id": "fast"}']
+
+    records = cli.run_jsonl(service, lines, default_task_id=None, workers=2, ordered=False)
+    first = next(records)
+    service.release.set()
+    rest = list(records)
+
+    assert first["task_id"] == "fast"
+    assert [record["task_id"] for record in rest] == ["slow"]
+
+
+def test_main_streams_jsonl_file(
+    monkeypatch: pytest.MonkeyPatch,
+    capsys: pytest.CaptureFixture[str],
+    tmp_path: Path,
+) -> None:
+    source = tmp_path / "items.jsonl"
+    source.write_text('{"payload": {"n": 1}}\n{"payload": {"n": 2}}\n', encoding="utf-8")
+    monkeypatch.setattr(
+        cli,
+        "parse_args",
+        lambda: argparse.Namespace(
+            task_id="demo",
+            input_json=None,
+            input_jsonl=str(source),
+            workers=2,
+            unordered=False,
+            resume=None,
+            daemon=False,
+            no_daemon=False,
+        ),
+    )
+    monkeypatch.setattr(cli, "build_service", _EchoService)
+
+    cli.main()
+
+    records = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert [record["result"]["payload"] for record in records] == [{"n": 1}, {"n": 2}]
+
+
+def test_main_resumes_run(
+    monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture[str]
+) -> None:
+    class FakeService:
+        def resume(self, run_id: str) -> dict[str, object]:
+            return {"status": "ok", "run_id": run_id}
+
+    monkeypatch.setattr(
+        cli,
+        "parse_args",
+        lambda: argparse.Namespace(resume="abc123", daemon=False),
+    )
+    monkeypatch.setattr(cli, "build_service", FakeService)
+
+    cli.main()
+
+    assert json.loads(capsys.readouterr().out) == {"status": "ok", "run_id": "abc123"}
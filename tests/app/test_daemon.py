@@ -0,0 +1,165 @@
+import os
+import socket
+import stat
+import tempfile
+import threading
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from app.daemon import DaemonRequestError, DaemonServer, default_socket_path, request_daemon
+
+
+class _FakeService:
+    def run_task(self, task_id: str, payload: dict[str, Any]) -> dict[str, Any]:
+        if task_id == "boom":
+            raise RuntimeError("boom")
+        return {"status": "ok", "task_id": task_id, "payload": payload}
+
+
+@pytest.fixture
+def daemon_socket(tmp_path: Path) -> Iterator[Path]:
+    socket_path = tmp_path / "p4agent.sock"
+    server = DaemonServer(socket_path, _FakeService())  # type: ignore[arg-type]
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield socket_path
+    server.shutdown()
+    server.server_close()
+    thread.join(timeout=5)
+
+
+def test_request_daemon_runs_task_remotely(daemon_socket: Path) -> None:
+    result = request_daemon(daemon_socket, "demo", {"n": 1})
+
+    assert result == {"status": "ok", "task_id": "demo", "payload": {"n": 1}}
+
+
+def test_request_daemon_surfaces_task_errors(daemon_socket: Path) -> None:
+    with pytest.raises(DaemonRequestError, match="boom"):
+        request_daemon(daemon_socket, "boom", {})
+
+
+def test_request_daemon_falls_back_when_cwd_differs(
+    daemon_socket: Path,
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.chdir(tmp_path)
+
+    assert request_daemon(daemon_socket, "demo", {}) is None
+
+
+@pytest.mark.parametrize("name", ["P4AGENT_LLM_PROVIDER", "OPENAI_API_KEY"])
+def test_request_daemon_falls_back_when_settings_differ(
+    daemon_socket: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    name: str,
+) -> None:
+    monkeypatch.setenv(name, "client-only-value")
+
+    assert request_daemon(daemon_socket, "demo", {}) is None
+
+
+def test_request_daemon_falls_back_when_dotenv_differs(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.chdir(tmp_path)
+    socket_path = tmp_path / "p4agent.sock"
+    server = DaemonServer(socket_path, _FakeService())  # type: ignore[arg-type]
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        assert request_daemon(socket_path, "demo", {}) is not None
+        (tmp_path / ".env").write_text("P4AGENT_LLM_ENABLED=true\n", encoding="utf-8")
+        assert request_daemon(socket_path, "demo", {}) is None
+    finally:
+        server.shutdown()
+        server.server_close()
+        thread.join(timeout=5)
+
+
+def test_request_daemon_returns_none_without_daemon(tmp_path: Path) -> None:
+    assert request_daemon(tmp_path / "missing.sock", "demo", {}) is None
+
+
+def test_server_refuses_socket_with_live_daemon(daemon_socket: Path) -> None:
+    with pytest.raises(RuntimeError, match="already listening"):
+        DaemonServer(daemon_socket, _FakeService())  # type: ignore[arg-type]
+
+
+def test_server_replaces_stale_socket(tmp_path: Path) -> None:
+    socket_path = tmp_path / "stale.sock"
+    stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stale.bind(str(socket_path))
+    stale.close()
+
+    server = DaemonServer(socket_path, _FakeService())  # type: ignore[arg-type]
+    server.server_close()
+
+    assert not socket_path.exists()
+
+
+def test_default_socket_path_is_private(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    monkeypatch.delenv("P4AGENT_CLI_SOCKET", raising=False)
+    monkeypatch.setenv("XDG_RUNTIME_DIR", str(tmp_path))
+    assert default_socket_path() == tmp_path / "p4agent.sock"
+
+    monkeypatch.delenv("XDG_RUNTIME_DIR")
+    monkeypatch.setenv("TMPDIR", str(tmp_path))
+    monkeypatch.setattr(tempfile, "tempdir", None)
+    fallback = default_socket_path()
+    assert fallback == tmp_path / f"p4agent-{os.getuid()}" / "cli.sock"
+
+    server = DaemonServer(fallback, _FakeService())  # type: ignore[arg-type]
+    server.server_close()
+    assert stat.S_IMODE(fallback.parent.stat().st_mode) == 0o700
+
+
+def test_server_creates_owner_only_socket(daemon_socket: Path) -> None:
+    assert stat.S_IMODE(daemon_socket.stat().st_mode) == 0o600
+
+
+def test_request_daemon_ignores_socket_owned_by_another_user(
+    daemon_socket: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    uid = os.getuid()
+    monkeypatch.setattr(os, "getuid", lambda: uid + 1)
+
+    assert request_daemon(daemon_socket, "demo", {}) is None
+
+
+def test_request_daemon_falls_back_when_connect_is_denied(
+    daemon_socket: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    class _DeniedSocket(socket.socket):
+        def connect(self, address: Any) -> None:
+            raise PermissionError(13, "Permission denied")
+
+    monkeypatch.setattr(socket, "socket", _DeniedSocket)
+
+    assert request_daemon(daemon_socket, "demo", {}) is None
+
+
+def test_request_daemon_raises_when_daemon_hangs_up(tmp_path: Path) -> None:
+    socket_path = tmp_path / "hangup.sock"
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(str(socket_path))
+    listener.listen(1)
+
+    def _accept_and_hang_up() -> None:
+        connection, _ = listener.accept()
+        with connection, connection.makefile("rb") as reader:
+            reader.readline()
+
+    thread = threading.Thread(target=_accept_and_hang_up, daemon=True)
+    thread.start()
+    try:
+        with pytest.raises(DaemonRequestError, match="closed the connection"):
+            request_daemon(socket_path, "demo", {})
+    finally:
+        thread.join(timeout=5)
+        listener.close()
@@ -1,16 +1,29 @@
+import json
 from collections.abc import Iterator
+from typing import Any
 
 import pytest
 from fastapi.testclient import TestClient
 
 from app import main
+from core.admission import TaskOverloadedError
+from core.jobs import Job, JobNotFoundError, JobQueueFullError, JobStatus
+from core.runs import RunInProgressError, RunNotFoundError
 from core.service import AgentService
+from core.settings import settings
+from tasks.handlers.base import TaskHandler
+from tasks.registry import TaskSpec
 
 
 @pytest.fixture
 def client() -> Iterator[TestClient]:
     with TestClient(main.app) as test_client:
         yield test_client
+    main.app.dependency_overrides.clear()
+
+
+def _use_service(service: object) -> None:
+    main.app.dependency_overrides[main.service_provider] = lambda: service
 
 
 def test_health(client: TestClient) -> None:
@@ -19,12 +32,20 @@ def test_health(client: TestClient) -> None:
     assert response.json() == {"status": "ok"}
 
 
-def test_list_tasks(client: TestClient, monkeypatch: pytest.MonkeyPatch) -> None:
+def test_metrics_exposes_prometheus_text(client: TestClient) -> None:
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert "# TYPE p4agent_node_duration_seconds histogram" in response.text
+
+
+def test_list_tasks(client: TestClient) -> None:
     class FakeService:
         def list_tasks(self) -> list[str]:
             return ["append_hello_agent_comment"]
 
-    monkeypatch.setattr(main, "AgentService", FakeService)
+    _use_service(FakeService())
 
     response = client.get("/tasks")
 
@@ -32,14 +53,34 @@ def test_list_tasks(client: TestClient, monkeypatch: pytest.MonkeyPatch) -> None
     assert response.json() == {"tasks": ["append_hello_agent_comment"]}
 
 
-def test_run_task_success(client: TestClient, monkeypatch: pytest.MonkeyPatch) -> None:
+def test_list_tasks_verbose_returns_manifest_entries(client: TestClient) -> None:
+    class FakeService:
+        def describe_tasks(self) -> list[dict[str, object]]:
+            return [{"id": "demo", "handler": "tasks.handlers.demo:DemoHandler"}]
+
+    _use_service(FakeService())
+
+    response = client.get("/tasks", params={"verbose": "true"})
+
+    assert response.status_code == 200
+    assert response.json()["tasks"][0]["handler"] == "tasks.handlers.demo:DemoHandler"
+
+
+def test_run_task_success(client: TestClient) -> None:
     class FakeService:
-        def run_task(self, task_id: str, payload: dict[str, object]) -> dict[str, object]:
+        async def arun_task(
+            self,
+            task_id: str,
+            payload: dict[str, object],
+            *,
+            idempotency_key: str | None = None,
+        ) -> dict[str, object]:
+            assert idempotency_key is None
             assert task_id == "append_hello_agent_comment"
             assert payload == {"target_file": "demo.py"}
             return {"status": "ok", "task_id": task_id}
 
-    monkeypatch.setattr(main, "AgentService", FakeService)
+    _use_service(FakeService())
 
     response = client.post(
         "/run",
@@ -50,12 +91,18 @@ def test_run_task_success(client: TestClient, monkeypatch: pytest.MonkeyPatch) -
     assert response.json() == {"status": "ok", "task_id": "append_hello_agent_comment"}
 
 
-def test_run_task_not_found(client: TestClient, monkeypatch: pytest.MonkeyPatch) -> None:
+def test_run_task_not_found(client: TestClient) -> None:
     class FakeService:
-        def run_task(self, task_id: str, payload: dict[str, object]) -> dict[str, object]:
+        async def arun_task(
+            self,
+            task_id: str,
+            payload: dict[str, object],
+            *,
+            idempotency_key: str | None = None,
+        ) -> dict[str, object]:
             raise KeyError("Unknown task_id")
 
-    monkeypatch.setattr(main, "AgentService", FakeService)
+    _use_service(FakeService())
 
     response = client.post("/run", json={"task_id": "unknown", "payload": {}})
 
@@ -63,8 +110,249 @@ def test_run_task_not_found(client: TestClient, monkeypatch: pytest.MonkeyPatch)
     assert "Unknown task_id" in response.json()["detail"]
 
 
+def test_run_task_forwards_idempotency_key(client: TestClient) -> None:
+    seen: list[str | None] = []
+
+    class FakeService:
+        async def arun_task(
+            self,
+            task_id: str,
+            payload: dict[str, object],
+            *,
+            idempotency_key: str | None = None,
+        ) -> dict[str, object]:
+            seen.append(idempotency_key)
+            return {"status": "ok", "task_id": task_id}
+
+    _use_service(FakeService())
+
+    response = client.post(
+        "/run",
+        json={"task_id": "demo", "payload": {}},
+        headers={"Idempotency-Key": "retry-42"},
+    )
+
+    assert response.status_code == 200
+    assert seen == ["retry-42"]
+
+
 def test_service_provider() -> None:
     provider = main.service_provider()
     service = next(provider)
 
     assert isinstance(service, AgentService)
+    assert next(main.service_provider()) is service
+    main.shutdown_shared_service()
+
+
+def test_lifespan_warms_and_shuts_down_shared_service(monkeypatch: pytest.MonkeyPatch) -> None:
+    calls: list[str] = []
+
+    class FakeService:
+        def warmup(self) -> None:
+            calls.append("warmup")
+
+        def watch_task_configs(self) -> None:
+            calls.append("watch")
+
+        def shutdown(self) -> None:
+            calls.append("shutdown")
+
+        def list_tasks(self) -> list[str]:
+            return []
+
+    monkeypatch.setattr(main, "AgentService", FakeService)
+
+    with TestClient(main.app) as test_client:
+        test_client.get("/tasks")
+        test_client.get("/tasks")
+        assert calls == ["warmup", "watch"]
+
+    assert calls == ["warmup", "watch", "shutdown"]
+
+
+def test_job_endpoints(client: TestClient) -> None:
+    class FakeService:
+        def __init__(self) -> None:
+            self.job = Job(id="job-1", task_id="append_hello_agent_comment", payload={})
+
+        def submit_job(self, task_id: str, payload: dict[str, object]) -> Job:
+            return self.job
+
+        def get_job(self, job_id: str) -> Job:
+            if job_id != self.job.id:
+                raise JobNotFoundError(job_id)
+            return self.job
+
+        def cancel_job(self, job_id: str) -> Job:
+            self.job.status = JobStatus.CANCELLED
+            return self.job
+
+    _use_service(FakeService())
+
+    submitted = client.post(
+        "/jobs",
+        json={"task_id": "append_hello_agent_comment", "payload": {}},
+    )
+    assert submitted.status_code == 202
+    assert submitted.json() == {"job_id": "job-1", "status": "queued"}
+
+    assert client.get("/jobs/job-1").json()["status"] == "queued"
+    assert client.get("/jobs/missing").status_code == 404
+    assert client.delete("/jobs/job-1").json()["status"] == "cancelled"
+
+
+def test_submit_job_returns_503_when_queue_full(client: TestClient) -> None:
+    class FakeService:
+        def submit_job(self, task_id: str, payload: dict[str, object]) -> object:
+            raise JobQueueFullError("Job queue is full")
+
+    _use_service(FakeService())
+
+    response = client.post("/jobs", json={"task_id": "x", "payload": {}})
+
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
+
+
+def test_run_batch_forwards_items(client: TestClient) -> None:
+    class FakeService:
+        def run_many(
+            self,
+            items: list[tuple[str, dict[str, object]]],
+            *,
+            max_concurrency: int | None = None,
+        ) -> dict[str, object]:
+            assert items == [("a", {"x": 1}), ("b", {})]
+            assert max_concurrency == 2
+            return {"results": [], "total": 2, "succeeded": 2, "failed": 0, "duration_ms": 1}
+
+    _use_service(FakeService())
+
+    response = client.post(
+        "/run/batch",
+        json={
+            "items": [{"task_id": "a", "payload": {"x": 1}}, {"task_id": "b", "payload": {}}],
+            "max_concurrency": 2,
+        },
+    )
+
+    assert response.status_code == 200
+    assert response.json()["succeeded"] == 2
+
+
+def test_run_stream_emits_server_sent_events(client: TestClient) -> None:
+    class FakeService:
+        def stream_task(
+            self, task_id: str, payload: dict[str, object]
+        ) -> Iterator[dict[str, object]]:
+            yield {"event": "start", "task_id": task_id, "elapsed_ms": 0}
+            yield {"event": "node", "node": "planning", "elapsed_ms": 1, "error_code": None}
+            yield {"event": "result", "elapsed_ms": 2, "response": {"status": "ok"}}
+
+    _use_service(FakeService())
+
+    response = client.post("/run/stream", json={"task_id": "demo", "payload": {}})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    frames = [frame for frame in response.text.split("\n\n") if frame]
+    assert [frame.splitlines()[0] for frame in frames] == [
+        "event: start",
+        "event: node",
+        "event: result",
+    ]
+    assert json.loads(frames[-1].splitlines()[1].removeprefix("data: "))["response"] == {
+        "status": "ok"
+    }
+
+
+def test_run_task_returns_429_when_task_overloaded(client: TestClient) -> None:
+    class FakeService:
+        async def arun_task(
+            self,
+            task_id: str,
+            payload: dict[str, object],
+            *,
+            idempotency_key: str | None = None,
+        ) -> dict[str, object]:
+            raise TaskOverloadedError(task_id, retry_after=7)
+
+        def stream_task(self, task_id: str, payload: dict[str, object]) -> object:
+            raise TaskOverloadedError(task_id, retry_after=3)
+
+    _use_service(FakeService())
+
+    response = client.post("/run", json={"task_id": "busy", "payload": {}})
+    streamed = client.post("/run/stream", json={"task_id": "busy", "payload": {}})
+
+    assert response.status_code == 429
+    assert response.headers["retry-after"] == "7"
+    assert streamed.status_code == 429
+    assert streamed.headers["retry-after"] == "3"
+
+
+def test_resume_run_maps_unknown_and_running_runs(client: TestClient) -> None:
+    class FakeService:
+        def resume(self, run_id: str) -> dict[str, object]:
+            if run_id == "busy":
+                raise RunInProgressError(f"Run '{run_id}' is still running")
+            if run_id != "known":
+                raise RunNotFoundError(f"Unknown run_id '{run_id}'")
+            return {"status": "ok", "run_id": run_id}
+
+    _use_service(FakeService())
+
+    assert client.post("/runs/known/resume").json() == {"status": "ok", "run_id": "known"}
+    assert client.post("/runs/other/resume").status_code == 404
+    assert client.post("/runs/busy/resume").status_code == 409
+
+
+def test_submit_job_returns_404_for_unknown_task(client: TestClient) -> None:
+    _use_service(AgentService())
+
+    response = client.post("/jobs", json={"task_id": "nope", "payload": {}})
+
+    assert response.status_code == 404
+    assert "Unknown task_id 'nope'" in response.json()["detail"]
+
+
+def test_run_batch_rejects_too_many_items(client: TestClient) -> None:
+    items = [{"task_id": "a", "payload": {}}] * (settings.batch_max_items + 1)
+
+    response = client.post("/run/batch", json={"items": items})
+
+    assert response.status_code == 422
+
+
+def test_run_idempotent_task_executes_async_handler(
+    client: TestClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    calls: list[str] = []
+
+    class AsyncOnlyHandler(TaskHandler):
+        def validate_payload(self, payload: dict[str, Any], spec: TaskSpec) -> dict[str, Any]:
+            return payload
+
+        def execute(self, payload: dict[str, Any], spec: TaskSpec) -> dict[str, Any]:
+            raise AssertionError("sync execute should not run")
+
+        async def aexecute(self, payload: dict[str, Any], spec: TaskSpec) -> dict[str, Any]:
+            calls.append("aexecute")
+            return {"items_en": [], "selection_notes": "async"}
+
+    service = AgentService()
+    monkeypatch.setitem(
+        service._tasks.registry._handlers, "extract_top10_en_news", AsyncOnlyHandler()
+    )
+    _use_service(service)
+    body = {"task_id": "extract_top10_en_news", "payload": {"raw_cards": []}}
+
+    first = client.post("/run", json=body)
+    second = client.post("/run", json=body)
+
+    assert first.status_code == 200
+    assert first.json()["selection_notes"] == "async"
+    assert second.json() == first.json()
+    assert calls == ["aexecute"]
+    service.shutdown()
@@ -0,0 +1,120 @@
+import os
+import subprocess
+import sys
+from time import sleep
+from typing import Any
+
+import pytest
+
+from app import serve
+from app.serve import PreforkSupervisor
+
+
+class _Spawner:
+    def __init__(self) -> None:
+        self.spawned: list[int] = []
+
+    def __call__(self, index: int) -> int:
+        proc = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(30)"])
+        self.spawned.append(proc.pid)
+        return proc.pid
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    return os.waitpid(pid, os.WNOHANG) == (0, 0)
+
+
+def test_serve_single_worker_uses_plain_uvicorn(monkeypatch: pytest.MonkeyPatch) -> None:
+    calls: list[dict[str, Any]] = []
+    monkeypatch.setattr("app.serve.uvicorn.run", lambda app, **kwargs: calls.append(kwargs))
+
+    serve.serve(host="127.0.0.1", port=9000, workers=1, graceful_timeout=5, max_requests=10)
+
+    assert calls == [
+        {
+            "host": "127.0.0.1",
+            "port": 9000,
+            "reload": False,
+            "timeout_graceful_shutdown": 5,
+            "limit_max_requests": 10,
+        }
+    ]
+
+
+def test_supervisor_respawns_exited_workers() -> None:
+    spawner = _Spawner()
+    supervisor = PreforkSupervisor(
+        workers=2, graceful_timeout=2, spawn_worker=spawner, backoff_seconds=0.0
+    )
+
+    supervisor.spawn_missing()
+    first = supervisor.pids
+    assert sorted(first) == [0, 1]
+
+    os.kill(first[0], 9)
+    os.waitpid(first[0], 0)
+    supervisor.reap()
+    supervisor.spawn_missing()
+
+    assert supervisor.pids[1] == first[1]
+    assert supervisor.pids[0] not in first.values()
+    supervisor.shutdown()
+    assert supervisor.pids == {}
+    assert not any(_alive(pid) for pid in spawner.spawned)
+
+
+def test_supervisor_rolling_restart_replaces_every_worker() -> None:
+    spawner = _Spawner()
+    supervisor = PreforkSupervisor(workers=2, graceful_timeout=2, spawn_worker=spawner)
+    supervisor.spawn_missing()
+    before = supervisor.pids
+
+    supervisor.rolling_restart()
+
+    after = supervisor.pids
+    assert sorted(after) == [0, 1]
+    assert set(after.values()).isdisjoint(before.values())
+    assert not any(_alive(pid) for pid in before.values())
+    supervisor.shutdown()
+
+
+def test_supervisor_backs_off_crashing_workers() -> None:
+    spawned: list[subprocess.Popen[bytes]] = []
+
+    def _crash(index: int) -> int:
+        proc = subprocess.Popen([sys.executable, "-c", "raise SystemExit(3)"])
+        # Wait for the exit without reaping it; the supervisor reaps.
+        os.waitid(os.P_PID, proc.pid, os.WEXITED | os.WNOWAIT)
+        spawned.append(proc)
+        return proc.pid
+
+    supervisor = PreforkSupervisor(
+        workers=1,
+        graceful_timeout=1,
+        spawn_worker=_crash,
+        backoff_seconds=0.2,
+        max_backoff_seconds=0.4,
+    )
+    supervisor.spawn_missing()
+    supervisor.reap()
+
+    # Within the delay the crashed worker is not replaced.
+    supervisor.spawn_missing()
+    assert len(spawned) == 1
+    sleep(0.25)
+    supervisor.spawn_missing()
+    assert len(spawned) == 2
+
+    supervisor.reap()
+    sleep(0.25)
+    supervisor.spawn_missing()
+    # The second crash doubled the delay to 0.4s.
+    assert len(spawned) == 2
+    sleep(0.2)
+    supervisor.spawn_missing()
+    assert len(spawned) == 3
+    supervisor.shutdown()
@@ -0,0 +1,316 @@
+import hashlib
+import hmac
+import json
+from collections.abc import Iterator
+from typing import Any
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import main
+from app.webhook import (
+    CommentEvent,
+    WebhookBot,
+    github_comment_event,
+    gitlab_comment_event,
+    verify_github_signature,
+    verify_gitlab_token,
+)
+from core.jobs import Job, JobCallback, JobQueueFullError, JobStatus
+from core.settings import settings
+from infra.forge import ForgeThread, NullPublisher
+
+
+class _ImmediateService:
+    """Finishes each job synchronously with the configured status."""
+
+    def __init__(self, status: JobStatus = JobStatus.SUCCEEDED) -> None:
+        self.status = status
+        self.submitted: list[tuple[str, dict[str, Any]]] = []
+
+    def submit_job(
+        self,
+        task_id: str,
+        payload: dict[str, Any],
+        *,
+        on_finished: JobCallback | None = None,
+    ) -> Job:
+        self.submitted.append((task_id, payload))
+        job = Job(id=f"job-{len(self.submitted)}", task_id=task_id, payload=payload)
+        if on_finished is not None:
+            error = None if self.status == JobStatus.SUCCEEDED else "boom"
+            on_finished(
+                Job(id=job.id, task_id=task_id, payload=payload, status=self.status, error=error)
+            )
+        return job
+
+
+def _event(body: str) -> CommentEvent:
+    return CommentEvent(
+        thread=ForgeThread("octo/demo", 3),
+        body=body,
+        url="https://forge.test/c/1",
+        author="octocat",
+    )
+
+
+_COMMAND = '/agent-pr append_hello_agent_comment \'{"path": "README.md"}\''
+
+
+def test_verify_github_signature() -> None:
+    body = b'{"a": 1}'
+    digest = hmac.new(b"s3cret", body, hashlib.sha256).hexdigest()
+
+    assert verify_github_signature("s3cret", body, f"sha256={digest}")
+    assert not verify_github_signature("s3cret", body, "sha256=deadbeef")
+    assert not verify_github_signature("s3cret", body, None)
+    assert verify_gitlab_token("tok", "tok")
+    assert not verify_gitlab_token("tok", None)
+
+
+def test_github_comment_event_only_accepts_created_issue_comments() -> None:
+    payload: dict[str, Any] = {
+        "action": "created",
+        "issue": {"number": 3},
+        "comment": {"body": _COMMAND, "html_url": "u", "user": {"login": "octocat"}},
+        "repository": {"full_name": "octo/demo"},
+    }
+
+    event = github_comment_event("issue_comment", payload)
+
+    assert event is not None
+    assert event.thread == ForgeThread("octo/demo", 3)
+    assert github_comment_event("issue_comment", {**payload, "action": "edited"}) is None
+    pull_comment = {**payload, "issue": {"number": 3, "pull_request": {"url": "u"}}}
+    assert github_comment_event("issue_comment", pull_comment) is None
+    assert github_comment_event("push", payload) is None
+
+
+def test_gitlab_comment_event_maps_merge_request_notes() -> None:
+    payload = {
+        "object_kind": "note",
+        "object_attributes": {"noteable_type": "MergeRequest", "note": _COMMAND, "url": "u"},
+        "merge_request": {"iid": 5},
+        "project": {"path_with_namespace": "group/demo"},
+        "user": {"username": "dev"},
+    }
+
+    event = gitlab_comment_event(payload)
+
+    assert event is not None
+    assert event.thread == ForgeThread("group/demo", 5, kind="merge_request")
+    assert gitlab_comment_event({"object_kind": "push"}) is None
+
+
+def test_bot_ignores_comments_without_command() -> None:
+    publisher = NullPublisher()
+    bot = WebhookBot(_ImmediateService(), publisher)
+
+    assert bot.handle(_event("looks good")) == {"status": "ignored"}
+    assert publisher.replies == []
+
+
+def test_bot_replies_with_parse_error() -> None:
+    publisher = NullPublisher()
+    service = _ImmediateService()
+    bot = WebhookBot(service, publisher)
+
+    result = bot.handle(_event("/agent-pr unknown_task '{}'"))
+
+    assert result["status"] == "rejected"
+    assert service.submitted == []
+    assert "Unsupported task_id 'unknown_task'" in publisher.replies[0][1]
+
+
+def test_bot_publishes_once_after_every_command_finishes() -> None:
+    publisher = NullPublisher()
+    service = _ImmediateService()
+    bot = WebhookBot(service, publisher)
+
+    result = bot.handle(_event(f"{_COMMAND}\n{_COMMAND}"))
+
+    assert result == {"status": "queued", "job_ids": ["job-1", "job-2"]}
+    ((thread, change),) = publisher.changes
+    assert thread.number == 3
+    assert change.branch.startswith("agent/issue-3-")
+    assert "https://forge.test/c/1" in change.body
+    assert "no file changes were detected" in publisher.replies[0][1]
+
+
+def test_bot_reports_failed_jobs_without_publishing() -> None:
+    publisher = NullPublisher()
+    bot = WebhookBot(_ImmediateService(JobStatus.FAILED), publisher)
+
+    bot.handle(_event(_COMMAND))
+
+    assert publisher.changes == []
+    assert publisher.discarded == 1
+    assert "`append_hello_agent_comment`: boom" in publisher.replies[0][1]
+
+
+class _DeferredService:
+    """Holds each job until the test finishes it."""
+
+    def __init__(self) -> None:
+        self.pending: list[tuple[Job, JobCallback]] = []
+
+    def submit_job(
+        self,
+        task_id: str,
+        payload: dict[str, Any],
+        *,
+        on_finished: JobCallback | None = None,
+    ) -> Job:
+        assert on_finished is not None
+        job = Job(id=f"job-{len(self.pending) + 1}", task_id=task_id, payload=payload)
+        self.pending.append((job, on_finished))
+        return job
+
+    def finish(self, index: int, status: JobStatus = JobStatus.SUCCEEDED) -> None:
+        job, on_finished = self.pending[index]
+        on_finished(Job(id=job.id, task_id=job.task_id, payload=job.payload, status=status))
+
+
+def test_bot_runs_concurrent_comments_one_at_a_time() -> None:
+    publisher = NullPublisher()
+    service = _DeferredService()
+    bot = WebhookBot(service, publisher)
+    other = CommentEvent(
+        thread=ForgeThread("octo/demo", 4),
+        body=_COMMAND,
+        url="https://forge.test/c/2",
+        author="octocat",
+    )
+
+    first = bot.handle(_event(_COMMAND))
+    second = bot.handle(other)
+
+    assert first == {"status": "queued", "job_ids": ["job-1"]}
+    assert second == {"status": "waiting", "ahead": 1}
+    # The second comment's jobs wait until the first comment is published.
+    assert len(service.pending) == 1
+    assert publisher.prepared == 1
+
+    service.finish(0, JobStatus.FAILED)
+
+    assert publisher.discarded == 1
+    assert "Task run failed" in publisher.replies[0][1]
+    assert publisher.prepared == 2
+    assert len(service.pending) == 2
+
+    service.finish(1)
+
+    ((thread, change),) = publisher.changes
+    assert thread.number == 4
+    assert change.branch.startswith("agent/issue-4-")
+    assert bot.handle(_event(_COMMAND)) == {"status": "queued", "job_ids": ["job-3"]}
+
+
+def test_bot_hands_the_workspace_on_when_submitting_fails() -> None:
+    publisher = NullPublisher()
+    service = _DeferredService()
+    bot = WebhookBot(service, publisher)
+    bot.handle(_event(_COMMAND))
+    bot.handle(_event(f"{_COMMAND}\n{_COMMAND}"))
+
+    def _full(task_id: str, payload: dict[str, Any], **_: Any) -> Job:
+        raise JobQueueFullError("Job queue is full")
+
+    service.submit_job = _full  # type: ignore[method-assign]
+    service.finish(0)
+
+    assert publisher.discarded == 1
+    assert publisher.replies[-1][1] == "Could not start the queued command: Job queue is full"
+    with pytest.raises(JobQueueFullError):
+        bot.handle(_event(_COMMAND))
+    assert publisher.discarded == 2
+
+
+@pytest.fixture
+def client(monkeypatch: pytest.MonkeyPatch) -> Iterator[TestClient]:
+    monkeypatch.setattr(settings, "webhook_github_secret", "s3cret")
+    monkeypatch.setattr(settings, "webhook_gitlab_token", "tok")
+    main.app.dependency_overrides[main.bot_provider] = lambda: WebhookBot(
+        _ImmediateService(), NullPublisher()
+    )
+    with TestClient(main.app) as test_client:
+        yield test_client
+    main.app.dependency_overrides.clear()
+
+
+def test_github_webhook_rejects_bad_signature(client: TestClient) -> None:
+    response = client.post(
+        "/webhooks/github",
+        content=b"{}",
+        headers={"X-GitHub-Event": "issue_comment", "X-Hub-Signature-256": "sha256=00"},
+    )
+
+    assert response.status_code == 401
+
+
+def test_github_webhook_queues_command(client: TestClient) -> None:
+    body = json.dumps(
+        {
+            "action": "created",
+            "issue": {"number": 3},
+            "comment": {"body": _COMMAND, "html_url": "u", "user": {"login": "octocat"}},
+            "repository": {"full_name": "octo/demo"},
+        }
+    ).encode("utf-8")
+    signature = "sha256=" + hmac.new(b"s3cret", body, hashlib.sha256).hexdigest()
+
+    response = client.post(
+        "/webhooks/github",
+        content=body,
+        headers={"X-GitHub-Event": "issue_comment", "X-Hub-Signature-256": signature},
+    )
+
+    assert response.status_code == 202
+    assert response.json() == {"status": "queued", "job_ids": ["job-1"]}
+
+
+def test_gitlab_webhook_ignores_other_events(client: TestClient) -> None:
+    response = client.post(
+        "/webhooks/gitlab",
+        json={"object_kind": "push"},
+        headers={"X-Gitlab-Token": "tok"},
+    )
+
+    assert response.status_code == 202
+    assert response.json() == {"status": "ignored"}
+
+
+def test_github_webhook_rejects_malformed_payload(client: TestClient) -> None:
+    body = json.dumps({"action": "created", "comment": {"body": _COMMAND}}).encode("utf-8")
+    signature = "sha256=" + hmac.new(b"s3cret", body, hashlib.sha256).hexdigest()
+
+    response = client.post(
+        "/webhooks/github",
+        content=body,
+        headers={"X-GitHub-Event": "issue_comment", "X-Hub-Signature-256": signature},
+    )
+
+    assert response.status_code == 400
+    assert "Malformed issue_comment payload" in response.json()["detail"]
+
+
+def test_gitlab_webhook_rejects_malformed_payload(client: TestClient) -> None:
+    response = client.post(
+        "/webhooks/gitlab",
+        json={"object_kind": "note", "object_attributes": {"noteable_type": "Issue"}},
+        headers={"X-Gitlab-Token": "tok"},
+    )
+
+    assert response.status_code == 400
+
+
+def test_app_refuses_to_start_without_a_bot_clone(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, "forge_provider", "github")
+    monkeypatch.setattr(settings, "forge_token", "t")
+    monkeypatch.setattr(settings, "forge_repo_dir", None)
+
+    with (
+        pytest.raises(ValueError, match="P4AGENT_FORGE_REPO_DIR is required"),
+        TestClient(main.app),
+    ):
+        pass
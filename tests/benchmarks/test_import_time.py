@@ -0,0 +1,101 @@
+import os
+import re
+import subprocess
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+
+import pytest
+
+pytestmark = pytest.mark.benchmark
+
+_REPO_ROOT = Path(__file__).resolve().parents[2]
+_IMPORT_LINE = re.compile(r"import time:\s+(\d+) \|\s+\d+ \|\s*(\S+)")
+_LLM_PROVIDERS = ("langchain_openai", "langchain_anthropic")
+
+
+@dataclass(frozen=True)
+class EntryPoint:
+    name: str
+    code: str
+    budget_seconds: float
+    forbidden: tuple[str, ...]
+
+
+ENTRY_POINTS = [
+    EntryPoint(
+        name="cli_thin_client",
+        code="import app.cli",
+        budget_seconds=0.5,
+        forbidden=("core.service", "pydantic", "langgraph", "langchain_core", "jinja2"),
+    ),
+    EntryPoint(
+        name="agent_pr_parse",
+        code=(
+            "from app.agent_pr_command import parse_agent_pr_comment\n"
+            "assert parse_agent_pr_comment('/agent-pr append_hello_agent_comment {}').valid"
+        ),
+        budget_seconds=0.6,
+        forbidden=("tasks.handlers", "langgraph", "langchain_core", "jinja2", "playwright"),
+    ),
+    EntryPoint(
+        name="api_app",
+        code="import app.main",
+        budget_seconds=2.5,
+        forbidden=("langgraph", "langchain_core", "jinja2", "playwright", *_LLM_PROVIDERS),
+    ),
+    EntryPoint(
+        name="service_init",
+        code="from core.service import AgentService; AgentService()",
+        budget_seconds=1.5,
+        forbidden=("langgraph", "langchain_core", "jinja2", "playwright", *_LLM_PROVIDERS),
+    ),
+    EntryPoint(
+        name="append_hello_run",
+        code=(
+            "import sys, tempfile; from core.service import AgentService\n"
+            "with tempfile.NamedTemporaryFile(suffix='.py') as f:\n"
+            "    payload = {'target_file': f.name}\n"
+            "    r = AgentService().run_task('append_hello_agent_comment', payload)\n"
+            "sys.exit(r['status'] != 'ok')"
+        ),
+        budget_seconds=4.0,
+        forbidden=("jinja2", "playwright", *_LLM_PROVIDERS),
+    ),
+]
+
+
+def _import_profile(code: str) -> dict[str, int]:
+    env = {**os.environ, "P4AGENT_LLM_ENABLED": "false"}
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=_REPO_ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    profile: dict[str, int] = {}
+    for line in completed.stderr.splitlines():
+        match = _IMPORT_LINE.match(line)
+        if match:
+            profile[match.group(2)] = int(match.group(1))
+    return profile
+
+
+@pytest.mark.parametrize("entry_point", ENTRY_POINTS, ids=lambda entry: entry.name)
+def test_cold_start_import_budget(entry_point: EntryPoint) -> None:
+    profile = _import_profile(entry_point.code)
+    total_seconds = sum(profile.values()) / 1_000_000
+    print(f"{entry_point.name}: {total_seconds:.3f}s across {len(profile)} modules")
+
+    loaded = [
+        module
+        for module in entry_point.forbidden
+        if any(name == module or name.startswith(f"{module}.") for name in profile)
+    ]
+    assert loaded == [], f"{entry_point.name} imported {loaded}"
+    assert total_seconds <= entry_point.budget_seconds, (
+        f"{entry_point.name} spent {total_seconds:.3f}s importing "
+        f"(budget {entry_point.budget_seconds}s)"
+    )
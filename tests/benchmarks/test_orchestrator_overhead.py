@@ -0,0 +1,44 @@
+from pathlib import Path
+from time import perf_counter
+from typing import Any
+
+import pytest
+
+from core.orchestrator import AgentOrchestrator
+from core.routing import TaskRouter
+from tasks.handlers.base import TaskHandler
+from tasks.registry import TaskRegistry, TaskSpec
+
+pytestmark = pytest.mark.benchmark
+
+_ITERATIONS = 200
+# Graph traversal, validation and metrics only; the handler does no work.
+_BUDGET_SECONDS_PER_INVOKE = 0.02
+
+
+class _NoopHandler(TaskHandler):
+    task_id = "append_hello_agent_comment"
+
+    def __init__(self, *, requires_llm: bool) -> None:
+        self.requires_llm = requires_llm
+
+    def execute(self, payload: dict[str, Any], spec: TaskSpec) -> dict[str, Any]:
+        return {"changed_file": payload["target_file"], "appended_text": ""}
+
+
+@pytest.mark.parametrize("requires_llm", [False, True], ids=["direct", "full"])
+def test_per_invoke_overhead_for_noop_handler(requires_llm: bool) -> None:
+    registry = TaskRegistry(Path("configs/tasks"))
+    handler = _NoopHandler(requires_llm=requires_llm)
+    orchestrator = AgentOrchestrator(registry, TaskRouter({handler.task_id: handler}))
+    orchestrator.compile()
+    payload = {"target_file": "demo.py"}
+    orchestrator.invoke(handler.task_id, payload)
+
+    started = perf_counter()
+    for _ in range(_ITERATIONS):
+        orchestrator.invoke(handler.task_id, payload)
+    per_invoke = (perf_counter() - started) / _ITERATIONS
+
+    print(f"orchestrator[{'full' if requires_llm else 'direct'}]: {per_invoke * 1e6:.0f}us/invoke")
+    assert per_invoke < _BUDGET_SECONDS_PER_INVOKE
@@ -0,0 +1,43 @@
+from pathlib import Path
+from time import perf_counter
+
+import pytest
+
+from tasks import manifest
+from tasks.registry import TaskRegistry
+
+pytestmark = pytest.mark.benchmark
+
+_SPEC_COUNT = 300
+# Stat-ing the YAML files and reading one JSON document; no YAML or pydantic.
+_CACHED_BUDGET_SECONDS = 0.25
+
+
+def test_registry_startup_skips_parsing_unchanged_specs(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    task_dir = tmp_path / "tasks"
+    task_dir.mkdir()
+    source = Path("configs/tasks/append_hello_agent_comment.yaml").read_text(encoding="utf-8")
+    for index in range(_SPEC_COUNT):
+        (task_dir / f"task_{index:03}.yaml").write_text(
+            source.replace("id: append_hello_agent_comment", f"id: task_{index:03}"),
+            encoding="utf-8",
+        )
+    cache_dir = tmp_path / "cache"
+
+    started = perf_counter()
+    TaskRegistry(task_dir, cache_dir=cache_dir)
+    cold = perf_counter() - started
+
+    # A new process: only the on-disk documents are available.
+    monkeypatch.setattr(manifest, "_memory_cache", {})
+    started = perf_counter()
+    registry = TaskRegistry(task_dir, cache_dir=cache_dir)
+    cached = perf_counter() - started
+
+    print(f"registry[{_SPEC_COUNT} specs]: cold {cold * 1e3:.0f}ms, cached {cached * 1e3:.1f}ms")
+    assert len(registry.list_ids()) == _SPEC_COUNT
+    assert cached < _CACHED_BUDGET_SECONDS
+    assert cached * 5 < cold
@@ -0,0 +1,76 @@
+from time import perf_counter
+from typing import Any
+
+import pytest
+from langchain_core.language_models import BaseChatModel, LanguageModelInput
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.runnables import Runnable
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+import infra.llm.openai_adapter as openai_module
+from infra.llm.news_schema import NewsExtractOutput
+
+pytestmark = pytest.mark.benchmark
+
+_ITERATIONS = 200
+
+
+class _StubChatModel(BaseChatModel):
+    """Answers every prompt with the same tool call, without any network I/O."""
+
+    @property
+    def _llm_type(self) -> str:
+        return "stub"
+
+    def _generate(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        tool_call = {"name": "NewsExtractOutput", "args": {"items_en": []}, "id": "call-1"}
+        message = AIMessage(content="", tool_calls=[tool_call])
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def bind_tools(  # type: ignore[override]
+        self, tools: list[Any], **kwargs: Any
+    ) -> Runnable[LanguageModelInput, BaseMessage]:
+        return self.bind(tools=[convert_to_openai_tool(tool) for tool in tools], **kwargs)
+
+
+def test_cached_structured_runner_cuts_per_call_overhead(monkeypatch: pytest.MonkeyPatch) -> None:
+    model = _StubChatModel()
+    monkeypatch.setattr(openai_module, "ChatOpenAI", lambda **_: model)
+    adapter = openai_module.OpenAIAdapter(
+        model="m", api_key="k", base_url=None, temperature=0.0, timeout_seconds=5
+    )
+
+    started = perf_counter()
+    for _ in range(_ITERATIONS):
+        # What every call used to pay before the runner was memoized.
+        model.with_structured_output(NewsExtractOutput, include_raw=True)
+    binding = (perf_counter() - started) / _ITERATIONS
+
+    adapter._runner(NewsExtractOutput)
+    started = perf_counter()
+    for _ in range(_ITERATIONS):
+        adapter._runner(NewsExtractOutput)
+    lookup = (perf_counter() - started) / _ITERATIONS
+
+    started = perf_counter()
+    for _ in range(_ITERATIONS):
+        model.with_structured_output(NewsExtractOutput, include_raw=True).invoke("prompt")
+    rebuilt = (perf_counter() - started) / _ITERATIONS
+
+    started = perf_counter()
+    for _ in range(_ITERATIONS):
+        adapter.invoke_structured("prompt", NewsExtractOutput)
+    cached = (perf_counter() - started) / _ITERATIONS
+
+    print(
+        f"structured output: binding {binding * 1e6:.0f}us, cached lookup {lookup * 1e6:.2f}us; "
+        f"per call rebuilt {rebuilt * 1e6:.0f}us, cached {cached * 1e6:.0f}us"
+    )
+    assert lookup * 100 < binding
@@ -0,0 +1,30 @@
+from pathlib import Path
+from time import perf_counter
+
+import pytest
+
+from tasks.registry import TaskRegistry
+from tasks.validation import compile_validators, validate_task_payload
+
+pytestmark = pytest.mark.benchmark
+
+_ITERATIONS = 500
+
+
+def test_compiled_payload_validation_is_cheaper_than_building_models() -> None:
+    spec = TaskRegistry(Path("configs/tasks")).get("daily_google_news_report_pipeline")
+    payload = {"max_items": 10, "timezone": "Asia/Shanghai", "output_path": "out.md"}
+
+    started = perf_counter()
+    for _ in range(_ITERATIONS):
+        # What every call used to pay: a throwaway model built from the spec.
+        compile_validators(spec).payload.model_validate(payload)
+    rebuilt = (perf_counter() - started) / _ITERATIONS
+
+    started = perf_counter()
+    for _ in range(_ITERATIONS):
+        validate_task_payload(spec, payload)
+    compiled = (perf_counter() - started) / _ITERATIONS
+
+    print(f"validation: rebuilt {rebuilt * 1e6:.0f}us/call, compiled {compiled * 1e6:.1f}us/call")
+    assert compiled * 10 < rebuilt
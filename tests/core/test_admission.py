@@ -0,0 +1,82 @@
+from concurrent.futures import ThreadPoolExecutor
+from threading import Event
+from time import sleep
+
+import pytest
+
+from core.admission import AdmissionController, TaskOverloadedError
+from core.metrics import ADMISSION_REJECTIONS
+
+
+def test_unlimited_task_is_always_admitted() -> None:
+    controller = AdmissionController(max_wait_seconds=0)
+
+    with (
+        controller.admit("free", max_concurrency=None, max_queue_depth=0),
+        controller.admit("free", max_concurrency=None, max_queue_depth=0),
+    ):
+        assert controller.snapshot("free") == {"running": 0, "waiting": 0}
+
+
+def test_rejects_when_slots_and_queue_are_full() -> None:
+    now = [0.0]
+    controller = AdmissionController(max_wait_seconds=0, clock=lambda: now[0])
+    before = ADMISSION_REJECTIONS.value(task_id="busy")
+
+    with controller.admit("busy", max_concurrency=1, max_queue_depth=0):
+        now[0] = 4.0
+    release = controller.acquire("busy", max_concurrency=1, max_queue_depth=0)
+
+    with pytest.raises(TaskOverloadedError) as excinfo:
+        controller.acquire("busy", max_concurrency=1, max_queue_depth=0)
+
+    assert excinfo.value.retry_after == 4
+    assert ADMISSION_REJECTIONS.value(task_id="busy") == before + 1
+    release()
+    release()
+    assert controller.snapshot("busy") == {"running": 0, "waiting": 0}
+
+
+def test_queued_caller_gets_slot_when_one_frees() -> None:
+    controller = AdmissionController(max_wait_seconds=5)
+    release_first = controller.acquire("q", max_concurrency=1, max_queue_depth=1)
+    admitted = Event()
+
+    def _wait_for_slot() -> None:
+        with controller.admit("q", max_concurrency=1, max_queue_depth=1):
+            admitted.set()
+
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        future = pool.submit(_wait_for_slot)
+        while controller.snapshot("q")["waiting"] == 0:
+            sleep(0.01)
+        with pytest.raises(TaskOverloadedError):
+            controller.acquire("q", max_concurrency=1, max_queue_depth=1)
+        release_first()
+        future.result(timeout=5)
+
+    assert admitted.is_set()
+
+
+def test_waiter_is_rejected_after_max_wait() -> None:
+    controller = AdmissionController(max_wait_seconds=0.05)
+    release = controller.acquire("slow", max_concurrency=1, max_queue_depth=1)
+
+    with pytest.raises(TaskOverloadedError):
+        controller.acquire("slow", max_concurrency=1, max_queue_depth=1)
+
+    assert controller.snapshot("slow") == {"running": 1, "waiting": 0}
+    release()
+
+
+def test_gate_follows_changed_limits() -> None:
+    controller = AdmissionController(max_wait_seconds=0)
+    first = controller.acquire("grown", max_concurrency=1, max_queue_depth=0)
+
+    second = controller.acquire("grown", max_concurrency=2, max_queue_depth=0)
+    with pytest.raises(TaskOverloadedError):
+        controller.acquire("grown", max_concurrency=2, max_queue_depth=0)
+
+    assert controller.snapshot("grown") == {"running": 2, "waiting": 0}
+    first()
+    second()
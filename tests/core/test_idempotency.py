@@ -0,0 +1,133 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from threading import Event
+from time import sleep
+from typing import Any
+
+import pytest
+
+from core.idempotency import SingleFlightCache, payload_fingerprint
+
+
+def test_payload_fingerprint_ignores_key_order() -> None:
+    first = payload_fingerprint("demo", {"a": 1, "b": [1, 2]})
+    second = payload_fingerprint("demo", {"b": [1, 2], "a": 1})
+
+    assert first == second
+    assert first != payload_fingerprint("other", {"a": 1, "b": [1, 2]})
+
+
+def test_single_flight_collapses_concurrent_calls() -> None:
+    cache = SingleFlightCache(ttl_seconds=0, max_entries=0)
+    release = Event()
+    calls: list[int] = []
+
+    def _slow() -> dict[str, Any]:
+        calls.append(1)
+        release.wait(5)
+        return {"status": "ok"}
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        futures = [pool.submit(cache.run, "k", _slow) for _ in range(4)]
+        while not calls:
+            sleep(0.01)
+        sleep(0.05)
+        release.set()
+        results = [future.result(timeout=5) for future in futures]
+
+    assert calls == [1]
+    assert results == [{"status": "ok"}] * 4
+
+
+def test_single_flight_collapses_async_and_sync_callers() -> None:
+    cache = SingleFlightCache(ttl_seconds=0, max_entries=0)
+    calls: list[int] = []
+
+    async def _leader() -> dict[str, Any]:
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return {"status": "ok"}
+
+    async def _main() -> list[dict[str, Any]]:
+        leader = asyncio.ensure_future(cache.arun("k", _leader))
+        await asyncio.sleep(0.01)
+        followers = [cache.arun("k", _leader) for _ in range(3)]
+        from_thread = asyncio.to_thread(cache.run, "k", lambda: {"status": "sync"})
+        return list(await asyncio.gather(leader, *followers, from_thread))
+
+    results = asyncio.run(_main())
+
+    assert calls == [1]
+    assert results == [{"status": "ok"}] * 5
+
+
+def test_single_flight_caches_until_ttl_expires() -> None:
+    now = [0.0]
+    cache = SingleFlightCache(ttl_seconds=10, max_entries=4, clock=lambda: now[0])
+    calls: list[int] = []
+
+    def _run() -> dict[str, Any]:
+        calls.append(1)
+        return {"status": "ok", "call": len(calls)}
+
+    assert cache.run("k", _run)["call"] == 1
+    now[0] = 9.0
+    assert cache.run("k", _run)["call"] == 1
+    now[0] = 10.0
+    assert cache.run("k", _run)["call"] == 2
+
+
+def test_single_flight_skips_uncacheable_results_and_errors() -> None:
+    cache = SingleFlightCache(
+        ttl_seconds=60,
+        max_entries=4,
+        should_cache=lambda result: result["status"] == "ok",
+    )
+    calls: list[int] = []
+
+    def _fail() -> dict[str, Any]:
+        calls.append(1)
+        return {"status": "failed"}
+
+    def _raise() -> dict[str, Any]:
+        raise RuntimeError("boom")
+
+    cache.run("k", _fail)
+    cache.run("k", _fail)
+    with pytest.raises(RuntimeError, match="boom"):
+        cache.run("e", _raise)
+
+    assert len(calls) == 2
+
+
+def test_single_flight_bounds_cache_size() -> None:
+    cache = SingleFlightCache(ttl_seconds=60, max_entries=1)
+    calls: list[str] = []
+
+    def _run(key: str) -> dict[str, Any]:
+        calls.append(key)
+        return {"status": "ok"}
+
+    cache.run("a", lambda: _run("a"))
+    cache.run("b", lambda: _run("b"))
+    cache.run("a", lambda: _run("a"))
+
+    assert calls == ["a", "b", "a"]
+
+
+def test_single_flight_forgets_matching_results() -> None:
+    cache = SingleFlightCache(ttl_seconds=60, max_entries=4)
+    calls: list[str] = []
+
+    def _run(key: str) -> dict[str, Any]:
+        calls.append(key)
+        if key == "a:inflight":
+            cache.forget(lambda cached: cached.startswith("a:"))
+        return {"status": "ok"}
+
+    for key in ("a:1", "b:1", "a:inflight", "a:1", "b:1", "a:inflight"):
+        cache.run(key, partial(_run, key))
+
+    # "a:1" was dropped; "a:inflight" finished after the forget and was not cached.
+    assert calls == ["a:1", "b:1", "a:inflight", "a:1", "a:inflight"]
@@ -0,0 +1,120 @@
+from threading import Event
+from time import sleep
+from typing import Any
+
+import pytest
+
+from core.jobs import (
+    Job,
+    JobNotCancellableError,
+    JobNotFoundError,
+    JobQueue,
+    JobQueueFullError,
+    JobStatus,
+)
+
+
+def _wait_finished(jobs: JobQueue, job_id: str) -> JobStatus:
+    for _ in range(500):
+        job = jobs.get(job_id)
+        if job.finished:
+            return job.status
+        sleep(0.01)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+def test_job_queue_runs_submitted_job() -> None:
+    jobs = JobQueue(
+        lambda task_id, payload: {"status": "ok", "task_id": task_id, **payload},
+        workers=1,
+        max_queued=4,
+        retention=10,
+    )
+    jobs.start()
+
+    job = jobs.submit("demo", {"value": 1})
+
+    assert _wait_finished(jobs, job.id) == JobStatus.SUCCEEDED
+    assert jobs.get(job.id).result == {"status": "ok", "task_id": "demo", "value": 1}
+    jobs.stop()
+
+
+def test_job_queue_records_runner_exception() -> None:
+    def _boom(task_id: str, payload: dict[str, Any]) -> dict[str, Any]:
+        raise RuntimeError("boom")
+
+    jobs = JobQueue(_boom, workers=1, max_queued=4, retention=10)
+    jobs.start()
+
+    job = jobs.submit("demo", {})
+
+    assert _wait_finished(jobs, job.id) == JobStatus.FAILED
+    assert jobs.get(job.id).error == "boom"
+    jobs.stop()
+
+
+def test_job_queue_rejects_when_full_and_cancels_queued() -> None:
+    release = Event()
+    started = Event()
+
+    def _block(task_id: str, payload: dict[str, Any]) -> dict[str, Any]:
+        started.set()
+        release.wait(5)
+        return {"status": "ok"}
+
+    jobs = JobQueue(_block, workers=1, max_queued=1, retention=10)
+    jobs.start()
+    running = jobs.submit("slow", {})
+    assert started.wait(5)
+    queued = jobs.submit("slow", {})
+
+    with pytest.raises(JobQueueFullError):
+        jobs.submit("slow", {})
+    with pytest.raises(JobNotCancellableError):
+        jobs.cancel(running.id)
+
+    assert jobs.cancel(queued.id).status == JobStatus.CANCELLED
+    # The cancelled job's slot is free again before a worker dequeues it.
+    requeued = jobs.submit("slow", {})
+    with pytest.raises(JobQueueFullError):
+        jobs.submit("slow", {})
+    jobs.cancel(requeued.id)
+    for _ in range(5):
+        jobs.cancel(jobs.submit("slow", {}).id)
+    # Cancelled ids do not pile up behind the busy worker.
+    assert not jobs._pending
+    release.set()
+    assert _wait_finished(jobs, running.id) == JobStatus.SUCCEEDED
+    jobs.stop()
+
+
+def test_job_queue_evicts_old_finished_jobs() -> None:
+    jobs = JobQueue(lambda task_id, payload: {"status": "ok"}, workers=1, max_queued=4, retention=1)
+    first = jobs.submit("demo", {})
+    second = jobs.submit("demo", {})
+    jobs.cancel(first.id)
+    jobs.cancel(second.id)
+
+    with pytest.raises(JobNotFoundError):
+        jobs.get(first.id)
+    assert jobs.get(second.id).status == JobStatus.CANCELLED
+
+
+def test_job_queue_calls_on_finished_with_final_snapshot() -> None:
+    finished: list[JobStatus] = []
+    done = Event()
+
+    def _on_finished(job: Job) -> None:
+        finished.append(job.status)
+        done.set()
+
+    jobs = JobQueue(
+        lambda task_id, payload: {"status": "ok"}, workers=1, max_queued=4, retention=10
+    )
+    jobs.start()
+
+    jobs.submit("demo", {}, on_finished=_on_finished)
+
+    assert done.wait(5)
+    assert finished == [JobStatus.SUCCEEDED]
+    jobs.stop()
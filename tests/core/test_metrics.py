@@ -0,0 +1,51 @@
+import pytest
+
+from core.metrics import MetricsRegistry
+
+
+def test_histogram_renders_cumulative_buckets() -> None:
+    registry = MetricsRegistry()
+    histogram = registry.histogram("demo_seconds", "Demo latency.", ("node",), buckets=(0.1, 1.0))
+
+    histogram.observe(0.05, node="a")
+    histogram.observe(0.5, node="a")
+    histogram.observe(5.0, node="a")
+
+    text = registry.render()
+
+    assert "# TYPE demo_seconds histogram" in text
+    assert 'demo_seconds_bucket{node="a",le="0.1"} 1' in text
+    assert 'demo_seconds_bucket{node="a",le="1"} 2' in text
+    assert 'demo_seconds_bucket{node="a",le="+Inf"} 3' in text
+    assert 'demo_seconds_sum{node="a"} 5.55' in text
+    assert 'demo_seconds_count{node="a"} 3' in text
+
+
+def test_histogram_time_records_failures() -> None:
+    registry = MetricsRegistry()
+    histogram = registry.histogram("demo_seconds", "Demo latency.")
+
+    with pytest.raises(RuntimeError), histogram.time():
+        raise RuntimeError("boom")
+
+    assert histogram.count() == 1
+
+
+def test_counter_escapes_labels_and_validates_names() -> None:
+    registry = MetricsRegistry()
+    counter = registry.counter("demo_total", "Demo counter.", ("code",))
+
+    counter.inc(code='bad "quote"')
+    counter.inc(2, code='bad "quote"')
+
+    assert 'demo_total{code="bad \\"quote\\""} 3' in registry.render()
+    with pytest.raises(ValueError, match="expects labels"):
+        counter.inc(other="x")
+
+
+def test_registry_rejects_duplicate_names() -> None:
+    registry = MetricsRegistry()
+    registry.counter("demo_total", "Demo counter.")
+
+    with pytest.raises(ValueError, match="already registered"):
+        registry.counter("demo_total", "Demo counter.")
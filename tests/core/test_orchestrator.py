@@ -1,12 +1,21 @@
+import asyncio
+import threading
 from pathlib import Path
+from time import perf_counter
+from typing import Any
 
 import pytest
 
 import core.orchestrator as orchestrator_module
-from core.orchestrator import AgentOrchestrator
+import tasks.registry as registry_module
+from core.context import SubtaskError, current_context
+from core.events import emit_step_event
+from core.metrics import NODE_DURATION, TASK_ERRORS
+from core.orchestrator import AgentOrchestrator, GraphVariant, compiled_graph
 from core.routing import TaskRouter
 from core.settings import settings
-from tasks.registry import TaskRegistry
+from tasks.handlers.base import TaskHandler
+from tasks.registry import TaskRegistry, TaskSpec
 
 
 def _build_orchestrator() -> AgentOrchestrator:
@@ -43,7 +52,7 @@ def test_llm_bootstrap_failure_falls_back_to_rules(
 
     monkeypatch.setattr(settings, "llm_enabled", True)
     monkeypatch.setattr(settings, "llm_fallback_to_rules", True)
-    monkeypatch.setattr(orchestrator_module, "build_llm_adapter", _raise_missing_key)
+    monkeypatch.setattr(orchestrator_module, "get_llm_adapter", _raise_missing_key)
 
     orchestrator = _build_orchestrator()
     end_state = orchestrator.invoke(
@@ -70,7 +79,7 @@ def test_llm_bootstrap_failure_can_block_execution(
 
     monkeypatch.setattr(settings, "llm_enabled", True)
     monkeypatch.setattr(settings, "llm_fallback_to_rules", False)
-    monkeypatch.setattr(orchestrator_module, "build_llm_adapter", _raise_missing_key)
+    monkeypatch.setattr(orchestrator_module, "get_llm_adapter", _raise_missing_key)
 
     orchestrator = _build_orchestrator()
     end_state = orchestrator.invoke(
@@ -86,9 +95,255 @@ def test_llm_bootstrap_failure_can_block_execution(
 
 
 def test_invalid_payload_returns_structured_error() -> None:
+    errors_before = TASK_ERRORS.value(task_id="append_hello_agent_comment", code="INVALID_PAYLOAD")
+    nodes_before = NODE_DURATION.count(node="validation")
+
     orchestrator = _build_orchestrator()
     end_state = orchestrator.invoke(task_id="append_hello_agent_comment", payload={})
 
     assert end_state["response"] is not None
     assert end_state["response"]["status"] == "failed"
     assert end_state["response"]["error"]["code"] == "INVALID_PAYLOAD"
+    assert (
+        TASK_ERRORS.value(task_id="append_hello_agent_comment", code="INVALID_PAYLOAD")
+        == errors_before + 1
+    )
+    assert NODE_DURATION.count(node="validation") == nodes_before + 1
+
+
+def test_stream_emits_node_and_step_events(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    registry = TaskRegistry(Path("configs/tasks"))
+    router = TaskRouter(registry.get_handler_map())
+    handler = router.route("append_hello_agent_comment")
+    original_execute = handler.execute
+
+    def _execute_with_steps(payload: dict[str, Any], spec: TaskSpec) -> dict[str, Any]:
+        emit_step_event({"name": "append", "status": "ok", "duration_ms": 0})
+        return original_execute(payload, spec)
+
+    monkeypatch.setattr(handler, "execute", _execute_with_steps)
+    target = tmp_path / "demo_stream.py"
+    target.write_text("print('x')\n", encoding="utf-8")
+
+    events = list(
+        AgentOrchestrator(registry, router).stream(
+            task_id="append_hello_agent_comment",
+            payload={"target_file": str(target)},
+        )
+    )
+
+    labels = [event.get("node") or event.get("name") for event in events[:-1]]
+    assert labels == ["planning", "validation", "llm_generate", "append", "execute", "response"]
+    assert events[3]["event"] == "step"
+    assert events[-1]["event"] == "result"
+    assert events[-1]["response"]["status"] == "ok"
+    assert all(event["elapsed_ms"] >= 0 for event in events)
+
+
+class _NoLlmHandler(TaskHandler):
+    task_id = "append_hello_agent_comment"
+
+    def execute(self, payload: dict[str, Any], spec: TaskSpec) -> dict[str, Any]:
+        return {"changed_file": payload["target_file"], "appended_text": "# hi"}
+
+
+def _no_llm_orchestrator() -> AgentOrchestrator:
+    registry = TaskRegistry(Path("configs/tasks"))
+    return AgentOrchestrator(registry, TaskRouter({"append_hello_agent_comment": _NoLlmHandler()}))
+
+
+def test_compiled_graphs_are_shared_across_orchestrators() -> None:
+    first = _build_orchestrator()
+    second = _no_llm_orchestrator()
+    first.compile()
+
+    assert first.variant_for("append_hello_agent_comment") == GraphVariant.FULL
+    assert second.variant_for("append_hello_agent_comment") == GraphVariant.DIRECT
+    assert first.variant_for("missing") == GraphVariant.FULL
+    assert compiled_graph(GraphVariant.FULL) is compiled_graph(GraphVariant.FULL)
+    assert "llm_generate" not in compiled_graph(GraphVariant.DIRECT).nodes
+
+
+def test_handlers_without_llm_skip_llm_node() -> None:
+    events = list(
+        _no_llm_orchestrator().stream(
+            task_id="append_hello_agent_comment",
+            payload={"target_file": "demo.py"},
+        )
+    )
+
+    labels = [event.get("node") for event in events[:-1]]
+    assert labels == ["planning", "validation", "execute", "response"]
+    assert events[-1]["response"] == {
+        "status": "ok",
+        "task_id": "append_hello_agent_comment",
+        "changed_file": "demo.py",
+        "appended_text": "# hi",
+    }
+
+
+def test_errors_jump_straight_to_response() -> None:
+    events = list(_build_orchestrator().stream(task_id="append_hello_agent_comment", payload={}))
+
+    labels = [event.get("node") for event in events[:-1]]
+    assert labels == ["planning", "validation", "response"]
+    assert events[-1]["response"]["error"]["code"] == "INVALID_PAYLOAD"
+
+
+class _AsyncSleepHandler(TaskHandler):
+    task_id = "append_hello_agent_comment"
+
+    def __init__(self) -> None:
+        self.threads: set[str] = set()
+
+    def execute(self, payload: dict[str, Any], spec: TaskSpec) -> dict[str, Any]:
+        raise AssertionError("the async path must not call execute")
+
+    async def aexecute(self, payload: dict[str, Any], spec: TaskSpec) -> dict[str, Any]:
+        self.threads.add(threading.current_thread().name)
+        await asyncio.sleep(0.05)
+        return {"changed_file": payload["target_file"], "appended_text": "# hi"}
+
+
+def test_ainvoke_runs_async_handlers_concurrently_on_the_loop() -> None:
+    handler = _AsyncSleepHandler()
+    orchestrator = AgentOrchestrator(
+        TaskRegistry(Path("configs/tasks")),
+        TaskRouter({"append_hello_agent_comment": handler}),
+    )
+
+    async def _run_many() -> list[Any]:
+        return list(
+            await asyncio.gather(
+                *(
+                    orchestrator.ainvoke("append_hello_agent_comment", {"target_file": f"{i}.py"})
+                    for i in range(50)
+                )
+            )
+        )
+
+    started = perf_counter()
+    states = asyncio.run(_run_many())
+
+    # 50 sequential runs would take at least 2.5s.
+    assert perf_counter() - started < 2.0
+    assert handler.threads == {threading.main_thread().name}
+    assert [state["response"]["changed_file"] for state in states] == [f"{i}.py" for i in range(50)]
+
+
+def test_ainvoke_offloads_sync_handlers(tmp_path: Path) -> None:
+    target = tmp_path / "demo_async.py"
+    target.write_text("print('x')\n", encoding="utf-8")
+
+    end_state = asyncio.run(
+        _build_orchestrator().ainvoke(
+            task_id="append_hello_agent_comment",
+            payload={"target_file": str(target)},
+        )
+    )
+
+    assert end_state["response"] is not None
+    assert end_state["response"]["status"] == "ok"
+    assert "# hello from p4agent" in target.read_text(encoding="utf-8")
+
+
+def test_ainvoke_builds_handlers_off_the_event_loop(monkeypatch: pytest.MonkeyPatch) -> None:
+    build_threads: list[str] = []
+    build_handler = registry_module._build_handler
+
+    def _recording_build(spec: TaskSpec) -> TaskHandler:
+        build_threads.append(threading.current_thread().name)
+        return build_handler(spec)
+
+    monkeypatch.setattr(registry_module, "_build_handler", _recording_build)
+    orchestrator = _build_orchestrator()
+
+    async def _run_twice() -> list[Any]:
+        return [await orchestrator.ainvoke("append_hello_agent_comment", {}) for _ in range(2)]
+
+    states = asyncio.run(_run_twice())
+
+    assert len(build_threads) == 1
+    assert build_threads[0] != threading.main_thread().name
+    assert [state["error_code"] for state in states] == ["INVALID_PAYLOAD"] * 2
+
+    start = orchestrator_module._start_state("append_hello_agent_comment", {})
+    planned = asyncio.run(_build_orchestrator()._aplanning_node(start))
+
+    assert planned["handler"] is not None
+    assert len(build_threads) == 2
+    assert build_threads[1] != threading.main_thread().name
+
+
+class _ParentHandler(TaskHandler):
+    task_id = "append_hello_agent_comment"
+
+    def execute(self, payload: dict[str, Any], spec: TaskSpec) -> dict[str, Any]:
+        child = current_context().run_subtask("fetch_google_news_homepage", {"url": "u"})
+        return {"changed_file": "x.py", "appended_text": "# hi", "child": child}
+
+
+class _ChildHandler(TaskHandler):
+    task_id = "fetch_google_news_homepage"
+
+    def execute(self, payload: dict[str, Any], spec: TaskSpec) -> dict[str, Any]:
+        try:
+            current_context().run_subtask("extract_top10_en_news", {"bogus": 1})
+        except SubtaskError as exc:
+            return {
+                "fetched_at": "2026-02-18T00:00:00+00:00",
+                "source_url": payload["url"],
+                "raw_cards": [],
+                "raw_html_path": "raw.html",
+                "grandchild_error": exc.code,
+            }
+        raise AssertionError("invalid sub-task payload was accepted")
+
+
+def test_subtasks_reuse_routed_handlers_and_report_nested_spans() -> None:
+    registry = TaskRegistry(Path("configs/tasks"))
+    handlers = dict(registry.get_handler_map())
+    handlers["append_hello_agent_comment"] = _ParentHandler()
+    handlers["fetch_google_news_homepage"] = _ChildHandler()
+    orchestrator = AgentOrchestrator(registry, TaskRouter(handlers))
+
+    response = orchestrator.invoke("append_hello_agent_comment", {"target_file": "x.py"})[
+        "response"
+    ]
+
+    assert response is not None
+    assert response["child"]["source_url"] == "u"
+    assert response["child"]["grandchild_error"] == "INVALID_PAYLOAD"
+    [span] = response["subtasks"]
+    assert span["task_id"] == "fetch_google_news_homepage"
+    assert span["status"] == "ok"
+    assert span["duration_ms"] >= 0
+    [nested] = span["children"]
+    assert nested["task_id"] == "extract_top10_en_news"
+    assert nested["error"]["code"] == "INVALID_PAYLOAD"
+
+
+class _ContractBreakingHandler(TaskHandler):
+    task_id = "append_hello_agent_comment"
+
+    def execute(self, payload: dict[str, Any], spec: TaskSpec) -> dict[str, Any]:
+        return {"changed_file": payload["target_file"]}
+
+
+def test_results_missing_declared_outputs_fail_with_invalid_output() -> None:
+    orchestrator = AgentOrchestrator(
+        TaskRegistry(Path("configs/tasks")),
+        TaskRouter({"append_hello_agent_comment": _ContractBreakingHandler()}),
+    )
+
+    response = orchestrator.invoke("append_hello_agent_comment", {"target_file": "x.py"})[
+        "response"
+    ]
+
+    assert response is not None
+    assert response["status"] == "failed"
+    assert response["error"]["code"] == "INVALID_OUTPUT"
+    assert "appended_text" in response["error"]["message"]
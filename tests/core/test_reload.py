@@ -0,0 +1,42 @@
+import threading
+from pathlib import Path
+
+from core.reload import TaskConfigWatcher
+
+
+def test_watcher_calls_back_after_a_config_changes(tmp_path: Path) -> None:
+    (tmp_path / "a.yaml").write_text("id: a\n", encoding="utf-8")
+    changed = threading.Event()
+    watcher = TaskConfigWatcher(tmp_path, changed.set, interval_seconds=0.01)
+    watcher.start()
+    try:
+        assert not changed.wait(0.1)
+        (tmp_path / "b.yaml").write_text("id: b\n", encoding="utf-8")
+        assert changed.wait(2)
+    finally:
+        watcher.stop()
+
+
+def test_watcher_survives_a_failing_reload(tmp_path: Path) -> None:
+    calls: list[int] = []
+    reloaded = threading.Event()
+
+    def on_change() -> None:
+        calls.append(1)
+        if len(calls) == 1:
+            raise ValueError("bad config")
+        reloaded.set()
+
+    watcher = TaskConfigWatcher(tmp_path, on_change, interval_seconds=0.01)
+    watcher.start()
+    try:
+        (tmp_path / "a.yaml").write_text("id: a\n", encoding="utf-8")
+        for _ in range(200):
+            if calls:
+                break
+            threading.Event().wait(0.01)
+        (tmp_path / "b.yaml").write_text("id: b\n", encoding="utf-8")
+        assert reloaded.wait(2)
+    finally:
+        watcher.stop()
+    assert len(calls) == 2
@@ -0,0 +1,145 @@
+import os
+import sqlite3
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+import core.runs as runs_module
+from core.runs import RunInProgressError, RunNotFoundError, RunStore
+from core.state import AgentState
+
+
+def _state(**overrides: object) -> AgentState:
+    state: AgentState = {
+        "task_id": "demo",
+        "input_payload": {},
+        "task_spec": None,
+        "handler": None,
+        "validated_payload": {"target_file": "a.py"},
+        "plan": "plan",
+        "llm_error": None,
+        "execution_result": None,
+        "response": None,
+        "error_code": None,
+        "error_message": None,
+    }
+    state.update(overrides)  # type: ignore[typeddict-item]
+    return state
+
+
+def test_run_store_checkpoints_nodes_steps_and_response(tmp_path: Path) -> None:
+    store = RunStore(tmp_path / "runs.sqlite3", retention=10)
+    run = store.start("demo", {"target_file": "a.py"})
+
+    run.record_step("fetch", {"raw_cards": [1, 2]})
+    run.record_node("execute", _state(execution_result={"changed": True}))
+    run.record_node("response", _state(response={"status": "ok", "task_id": "demo"}))
+
+    record = store.get(run.run_id)
+    assert record.status == "succeeded"
+    assert record.last_node == "response"
+    assert record.payload == {"target_file": "a.py"}
+    assert run.step_result("fetch") == {"raw_cards": [1, 2]}
+    assert run.step_result("translate") is None
+
+    restored = _state(validated_payload=None)
+    assert run.restore_node("execute", restored)
+    assert restored["execution_result"] == {"changed": True}
+    assert not run.restore_node("planning", _state())
+    store.close()
+
+
+def test_run_store_does_not_restore_failed_nodes(tmp_path: Path) -> None:
+    store = RunStore(tmp_path / "runs.sqlite3", retention=10)
+    run = store.start("demo", {})
+
+    run.record_node("execute", _state(error_code="EXECUTION_ERROR", error_message="boom"))
+    run.record_node("response", _state(response={"status": "failed"}))
+
+    assert store.get(run.run_id).status == "failed"
+    assert not run.restore_node("execute", _state())
+    assert store.reopen(run.run_id).run_id == run.run_id
+    assert store.get(run.run_id).status == "running"
+    with pytest.raises(RunInProgressError):
+        store.reopen(run.run_id)
+    store.close()
+
+
+def test_run_store_prunes_beyond_retention(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(runs_module, "_PRUNE_EVERY", 1)
+    store = RunStore(tmp_path / "runs.sqlite3", retention=2)
+
+    run_ids = [store.start("demo", {"index": index}).run_id for index in range(4)]
+
+    with pytest.raises(RunNotFoundError):
+        store.get(run_ids[0])
+    assert store.get(run_ids[-1]).payload == {"index": 3}
+    with pytest.raises(RunNotFoundError):
+        store.reopen("missing")
+    store.close()
+
+
+def test_run_store_interrupts_only_running_runs(tmp_path: Path) -> None:
+    store = RunStore(tmp_path / "runs.sqlite3", retention=10)
+    run = store.start("demo", {})
+    finished = store.start("demo", {})
+    finished.record_node("response", _state(response={"status": "ok"}))
+
+    run.interrupt()
+    finished.interrupt()
+
+    assert store.get(run.run_id).status == "interrupted"
+    assert store.get(finished.run_id).status == "succeeded"
+    assert store.reopen(run.run_id).run_id == run.run_id
+    assert store.get(run.run_id).owner_pid == os.getpid()
+    store.close()
+
+
+def test_run_store_takes_over_runs_whose_owner_is_gone(tmp_path: Path) -> None:
+    store = RunStore(tmp_path / "runs.sqlite3", retention=10)
+    orphaned = store.start("demo", {})
+    owned = store.start("demo", {})
+    gone = subprocess.run(
+        [sys.executable, "-c", "import os; print(os.getpid())"],
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    with store._conn:
+        store._conn.execute(
+            "UPDATE runs SET owner_pid = ? WHERE run_id = ?", (int(gone.stdout), orphaned.run_id)
+        )
+        store._conn.execute(
+            "UPDATE runs SET owner_pid = ? WHERE run_id = ?", (os.getppid(), owned.run_id)
+        )
+
+    assert store.get(orphaned.run_id).abandoned
+    assert store.reopen(orphaned.run_id).run_id == orphaned.run_id
+    assert not store.get(orphaned.run_id).abandoned
+    with pytest.raises(RunInProgressError):
+        store.reopen(owned.run_id)
+    store.close()
+
+
+def test_run_store_adds_owner_column_to_old_stores(tmp_path: Path) -> None:
+    path = tmp_path / "runs.sqlite3"
+    with sqlite3.connect(path) as conn:
+        conn.execute(
+            "CREATE TABLE runs (run_id TEXT PRIMARY KEY, task_id TEXT NOT NULL,"
+            " payload TEXT NOT NULL, status TEXT NOT NULL, last_node TEXT, response TEXT,"
+            " created_at REAL NOT NULL, updated_at REAL NOT NULL)"
+        )
+        conn.execute("INSERT INTO runs VALUES ('old', 'demo', '{}', 'running', NULL, NULL, 0, 0)")
+    conn.close()
+
+    store = RunStore(path, retention=10)
+
+    assert store.get("old").abandoned
+    assert store.reopen("old").run_id == "old"
+    assert store.start("demo", {}).run_id
+    store.close()
@@ -9,3 +9,17 @@ def test_task_registry_loads_task() -> None:
 
     assert loaded.id == "append_hello_agent_comment"
     assert "target_file" in loaded.inputs.properties
+
+
+def test_task_registry_builds_handlers_on_first_use() -> None:
+    registry = TaskRegistry(Path("configs/tasks"))
+    handlers = registry.get_handler_map()
+
+    assert registry.loaded_handlers() == []
+    assert "daily_google_news_report_pipeline" in handlers
+
+    handler = handlers["append_hello_agent_comment"]
+
+    assert registry.get_handler("append_hello_agent_comment") is handler
+    assert registry.loaded_handlers() == [handler]
+    assert registry.get("append_hello_agent_comment") is registry.get("append_hello_agent_comment")
@@ -2,6 +2,7 @@ from pathlib import Path
 
 import pytest
 
+from core.orchestrator import AgentOrchestrator
 from core.routing import RouteNotFoundError, TaskRouter
 from tasks.handlers.append_hello_agent_comment import AppendHelloAgentCommentHandler
 from tasks.registry import TaskRegistry
@@ -43,3 +44,22 @@ def test_router_lists_google_news_tasks() -> None:
     assert "extract_top10_en_news" in router.list_ids()
     assert "translate_news_and_render_markdown" in router.list_ids()
     assert "daily_google_news_report_pipeline" in router.list_ids()
+
+
+def test_route_reports_handler_that_cannot_be_built(tmp_path: Path) -> None:
+    source = Path("configs/tasks/append_hello_agent_comment.yaml").read_text(encoding="utf-8")
+    (tmp_path / "broken.yaml").write_text(
+        source.replace("id: append_hello_agent_comment", "id: broken", 1).replace(
+            "tasks.handlers.append_hello_agent_comment.", "tasks.handlers.missing_module.", 1
+        ),
+        encoding="utf-8",
+    )
+    registry = TaskRegistry(tmp_path)
+    router = TaskRouter(registry.get_handler_map())
+
+    with pytest.raises(RouteNotFoundError, match="Could not build handler"):
+        router.route("broken")
+    orchestrator = AgentOrchestrator(task_registry=registry, task_router=router)
+    response = orchestrator.invoke(task_id="broken", payload={})["response"]
+    assert response is not None
+    assert response["error"]["code"] == "TASK_NOT_ROUTED"
@@ -0,0 +1,201 @@
+import json
+import subprocess
+from collections.abc import Iterator
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from threading import Thread
+from typing import Any
+
+import pytest
+
+from core.settings import Settings
+from infra.forge import (
+    ChangeRequest,
+    ForgeThread,
+    GitHubPublisher,
+    GitLabPublisher,
+    GitWorkspace,
+    NullPublisher,
+    build_publisher,
+)
+
+
+class _FakeForge(ThreadingHTTPServer):
+    def __init__(self) -> None:
+        super().__init__(("127.0.0.1", 0), _FakeForgeHandler)
+        self.requests: list[tuple[str, dict[str, str], dict[str, Any]]] = []
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+class _FakeForgeHandler(BaseHTTPRequestHandler):
+    server: _FakeForge
+
+    def do_POST(self) -> None:
+        length = int(self.headers.get("Content-Length", "0"))
+        body = json.loads(self.rfile.read(length))
+        self.server.requests.append((self.path, dict(self.headers), body))
+        reply = json.dumps(
+            {"html_url": "https://forge.test/pull/7", "web_url": "https://forge.test/mr/7"}
+        ).encode("utf-8")
+        self.send_response(201)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(reply)))
+        self.end_headers()
+        self.wfile.write(reply)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        del format, args
+
+
+@pytest.fixture
+def forge() -> Iterator[_FakeForge]:
+    server = _FakeForge()
+    thread = Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _git(cwd: Path, *args: str) -> str:
+    completed = subprocess.run(["git", *args], cwd=cwd, capture_output=True, text=True, check=True)
+    return completed.stdout
+
+
+@pytest.fixture
+def checkout(tmp_path: Path) -> Path:
+    remote = tmp_path / "remote.git"
+    work = tmp_path / "work"
+    _git(tmp_path, "init", "--bare", "-b", "main", str(remote))
+    _git(tmp_path, "init", "-b", "main", str(work))
+    _git(work, "config", "user.email", "bot@example.com")
+    _git(work, "config", "user.name", "bot")
+    (work / "README.md").write_text("hello\n", encoding="utf-8")
+    _git(work, "add", "README.md")
+    _git(work, "commit", "-m", "init")
+    _git(work, "remote", "add", "origin", str(remote))
+    _git(work, "push", "origin", "main")
+    return work
+
+
+_CHANGE = ChangeRequest(
+    branch="agent/issue-3-abc",
+    title="agent: demo for #3",
+    body="## Summary",
+    commit_message="feat(agent): run demo",
+)
+
+
+def test_github_publisher_replies_and_opens_draft_pull(forge: _FakeForge, checkout: Path) -> None:
+    publisher = GitHubPublisher(
+        api_url=forge.url,
+        token="secret",
+        workspace=GitWorkspace(checkout),
+        base_branch="main",
+        timeout_seconds=5,
+    )
+    thread = ForgeThread(repository="octo/demo", number=3)
+    (checkout / "README.md").write_text("hello agent\n", encoding="utf-8")
+
+    url = publisher.publish_changes(thread, _CHANGE)
+    publisher.reply(thread, "done")
+
+    assert url == "https://forge.test/pull/7"
+    (pull_path, headers, pull), (comment_path, _, comment) = forge.requests
+    assert pull_path == "/repos/octo/demo/pulls"
+    assert headers["Authorization"] == "Bearer secret"
+    assert pull["head"] == "agent/issue-3-abc" and pull["base"] == "main" and pull["draft"]
+    assert comment_path == "/repos/octo/demo/issues/3/comments"
+    assert comment == {"body": "done"}
+    assert _git(checkout, "rev-parse", "--abbrev-ref", "HEAD").strip() == "main"
+    remote_branches = _git(checkout, "ls-remote", "--heads", "origin")
+    assert "refs/heads/agent/issue-3-abc" in remote_branches
+
+
+def test_publisher_skips_change_request_without_changes(forge: _FakeForge, checkout: Path) -> None:
+    publisher = GitHubPublisher(
+        api_url=forge.url,
+        token="secret",
+        workspace=GitWorkspace(checkout),
+        base_branch="main",
+        timeout_seconds=5,
+    )
+
+    assert publisher.publish_changes(ForgeThread("octo/demo", 3), _CHANGE) is None
+    assert forge.requests == []
+
+
+def test_workspace_resets_to_the_remote_base_branch(checkout: Path, tmp_path: Path) -> None:
+    upstream = tmp_path / "upstream"
+    _git(tmp_path, "clone", str(tmp_path / "remote.git"), str(upstream))
+    _git(upstream, "config", "user.email", "dev@example.com")
+    _git(upstream, "config", "user.name", "dev")
+    (upstream / "NEWS.md").write_text("news\n", encoding="utf-8")
+    _git(upstream, "add", "NEWS.md")
+    _git(upstream, "commit", "-m", "news")
+    _git(upstream, "push", "origin", "main")
+    _git(checkout, "checkout", "-b", "elsewhere")
+    (checkout / "README.md").write_text("leftover\n", encoding="utf-8")
+    (checkout / "partial.txt").write_text("from a failed run\n", encoding="utf-8")
+    workspace = GitWorkspace(checkout)
+
+    workspace.reset_to("main")
+
+    assert _git(checkout, "rev-parse", "--abbrev-ref", "HEAD").strip() == "main"
+    assert (checkout / "NEWS.md").exists()
+    assert not workspace.has_changes()
+    (checkout / "README.md").write_text("changed again\n", encoding="utf-8")
+    (checkout / "partial.txt").write_text("again\n", encoding="utf-8")
+    workspace.discard()
+    assert not workspace.has_changes()
+    assert (checkout / "README.md").read_text(encoding="utf-8") == "hello\n"
+
+
+def test_gitlab_publisher_posts_notes_to_merge_requests(forge: _FakeForge, tmp_path: Path) -> None:
+    publisher = GitLabPublisher(
+        api_url=forge.url,
+        token="secret",
+        workspace=GitWorkspace(tmp_path),
+        base_branch="main",
+        timeout_seconds=5,
+    )
+
+    publisher.reply(ForgeThread("group/demo", 5, kind="merge_request"), "done")
+
+    ((path, headers, body),) = forge.requests
+    assert path == "/projects/group%2Fdemo/merge_requests/5/notes"
+    assert headers["Private-Token"] == "secret"
+    assert body == {"body": "done"}
+
+
+def test_build_publisher_requires_token_for_remote_forges(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv("P4AGENT_FORGE_TOKEN", raising=False)
+    assert isinstance(build_publisher(Settings(forge_provider="none")), NullPublisher)
+    with pytest.raises(ValueError, match="P4AGENT_FORGE_TOKEN is required"):
+        build_publisher(Settings(forge_provider="github", forge_token=None))
+    with pytest.raises(ValueError, match="P4AGENT_FORGE_REPO_DIR is required"):
+        build_publisher(Settings(forge_provider="gitlab", forge_token="t", forge_repo_dir=None))
+    with pytest.raises(ValueError, match="Unsupported forge_provider"):
+        build_publisher(Settings(forge_provider="gitea"))
+
+
+def test_build_publisher_only_accepts_a_marked_bot_clone(checkout: Path, tmp_path: Path) -> None:
+    cfg = Settings(forge_provider="github", forge_token="t", forge_repo_dir=checkout)
+
+    with pytest.raises(ValueError, match="not marked as a dedicated bot clone"):
+        build_publisher(cfg)
+    (checkout / "src").mkdir()
+    with pytest.raises(ValueError, match="not the top level"):
+        build_publisher(cfg.model_copy(update={"forge_repo_dir": checkout / "src"}))
+    with pytest.raises(ValueError, match="not a git checkout"):
+        build_publisher(cfg.model_copy(update={"forge_repo_dir": tmp_path / "missing"}))
+
+    _git(checkout, "config", "p4agent.botClone", "true")
+
+    assert isinstance(build_publisher(cfg), GitHubPublisher)
@@ -1,33 +1,68 @@
+import asyncio
+import json
 from typing import Any
 
 import pytest
+from langchain_core.messages import AIMessage
+from pydantic import BaseModel, ValidationError
 
 import infra.llm.anthropic_adapter as anthropic_module
 import infra.llm.azure_adapter as azure_module
 import infra.llm.openai_adapter as openai_module
+from core.metrics import LLM_INVOKE_DURATION, LLM_STRUCTURED_OUTCOMES
+from infra.llm.base import repair_json_payload
 from infra.llm.schema import CommentNormOutput
 
 
+class BadRequestError(Exception):
+    """Stands in for the provider SDKs' 400 `BadRequestError`."""
+
+    status_code = 400
+
+
 class FakeRunner:
-    def __init__(self, payload: dict[str, str]):
-        self._payload = payload
+    def __init__(self, model: "FakeModel", schema: type[BaseModel]):
+        self._model = model
+        self._schema = schema
 
-    def invoke(self, prompt: str) -> dict[str, str]:
+    def invoke(self, prompt: str) -> dict[str, Any]:
         assert isinstance(prompt, str)
-        return self._payload
+        if self._model.structured_error is not None:
+            raise self._model.structured_error
+        raw = AIMessage(content=self._model.structured_reply)
+        try:
+            parsed = self._schema.model_validate_json(self._model.structured_reply)
+        except ValidationError:
+            parsed = None
+        return {"raw": raw, "parsed": parsed, "parsing_error": None}
+
+    async def ainvoke(self, prompt: str) -> dict[str, Any]:
+        return self.invoke(prompt)
 
 
 class FakeModel:
+    structured_reply = '{"comment_text": "# from fake model"}'
+    structured_error: Exception | None = None
+
     def __init__(self, **kwargs: Any):
         self.kwargs = kwargs
+        self.plain_calls = 0
 
-    def with_structured_output(self, schema: type[CommentNormOutput]) -> FakeRunner:
+    def with_structured_output(
+        self, schema: type[CommentNormOutput], *, include_raw: bool = False
+    ) -> FakeRunner:
         assert schema is CommentNormOutput
-        return FakeRunner({"comment_text": "# from fake model"})
+        assert include_raw
+        return FakeRunner(self, schema)
+
+    def invoke(self, prompt: str) -> AIMessage:
+        self.plain_calls += 1
+        return AIMessage(content='{"comment_text": "# from plain call"}')
 
 
 def test_openai_adapter_invokes_structured(monkeypatch: pytest.MonkeyPatch) -> None:
     monkeypatch.setattr(openai_module, "ChatOpenAI", FakeModel)
+    calls_before = LLM_INVOKE_DURATION.count(provider="openai", schema="CommentNormOutput")
 
     adapter = openai_module.OpenAIAdapter(
         model="gpt-4o-mini",
@@ -39,6 +74,9 @@ def test_openai_adapter_invokes_structured(monkeypatch: pytest.MonkeyPatch) -> N
     result = adapter.invoke_structured("hi", CommentNormOutput)
 
     assert result.comment_text == "# from fake model"
+    assert (
+        LLM_INVOKE_DURATION.count(provider="openai", schema="CommentNormOutput") == calls_before + 1
+    )
 
 
 def test_anthropic_adapter_invokes_structured(monkeypatch: pytest.MonkeyPatch) -> None:
@@ -69,3 +107,143 @@ def test_azure_adapter_invokes_structured(monkeypatch: pytest.MonkeyPatch) -> No
     result = adapter.invoke_structured("hi", CommentNormOutput)
 
     assert result.comment_text == "# from fake model"
+
+
+@pytest.mark.parametrize(
+    ("module", "model_attr", "kwargs"),
+    [
+        (
+            openai_module,
+            "ChatOpenAI",
+            {"model": "m", "api_key": "k", "base_url": None, "temperature": 0.0},
+        ),
+        (anthropic_module, "ChatAnthropic", {"model": "m", "api_key": "k", "temperature": 0.0}),
+        (
+            azure_module,
+            "AzureChatOpenAI",
+            {
+                "deployment": "d",
+                "endpoint": "https://example.openai.azure.com",
+                "api_key": "k",
+                "api_version": "2024-02-15-preview",
+                "temperature": 0.0,
+            },
+        ),
+    ],
+    ids=["openai", "anthropic", "azure"],
+)
+def test_adapters_invoke_structured_async(
+    monkeypatch: pytest.MonkeyPatch,
+    module: Any,
+    model_attr: str,
+    kwargs: dict[str, Any],
+) -> None:
+    monkeypatch.setattr(module, model_attr, FakeModel)
+    adapter_cls = {
+        "ChatOpenAI": "OpenAIAdapter",
+        "ChatAnthropic": "AnthropicAdapter",
+        "AzureChatOpenAI": "AzureOpenAIAdapter",
+    }[model_attr]
+
+    adapter = getattr(module, adapter_cls)(timeout_seconds=5, **kwargs)
+    result = asyncio.run(adapter.ainvoke_structured("hi", CommentNormOutput))
+
+    assert result.comment_text == "# from fake model"
+
+
+def test_adapter_binds_structured_output_once_per_schema(monkeypatch: pytest.MonkeyPatch) -> None:
+    bound: list[type[CommentNormOutput]] = []
+
+    class CountingModel(FakeModel):
+        def with_structured_output(
+            self, schema: type[CommentNormOutput], *, include_raw: bool = False
+        ) -> FakeRunner:
+            bound.append(schema)
+            return super().with_structured_output(schema, include_raw=include_raw)
+
+    monkeypatch.setattr(openai_module, "ChatOpenAI", CountingModel)
+    adapter = openai_module.OpenAIAdapter(
+        model="m", api_key="k", base_url=None, temperature=0.0, timeout_seconds=5
+    )
+
+    adapter.invoke_structured("one", CommentNormOutput)
+    asyncio.run(adapter.ainvoke_structured("two", CommentNormOutput))
+
+    assert bound == [CommentNormOutput]
+
+
+def _openai_adapter(monkeypatch: pytest.MonkeyPatch, **model_attrs: Any) -> Any:
+    model_cls = type("Model", (FakeModel,), model_attrs)
+    monkeypatch.setattr(openai_module, "ChatOpenAI", model_cls)
+    return openai_module.OpenAIAdapter(
+        model="m", api_key="k", base_url=None, temperature=0.0, timeout_seconds=5
+    )
+
+
+def _outcome(outcome: str) -> float:
+    return LLM_STRUCTURED_OUTCOMES.value(
+        provider="openai", schema="CommentNormOutput", outcome=outcome
+    )
+
+
+@pytest.mark.parametrize(
+    ("reply", "model_attrs", "outcome", "comment"),
+    [
+        (None, {}, "parsed", "# from fake model"),
+        ('```json\n{"comment_text": "# fenced",}\n```', {}, "repaired", "# fenced"),
+        ("I cannot help with that.", {}, "reinvoked", "# from plain call"),
+        (
+            None,
+            {"structured_error": BadRequestError("response_format is not supported")},
+            "reinvoked",
+            "# from plain call",
+        ),
+    ],
+    ids=["parsed", "repaired", "unparseable", "unsupported"],
+)
+def test_adapter_calls_the_model_again_only_when_repair_fails(
+    monkeypatch: pytest.MonkeyPatch,
+    reply: str | None,
+    model_attrs: dict[str, Any],
+    outcome: str,
+    comment: str,
+) -> None:
+    if reply is not None:
+        model_attrs = {**model_attrs, "structured_reply": reply}
+    adapter = _openai_adapter(monkeypatch, **model_attrs)
+    before = _outcome(outcome)
+
+    result = adapter.invoke_structured("hi", CommentNormOutput)
+
+    assert result.comment_text == comment
+    assert adapter._model.plain_calls == (1 if outcome == "reinvoked" else 0)
+    assert _outcome(outcome) == before + 1
+
+
+def test_adapter_raises_errors_other_than_unsupported_structured_output(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    adapter = _openai_adapter(monkeypatch, structured_error=TimeoutError("read timed out"))
+    before = _outcome("error")
+
+    with pytest.raises(TimeoutError):
+        adapter.invoke_structured("hi", CommentNormOutput)
+    with pytest.raises(TimeoutError):
+        asyncio.run(adapter.ainvoke_structured("hi", CommentNormOutput))
+
+    assert adapter._model.plain_calls == 0
+    assert _outcome("error") == before + 2
+
+
+@pytest.mark.parametrize(
+    ("raw", "repaired"),
+    [
+        ('```json\n{"a": [1, 2,],}\n```', {"a": [1, 2]}),
+        ('Here you go: {"a": "x"} Hope it helps!', {"a": "x"}),
+        ('{"items": [{"t": "a,]"}, {"t": "b"}, {"t": "c', {"items": [{"t": "a,]"}, {"t": "b"}]}),
+        ('{"items": ["a", "b", "c', {"items": ["a", "b"]}),
+        ('{"note": "ok", "items": [', {"note": "ok", "items": []}),
+    ],
+)
+def test_repair_json_payload(raw: str, repaired: dict[str, Any]) -> None:
+    assert json.loads(repair_json_payload(raw)) == repaired
@@ -1,3 +1,4 @@
+import asyncio
 from typing import TypeVar
 
 from pydantic import BaseModel
@@ -15,6 +16,9 @@ class FakeAdapter:
         self.last_prompt = prompt
         return schema.model_validate({"comment_text": "# generated by llm"})
 
+    async def ainvoke_structured(self, prompt: str, schema: type[ModelT]) -> ModelT:
+        return self.invoke_structured(prompt, schema)
+
 
 def test_comment_norm_chain_renders_prompt() -> None:
     adapter = FakeAdapter()
@@ -28,3 +32,13 @@ def test_comment_norm_chain_renders_prompt() -> None:
     assert output.comment_text == "# generated by llm"
     assert "Append a useful comment" in adapter.last_prompt
     assert "demo.py" in adapter.last_prompt
+
+
+def test_comment_norm_chain_runs_async() -> None:
+    adapter = FakeAdapter()
+    chain = CommentNormChain(adapter)
+
+    output = asyncio.run(chain.arun(task_goal="Append a useful comment", target_file="demo.py"))
+
+    assert output.comment_text == "# generated by llm"
+    assert "demo.py" in adapter.last_prompt
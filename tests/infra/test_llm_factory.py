@@ -1,13 +1,27 @@
+import asyncio
+import gc
+import weakref
+from collections.abc import Iterator
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
+from threading import Thread
 from typing import Any, cast
 
+import httpx
 import pytest
 
 import infra.llm.anthropic_adapter as anthropic_module
 import infra.llm.azure_adapter as azure_module
+import infra.llm.factory as factory_module
 import infra.llm.openai_adapter as openai_module
+from core.context import ExecutionContext, context_scope
+from core.routing import TaskRouter
 from core.settings import Settings
-from infra.llm.factory import build_llm_adapter
+from infra.llm.factory import build_llm_adapter, get_llm_adapter
+from infra.llm.http_pool import LoopLocalTransport
+from tasks.handlers.base import TaskHandler
+from tasks.handlers.pipeline import PipelineHandler
+from tasks.registry import TaskSpec
 
 
 def _make_settings(
@@ -115,3 +129,121 @@ def test_factory_builds_azure_adapter(monkeypatch: pytest.MonkeyPatch, tmp_path:
     adapter = cast(dict[str, Any], build_llm_adapter(cfg))
 
     assert adapter["provider"] == "azure"
+
+
+def test_get_llm_adapter_reuses_adapters_per_model_and_timeout(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    monkeypatch.setattr(factory_module, "_adapters", {})
+    monkeypatch.setattr(factory_module, "_http_clients", {})
+    monkeypatch.setattr(openai_module, "OpenAIAdapter", lambda **kwargs: dict(kwargs))
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    cfg = _make_settings(monkeypatch, tmp_path, llm_provider="openai", llm_http_pool_size=3)
+
+    first = cast(dict[str, Any], get_llm_adapter(cfg))
+    again = cast(dict[str, Any], get_llm_adapter(cfg.model_copy()))
+    slower = cast(
+        dict[str, Any], get_llm_adapter(cfg.model_copy(update={"llm_timeout_seconds": 90}))
+    )
+    other_model = cast(dict[str, Any], get_llm_adapter(cfg.model_copy(update={"llm_model": "x"})))
+
+    assert again is first
+    assert slower is not first
+    assert other_model is not first
+    # Adapters with the same timeout share one keep-alive connection pool.
+    assert other_model["http_client"] is first["http_client"]
+    assert other_model["http_async_client"] is first["http_async_client"]
+    assert slower["http_client"] is not first["http_client"]
+    pool = first["http_client"]._transport._pool
+    assert (pool._max_connections, pool._max_keepalive_connections) == (3, 3)
+
+
+class _KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self) -> None:
+        self.send_response(200)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"ok")
+
+    def log_message(self, format: str, *args: Any) -> None:
+        del format, args
+
+
+@pytest.fixture
+def keep_alive_url() -> Iterator[str]:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _KeepAliveHandler)
+    Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/"
+    server.shutdown()
+    server.server_close()
+
+
+class _FetchHandler(TaskHandler):
+    def __init__(self, client: httpx.AsyncClient, url: str) -> None:
+        self.client = client
+        self.url = url
+
+    def validate_payload(self, payload: dict[str, Any], spec: TaskSpec) -> dict[str, Any]:
+        return payload
+
+    def execute(self, payload: dict[str, Any], spec: TaskSpec) -> dict[str, Any]:
+        raise AssertionError("sync execute should not run")
+
+    async def aexecute(self, payload: dict[str, Any], spec: TaskSpec) -> dict[str, Any]:
+        response = await self.client.get(self.url)
+        return {"body": response.text}
+
+
+def test_shared_async_client_survives_separate_event_loops(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path, keep_alive_url: str
+) -> None:
+    monkeypatch.setattr(factory_module, "_http_clients", {})
+    cfg = _make_settings(monkeypatch, tmp_path, llm_provider="openai")
+    client = factory_module._shared_http_clients(cfg)["http_async_client"]
+    spec = TaskSpec.model_validate(
+        {
+            "id": "report",
+            "handler": "tasks.handlers.pipeline.PipelineHandler",
+            "goal": "demo",
+            "inputs": {"type": "object", "properties": {}, "required": []},
+            "tools_allowed": [],
+            "constraints": {},
+            "outputs": {"type": "object", "properties": {}, "required": []},
+            "pipeline": {"steps": [{"id": "call", "task": "fetch"}]},
+        }
+    )
+
+    class _Registry:
+        def get(self, task_id: str) -> TaskSpec:
+            return spec.model_copy(update={"id": task_id, "pipeline": None})
+
+    context = ExecutionContext(
+        _Registry(),  # type: ignore[arg-type]
+        TaskRouter({"fetch": _FetchHandler(client, keep_alive_url)}),
+    )
+
+    # Each run gets its own loop, as with `asyncio.run` in the CLI or a test.
+    with context_scope(context):
+        for _ in range(2):
+            result = asyncio.run(PipelineHandler("report").aexecute({}, spec))
+            assert result["call"] == {"body": "ok"}
+
+
+def test_loop_local_transport_drops_pools_of_closed_loops(keep_alive_url: str) -> None:
+    transport = LoopLocalTransport(limits=httpx.Limits(max_connections=2))
+    client = httpx.AsyncClient(transport=transport)
+    loops: list[weakref.ref[asyncio.AbstractEventLoop]] = []
+
+    async def _get() -> str:
+        loops.append(weakref.ref(asyncio.get_running_loop()))
+        return (await client.get(keep_alive_url)).text
+
+    assert asyncio.run(_get()) == "ok"
+    assert asyncio.run(_get()) == "ok"
+    gc.collect()
+
+    # The second run's request dropped the first loop's pool, which let the loop go.
+    assert loops[0]() is None
+    assert list(transport._pools) == [loops[1]()]
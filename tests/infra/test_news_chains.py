@@ -47,6 +47,9 @@ class FakeAdapter:
             }
         )
 
+    async def ainvoke_structured(self, prompt: str, schema: type[ModelT]) -> ModelT:
+        return self.invoke_structured(prompt, schema)
+
 
 def test_news_extract_chain_renders_prompt() -> None:
     adapter = FakeAdapter()
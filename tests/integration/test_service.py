@@ -1,6 +1,19 @@
+import asyncio
+import gc
 from pathlib import Path
+from time import sleep
+from typing import Any
 
+import pytest
+
+from core.admission import TaskOverloadedError
+from core.jobs import JobStatus
+from core.routing import RouteNotFoundError
+from core.runs import RunNotFoundError, active_run
 from core.service import AgentService
+from core.settings import settings
+from tasks.handlers.base import TaskHandler
+from tasks.registry import HandlerBuildError, TaskSpec
 
 
 def test_service_run_task(tmp_path: Path) -> None:
@@ -15,6 +28,24 @@ def test_service_run_task(tmp_path: Path) -> None:
 
     assert result["status"] == "ok"
     assert result["task_id"] == "append_hello_agent_comment"
+    # Only tasks with `constraints.resumable` are checkpointed.
+    assert "run_id" not in result
+
+
+def test_service_arun_task(tmp_path: Path) -> None:
+    target = tmp_path / "integration_async.py"
+    target.write_text("value = 1\n", encoding="utf-8")
+
+    service = AgentService()
+    result = asyncio.run(
+        service.arun_task(
+            task_id="append_hello_agent_comment",
+            payload={"target_file": str(target)},
+        )
+    )
+
+    assert result["status"] == "ok"
+    assert "# hello from p4agent" in target.read_text(encoding="utf-8")
 
 
 def test_service_run_unknown_task_returns_structured_failure() -> None:
@@ -24,3 +55,376 @@ def test_service_run_unknown_task_returns_structured_failure() -> None:
 
     assert result["status"] == "failed"
     assert result["error"]["code"] == "TASK_NOT_FOUND"
+
+
+def test_service_warmup_and_shutdown_are_repeatable() -> None:
+    service = AgentService()
+
+    service.warmup()
+    service.shutdown()
+    service.shutdown()
+
+    assert "append_hello_agent_comment" in service.list_tasks()
+
+
+def test_service_runs_submitted_job(tmp_path: Path) -> None:
+    target = tmp_path / "job_demo.py"
+    target.write_text("value = 1\n", encoding="utf-8")
+    service = AgentService()
+
+    job = service.submit_job(
+        task_id="append_hello_agent_comment",
+        payload={"target_file": str(target)},
+    )
+    for _ in range(500):
+        job = service.get_job(job.id)
+        if job.finished:
+            break
+        sleep(0.01)
+    service.shutdown()
+
+    assert job.status == JobStatus.SUCCEEDED
+    assert job.result is not None
+    assert job.result["changed_file"] == str(target)
+
+
+def test_service_run_many_keeps_order_and_isolates_failures(tmp_path: Path) -> None:
+    targets = [tmp_path / f"batch_{index}.py" for index in range(3)]
+    for target in targets:
+        target.write_text("value = 1\n", encoding="utf-8")
+    service = AgentService()
+
+    batch = service.run_many(
+        [
+            ("append_hello_agent_comment", {"target_file": str(targets[0])}),
+            ("unknown", {}),
+            ("append_hello_agent_comment", {"target_file": str(targets[1])}),
+            ("append_hello_agent_comment", {}),
+            ("append_hello_agent_comment", {"target_file": str(targets[2])}),
+        ],
+        max_concurrency=3,
+    )
+
+    statuses = [result["status"] for result in batch["results"]]
+    assert statuses == ["ok", "failed", "ok", "failed", "ok"]
+    assert batch["results"][2]["changed_file"] == str(targets[1])
+    assert batch["results"][3]["error"]["code"] == "INVALID_PAYLOAD"
+    assert (batch["total"], batch["succeeded"], batch["failed"]) == (5, 3, 2)
+    assert batch["duration_ms"] >= 0
+
+
+def test_service_stream_task_ends_with_response() -> None:
+    service = AgentService()
+
+    events = list(service.stream_task(task_id="unknown", payload={}))
+
+    assert events[0] == {"event": "start", "task_id": "unknown", "elapsed_ms": 0}
+    assert events[-1]["event"] == "result"
+    assert events[-1]["response"]["error"]["code"] == "TASK_NOT_FOUND"
+
+
+def test_service_replays_result_for_repeated_idempotency_key(tmp_path: Path) -> None:
+    target = tmp_path / "idempotent_demo.py"
+    target.write_text("value = 1\n", encoding="utf-8")
+    service = AgentService()
+    payload = {"target_file": str(target)}
+
+    first = service.run_task("append_hello_agent_comment", payload, idempotency_key="abc")
+    second = service.run_task("append_hello_agent_comment", payload, idempotency_key="abc")
+    service.run_task("append_hello_agent_comment", payload)
+    other = tmp_path / "other_demo.py"
+    other.write_text("value = 2\n", encoding="utf-8")
+    reused = service.run_task(
+        "append_hello_agent_comment", {"target_file": str(other)}, idempotency_key="abc"
+    )
+
+    assert first == second
+    assert target.read_text(encoding="utf-8").count("\n# ") == 2
+    # The same key with a different payload is a different request.
+    assert reused["changed_file"] == str(other)
+    assert other.read_text(encoding="utf-8").count("\n# ") == 1
+
+
+def test_service_rejects_runs_beyond_task_capacity(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, "admission_max_wait_seconds", 0.0)
+    service = AgentService()
+    task_id = "fetch_google_news_homepage"
+    capacity = service._tasks.registry.get(task_id).constraints.max_concurrency
+    assert capacity is not None
+
+    streams = [service.stream_task(task_id, {}) for _ in range(capacity)]
+    with pytest.raises(TaskOverloadedError):
+        service.stream_task(task_id, {})
+    batch = service.run_many([(task_id, {})])
+
+    assert batch["results"][0]["error"]["code"] == "TASK_OVERLOADED"
+    assert batch["results"][0]["error"]["retry_after"] >= 1
+    del streams
+    gc.collect()
+    assert service._admission.snapshot(task_id) == {"running": 0, "waiting": 0}
+
+
+class _FlakyStep(TaskHandler):
+    def __init__(self, result: dict[str, Any], failures: int = 0) -> None:
+        self.result = result
+        self.failures = failures
+        self.calls = 0
+
+    def validate_payload(self, payload: dict[str, Any], spec: TaskSpec) -> dict[str, Any]:
+        return payload
+
+    def execute(self, payload: dict[str, Any], spec: TaskSpec) -> dict[str, Any]:
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise RuntimeError("429 rate limit")
+        return self.result
+
+    async def aexecute(self, payload: dict[str, Any], spec: TaskSpec) -> dict[str, Any]:
+        return self.execute(payload, spec)
+
+
+def test_service_resumes_pipeline_from_failed_step(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(settings, "run_store_path", tmp_path / "runs.sqlite3")
+    service = AgentService()
+    fetch = _FlakyStep(
+        {
+            "fetched_at": "2026-02-18T00:00:00+00:00",
+            "source_url": "u",
+            "raw_cards": [{"title": "A"}],
+            "raw_html_path": "raw.html",
+        }
+    )
+    extract = _FlakyStep({"items_en": [{"rank": 1}], "selection_notes": "ok"})
+    translate = _FlakyStep(
+        {
+            "output_path": "out.md",
+            "report_date": "2026-02-18",
+            "item_count": 1,
+            "markdown_preview": "# p",
+        },
+        failures=1,
+    )
+    routes = service._tasks.registry._handlers
+    monkeypatch.setitem(routes, "fetch_google_news_homepage", fetch)
+    monkeypatch.setitem(routes, "extract_top10_en_news", extract)
+    monkeypatch.setitem(routes, "translate_news_and_render_markdown", translate)
+
+    failed = service.run_task("daily_google_news_report_pipeline", {})
+    resumed = service.resume(failed["run_id"])
+
+    assert failed["status"] == "failed"
+    assert resumed["status"] == "ok"
+    assert resumed["run_id"] == failed["run_id"]
+    assert [step["status"] for step in resumed["steps"]] == ["resumed", "resumed", "ok"]
+    assert (fetch.calls, extract.calls, translate.calls) == (1, 1, 2)
+    assert [span["name"] for span in resumed["subtasks"]] == ["translate_news_and_render_markdown"]
+    assert service.resume(failed["run_id"]) == resumed
+    assert service.get_run(failed["run_id"])["status"] == "succeeded"
+    with pytest.raises(RunNotFoundError):
+        service.resume("missing")
+    service.shutdown()
+
+
+class _HangingStep(_FlakyStep):
+    """Blocks forever on its first async call, like a request the client gave up on."""
+
+    def __init__(self, result: dict[str, Any]) -> None:
+        super().__init__(result)
+        self.started = asyncio.Event()
+        self.run_id: str | None = None
+
+    async def aexecute(self, payload: dict[str, Any], spec: TaskSpec) -> dict[str, Any]:
+        self.calls += 1
+        if self.calls == 1:
+            run = active_run()
+            self.run_id = run.run_id if run is not None else None
+            self.started.set()
+            await asyncio.Event().wait()
+        return self.result
+
+
+def test_service_resumes_run_cancelled_mid_execute(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(settings, "run_store_path", tmp_path / "runs.sqlite3")
+    service = AgentService()
+    fetch = _FlakyStep(
+        {
+            "fetched_at": "2026-02-18T00:00:00+00:00",
+            "source_url": "u",
+            "raw_cards": [{"title": "A"}],
+            "raw_html_path": "raw.html",
+        }
+    )
+    extract = _FlakyStep({"items_en": [{"rank": 1}], "selection_notes": "ok"})
+    translate = _HangingStep(
+        {
+            "output_path": "out.md",
+            "report_date": "2026-02-18",
+            "item_count": 1,
+            "markdown_preview": "# p",
+        }
+    )
+    routes = service._tasks.registry._handlers
+    monkeypatch.setitem(routes, "fetch_google_news_homepage", fetch)
+    monkeypatch.setitem(routes, "extract_top10_en_news", extract)
+    monkeypatch.setitem(routes, "translate_news_and_render_markdown", translate)
+
+    async def _cancel_mid_execute() -> None:
+        running = asyncio.create_task(service.arun_task("daily_google_news_report_pipeline", {}))
+        await translate.started.wait()
+        running.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await running
+
+    asyncio.run(_cancel_mid_execute())
+    assert translate.run_id is not None
+    assert service.get_run(translate.run_id)["status"] == "interrupted"
+
+    resumed = service.resume(translate.run_id)
+
+    assert resumed["status"] == "ok"
+    assert [step["status"] for step in resumed["steps"]] == ["resumed", "resumed", "ok"]
+    assert (fetch.calls, extract.calls, translate.calls) == (1, 1, 2)
+    assert service.get_run(translate.run_id)["status"] == "succeeded"
+    service.shutdown()
+
+
+def _copy_task_configs(target: Path) -> Path:
+    target.mkdir()
+    for source in Path("configs/tasks").glob("*.yaml"):
+        (target / source.name).write_text(source.read_text(encoding="utf-8"), encoding="utf-8")
+    return target
+
+
+def test_service_reload_swaps_only_changed_tasks(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    task_dir = _copy_task_configs(tmp_path / "tasks")
+    monkeypatch.setattr(settings, "task_config_dir", task_dir)
+    monkeypatch.setattr(settings, "cache_dir", tmp_path / "cache")
+    service = AgentService()
+    service.preload()
+    old_tasks = service._tasks
+    fetch = old_tasks.router.route("fetch_google_news_homepage")
+    append = old_tasks.router.route("append_hello_agent_comment")
+
+    config = task_dir / "append_hello_agent_comment.yaml"
+    config.write_text(
+        config.read_text(encoding="utf-8").replace("goal:", "goal: Reloaded.", 1),
+        encoding="utf-8",
+    )
+    changes = service.reload_tasks()
+
+    assert changes == {"added": [], "removed": [], "changed": ["append_hello_agent_comment"]}
+    assert service._tasks is not old_tasks
+    assert service._tasks.router.route("fetch_google_news_homepage") is fetch
+    assert service._tasks.router.route("append_hello_agent_comment") is append
+    assert service._tasks.registry.get("append_hello_agent_comment").goal.startswith("Reloaded.")
+    # A run that already picked up the old set keeps its spec.
+    assert not old_tasks.registry.get("append_hello_agent_comment").goal.startswith("Reloaded.")
+
+
+def test_service_reload_keeps_old_tasks_when_configs_are_invalid(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    task_dir = _copy_task_configs(tmp_path / "tasks")
+    monkeypatch.setattr(settings, "task_config_dir", task_dir)
+    monkeypatch.setattr(settings, "cache_dir", tmp_path / "cache")
+    service = AgentService()
+    old_tasks = service._tasks
+
+    source = (task_dir / "append_hello_agent_comment.yaml").read_text(encoding="utf-8")
+    (task_dir / "broken.yaml").write_text(
+        source.replace("id: append_hello_agent_comment", "id: broken").replace(
+            "tasks.handlers.", "tasks.handlers.missing.", 1
+        ),
+        encoding="utf-8",
+    )
+    with pytest.raises(RouteNotFoundError, match="Could not build handler"):
+        service.reload_tasks()
+
+    assert service._tasks is old_tasks
+    assert "broken" not in service.list_tasks()
+
+
+class _RecordingHandler(_FlakyStep):
+    def __init__(self) -> None:
+        super().__init__({})
+        self.shutdowns = 0
+
+    def shutdown(self) -> None:
+        self.shutdowns += 1
+
+
+def test_service_reload_retires_handlers_after_in_flight_runs(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    task_dir = _copy_task_configs(tmp_path / "tasks")
+    monkeypatch.setattr(settings, "task_config_dir", task_dir)
+    monkeypatch.setattr(settings, "cache_dir", tmp_path / "cache")
+    service = AgentService()
+    handler = _RecordingHandler()
+    monkeypatch.setitem(service._tasks.registry._handlers, "append_hello_agent_comment", handler)
+    service._single_flight.run("append_hello_agent_comment:payload:x", lambda: {"status": "ok"})
+    service._single_flight.run("fetch_google_news_homepage:payload:x", lambda: {"status": "ok"})
+
+    with service._using_tasks():
+        (task_dir / "append_hello_agent_comment.yaml").unlink()
+        changes = service.reload_tasks()
+        assert handler.shutdowns == 0
+    assert changes["removed"] == ["append_hello_agent_comment"]
+    assert handler.shutdowns == 1
+    assert list(service._single_flight._results) == ["fetch_google_news_homepage:payload:x"]
+    service.shutdown()
+    assert handler.shutdowns == 1
+
+
+def test_service_reload_shuts_down_handlers_built_on_the_old_set_after_the_swap(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    task_dir = _copy_task_configs(tmp_path / "tasks")
+    monkeypatch.setattr(settings, "task_config_dir", task_dir)
+    monkeypatch.setattr(settings, "cache_dir", tmp_path / "cache")
+    service = AgentService()
+    late = _RecordingHandler()
+
+    with service._using_tasks() as old_tasks:
+        (task_dir / "append_hello_agent_comment.yaml").unlink()
+        service.reload_tasks()
+        # A run still on the old set builds a handler after the reload.
+        monkeypatch.setitem(old_tasks.registry._handlers, "fetch_google_news_homepage", late)
+        assert late.shutdowns == 0
+    assert late.shutdowns == 1
+    service.shutdown()
+    assert late.shutdowns == 1
+
+
+def test_service_reload_rejects_unresolvable_carried_over_handlers(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    task_dir = _copy_task_configs(tmp_path / "tasks")
+    source = (task_dir / "append_hello_agent_comment.yaml").read_text(encoding="utf-8")
+    (task_dir / "broken.yaml").write_text(
+        source.replace("id: append_hello_agent_comment", "id: broken").replace(
+            "tasks.handlers.", "tasks.handlers.missing.", 1
+        ),
+        encoding="utf-8",
+    )
+    monkeypatch.setattr(settings, "task_config_dir", task_dir)
+    monkeypatch.setattr(settings, "cache_dir", tmp_path / "cache")
+    # Handlers are built lazily, so the broken path goes unnoticed at startup.
+    service = AgentService()
+    old_tasks = service._tasks
+
+    config = task_dir / "append_hello_agent_comment.yaml"
+    config.write_text(source.replace("goal:", "goal: Reloaded.", 1), encoding="utf-8")
+    with pytest.raises(HandlerBuildError, match="Could not resolve handler"):
+        service.reload_tasks()
+
+    assert service._tasks is old_tasks
+    service.shutdown()
@@ -1,3 +1,4 @@
+import asyncio
 from pathlib import Path
 from typing import Any, cast
 
@@ -36,10 +37,13 @@ class FakeExtractChain:
             selection_notes="deduped",
         )
 
+    async def arun(self, *, raw_cards: list[dict[str, str]], top_k: int) -> NewsExtractOutput:
+        return self.run(raw_cards=raw_cards, top_k=top_k)
+
 
 def test_extract_handler_runs_chain_and_dedupes(monkeypatch: pytest.MonkeyPatch) -> None:
     monkeypatch.setattr(settings, "llm_enabled", True)
-    monkeypatch.setattr(handler_module, "build_llm_adapter", lambda _: object())
+    monkeypatch.setattr(handler_module, "get_llm_adapter", lambda _: object())
     monkeypatch.setattr(handler_module, "NewsExtractChain", FakeExtractChain)
 
     handler = ExtractTop10EnNewsHandler()
@@ -50,9 +54,11 @@ def test_extract_handler_runs_chain_and_dedupes(monkeypatch: pytest.MonkeyPatch)
     )
 
     result = handler.execute(payload, spec)
+    async_result = asyncio.run(handler.aexecute(payload, spec))
 
     assert len(cast(list[dict[str, Any]], result["items_en"])) == 1
     assert result["selection_notes"] == "deduped"
+    assert async_result == result
 
 
 def test_extract_handler_requires_llm(monkeypatch: pytest.MonkeyPatch) -> None:
@@ -0,0 +1,274 @@
+import asyncio
+import time
+from pathlib import Path
+from typing import Any
+
+import pytest
+import yaml  # type: ignore[import-untyped]
+
+from core.context import ExecutionContext, context_scope
+from core.routing import TaskRouter
+from core.runs import RunStore, run_scope
+from tasks.handlers.base import TaskHandler
+from tasks.handlers.pipeline import PipelineHandler
+from tasks.registry import TaskRegistry, TaskSpec
+
+_STEP_SECONDS = 0.2
+
+
+class SleepyHandler(TaskHandler):
+    """Echoes its payload after a pause, so overlapping steps are measurable."""
+
+    def __init__(self, task_id: str):
+        self.task_id = task_id
+        self.payloads: list[dict[str, Any]] = []
+
+    def validate_payload(self, payload: dict[str, Any], spec: TaskSpec) -> dict[str, Any]:
+        del spec
+        return payload
+
+    def execute(self, payload: dict[str, Any], spec: TaskSpec) -> dict[str, Any]:
+        del spec
+        self.payloads.append(payload)
+        time.sleep(_STEP_SECONDS)
+        return {"echo": payload, "source": self.task_id}
+
+
+class StubHandler(SleepyHandler):
+    def __init__(self, task_id: str, result: dict[str, Any]):
+        super().__init__(task_id)
+        self.result = result
+
+    def execute(self, payload: dict[str, Any], spec: TaskSpec) -> dict[str, Any]:
+        self.payloads.append(payload)
+        return self.result
+
+
+class FailingHandler(SleepyHandler):
+    def execute(self, payload: dict[str, Any], spec: TaskSpec) -> dict[str, Any]:
+        raise RuntimeError("boom")
+
+
+class FakeRegistry:
+    def __init__(self, specs: dict[str, TaskSpec] | None = None):
+        self._specs = specs or {}
+
+    def get(self, task_id: str) -> TaskSpec:
+        return self._specs.get(task_id) or _spec(task_id)
+
+
+def _spec(task_id: str, pipeline: dict[str, Any] | None = None) -> TaskSpec:
+    return TaskSpec.model_validate(
+        {
+            "id": task_id,
+            "handler": "tasks.handlers.pipeline.PipelineHandler",
+            "goal": "demo",
+            "inputs": {"type": "object", "properties": {}, "required": []},
+            "tools_allowed": [],
+            "constraints": {},
+            "outputs": {"type": "object", "properties": {}, "required": []},
+            "pipeline": pipeline,
+        }
+    )
+
+
+_FAN_IN = {
+    "steps": [
+        {"id": "left", "task": "source_a", "inputs": {"topic": "$input.topic"}},
+        {
+            "id": "right",
+            "task": "source_b",
+            "inputs": {"topic": "$input.topic", "lang": "$input.lang"},
+        },
+        {
+            "id": "merge",
+            "task": "merge",
+            "inputs": {"items": ["$steps.left.source", "$steps.right.source"], "limit": 3},
+        },
+    ],
+    "output": {"merged": "$steps.merge.echo.items", "topic": "$input.topic"},
+}
+
+
+def _context(
+    handlers: dict[str, TaskHandler],
+    registry: TaskRegistry | FakeRegistry | None = None,
+) -> ExecutionContext:
+    return ExecutionContext(
+        registry or FakeRegistry(),  # type: ignore[arg-type]
+        TaskRouter(handlers),
+    )
+
+
+def test_pipeline_runs_independent_steps_concurrently() -> None:
+    handlers: dict[str, TaskHandler] = {
+        name: SleepyHandler(name) for name in ("source_a", "source_b", "merge")
+    }
+    started = time.perf_counter()
+    with context_scope(_context(handlers)):
+        result = PipelineHandler("report").execute({"topic": "ai"}, _spec("report", _FAN_IN))
+    elapsed = time.perf_counter() - started
+
+    # Two levels of the DAG, not three sequential steps.
+    assert elapsed < _STEP_SECONDS * 2.75
+    assert result["merged"] == ["source_a", "source_b"]
+    assert result["topic"] == "ai"
+    assert [step["name"] for step in result["steps"]] == ["left", "right", "merge"]
+    assert all(step["status"] == "ok" for step in result["steps"])
+    assert result["steps"][2]["started_ms"] >= result["steps"][0]["duration_ms"]
+    # Unset references are dropped rather than passed as None.
+    assert handlers["source_b"].payloads == [{"topic": "ai"}]  # type: ignore[attr-defined]
+
+
+def test_pipeline_without_output_mapping_returns_step_results() -> None:
+    handlers: dict[str, TaskHandler] = {"source_a": SleepyHandler("source_a")}
+    pipeline = {"steps": [{"id": "only", "task": "source_a", "inputs": {"n": 1}}]}
+
+    with context_scope(_context(handlers)):
+        result = asyncio.run(PipelineHandler("report").aexecute({}, _spec("report", pipeline)))
+
+    assert result["only"] == {"echo": {"n": 1}, "source": "source_a"}
+    assert result["steps"][0]["task_id"] == "source_a"
+
+
+def test_pipeline_failure_names_the_step() -> None:
+    handlers: dict[str, TaskHandler] = {
+        "source_a": SleepyHandler("source_a"),
+        "source_b": FailingHandler("source_b"),
+        "merge": SleepyHandler("merge"),
+    }
+
+    context = _context(handlers)
+    with context_scope(context), pytest.raises(RuntimeError, match="Step 'right' failed: boom"):
+        PipelineHandler("report").execute({"topic": "ai"}, _spec("report", _FAN_IN))
+    assert handlers["merge"].payloads == []  # type: ignore[attr-defined]
+    failed = next(span for span in context.spans if span["name"] == "right")
+    assert failed["error"] == {"code": "EXECUTION_ERROR", "message": "boom"}
+
+
+class LoopRecordingHandler(SleepyHandler):
+    def __init__(self, task_id: str):
+        super().__init__(task_id)
+        self.loops: list[asyncio.AbstractEventLoop] = []
+
+    async def aexecute(self, payload: dict[str, Any], spec: TaskSpec) -> dict[str, Any]:
+        self.loops.append(asyncio.get_running_loop())
+        return {"source": self.task_id}
+
+
+def test_sync_pipeline_runs_share_a_live_event_loop() -> None:
+    handler = LoopRecordingHandler("source_a")
+    pipeline = {"steps": [{"id": "only", "task": "source_a"}]}
+
+    with context_scope(_context({"source_a": handler})):
+        for _ in range(2):
+            result = PipelineHandler("report").execute({}, _spec("report", pipeline))
+            assert result["only"] == {"source": "source_a"}
+
+    # Loop-bound resources (e.g. pooled async HTTP clients) outlive a single run.
+    assert handler.loops[0] is handler.loops[1]
+    assert not handler.loops[0].is_closed()
+
+
+def test_nested_pipeline_steps_checkpoint_under_their_parent_step(tmp_path: Path) -> None:
+    inner = {"steps": [{"id": "fetch", "task": "source_a"}]}
+    outer = {
+        "steps": [
+            {"id": "fetch", "task": "source_a"},
+            {"id": "nested", "task": "inner", "needs": ["fetch"]},
+        ]
+    }
+    source = StubHandler("source_a", {"n": 1})
+    handlers: dict[str, TaskHandler] = {"source_a": source, "inner": PipelineHandler("inner")}
+    registry = FakeRegistry({"inner": _spec("inner", inner)})
+    store = RunStore(tmp_path / "runs.sqlite3", retention=10)
+    run = store.start("outer", {})
+
+    with context_scope(_context(handlers, registry)), run_scope(run):
+        PipelineHandler("outer").execute({}, _spec("outer", outer))
+    with context_scope(_context(handlers, registry)), run_scope(run):
+        resumed = PipelineHandler("outer").execute({}, _spec("outer", outer))
+
+    assert run.step_result("fetch") == {"n": 1}
+    assert run.step_result("nested/fetch") == {"n": 1}
+    assert len(source.payloads) == 2
+    assert [step["status"] for step in resumed["steps"]] == ["resumed", "resumed"]
+    store.close()
+
+
+def test_pipeline_requires_an_execution_context() -> None:
+    pipeline = {"steps": [{"id": "only", "task": "source_a"}]}
+
+    with pytest.raises(RuntimeError, match="Step 'only' failed: Sub-tasks can only"):
+        PipelineHandler("report").execute({}, _spec("report", pipeline))
+
+
+def test_daily_report_pipeline_maps_step_outputs(tmp_path: Path) -> None:
+    registry = TaskRegistry(Path("configs/tasks"))
+    results: dict[str, dict[str, Any]] = {
+        "fetch_google_news_homepage": {
+            "fetched_at": "2026-02-18T00:00:00+00:00",
+            "source_url": "https://news.ycombinator.com/",
+            "raw_cards": [{"title": "A", "url": "u", "snippet": "s", "source": "x"}],
+            "raw_html_path": "artifacts/raw.html",
+        },
+        "extract_top10_en_news": {"items_en": [{"rank": 1, "title_en": "A"}]},
+        "translate_news_and_render_markdown": {
+            "output_path": str(tmp_path / "daily.md"),
+            "item_count": 1,
+            "markdown_preview": "# preview",
+            "report_date": "2026-02-18",
+        },
+    }
+    handlers: dict[str, TaskHandler] = {
+        task_id: StubHandler(task_id, result) for task_id, result in results.items()
+    }
+    spec = registry.get("daily_google_news_report_pipeline")
+    handler = registry.get_handler(spec.id)
+
+    with context_scope(_context(handlers, registry)):
+        result = handler.execute(handler.validate_payload({"max_items": 3}, spec), spec)
+
+    assert result["report_markdown_path"] == str(tmp_path / "daily.md")
+    assert result["source_url"] == "https://news.ycombinator.com/"
+    assert result["selection_notes"] is None
+    assert [step["name"] for step in result["steps"]] == list(results)
+    assert handlers["extract_top10_en_news"].payloads == [  # type: ignore[attr-defined]
+        {"raw_cards": results["fetch_google_news_homepage"]["raw_cards"], "top_k": 3}
+    ]
+
+
+@pytest.mark.parametrize(
+    ("steps", "message"),
+    [
+        ([{"id": "a", "task": "x"}, {"id": "a", "task": "x"}], "Duplicate"),
+        ([{"id": "a", "task": "x", "needs": ["missing"]}], "unknown steps"),
+        (
+            [
+                {"id": "a", "task": "x", "inputs": {"v": "$steps.b.v"}},
+                {"id": "b", "task": "x", "needs": ["a"]},
+            ],
+            "cycle",
+        ),
+    ],
+)
+def test_pipeline_spec_rejects_bad_graphs(steps: list[dict[str, Any]], message: str) -> None:
+    with pytest.raises(ValueError, match=message):
+        _spec("report", {"steps": steps})
+
+
+def test_registry_rejects_pipeline_step_with_unknown_task(tmp_path: Path) -> None:
+    raw = _spec("report", {"steps": [{"id": "a", "task": "nope"}]}).model_dump()
+    (tmp_path / "report.yaml").write_text(yaml.safe_dump(raw), encoding="utf-8")
+
+    with pytest.raises(ValueError, match="unknown or recursive task 'nope'"):
+        TaskRegistry(tmp_path)
+
+
+def test_registry_rejects_pipelines_that_run_each_other(tmp_path: Path) -> None:
+    for task_id, callee in (("first", "second"), ("second", "first")):
+        raw = _spec(task_id, {"steps": [{"id": "a", "task": callee}]}).model_dump()
+        (tmp_path / f"{task_id}.yaml").write_text(yaml.safe_dump(raw), encoding="utf-8")
+
+    with pytest.raises(ValueError, match="recursively: first -> second -> first"):
+        TaskRegistry(tmp_path)
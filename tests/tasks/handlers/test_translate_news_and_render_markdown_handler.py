@@ -1,3 +1,4 @@
+import asyncio
 from pathlib import Path
 from typing import Any
 
@@ -33,6 +34,11 @@ class FakeTranslateChain:
         )
 
 
+class AsyncTranslateChain(FakeTranslateChain):
+    async def arun(self, *, items_en: list[dict[str, str]], date: str) -> NewsTranslateOutput:
+        return self.run(items_en=items_en, date=date)
+
+
 class RetryOnceTranslateChain:
     def __init__(self, adapter: Any):
         del adapter
@@ -65,7 +71,7 @@ def test_translate_handler_renders_markdown(
     monkeypatch: pytest.MonkeyPatch,
 ) -> None:
     monkeypatch.setattr(settings, "llm_enabled", True)
-    monkeypatch.setattr(handler_module, "build_llm_adapter", lambda _: object())
+    monkeypatch.setattr(handler_module, "get_llm_adapter", lambda _: object())
     monkeypatch.setattr(handler_module, "NewsTranslateChain", FakeTranslateChain)
 
     handler = TranslateNewsAndRenderMarkdownHandler()
@@ -101,7 +107,7 @@ def test_translate_handler_retries_timeout(
     monkeypatch: pytest.MonkeyPatch,
 ) -> None:
     monkeypatch.setattr(settings, "llm_enabled", True)
-    monkeypatch.setattr(handler_module, "build_llm_adapter", lambda _: object())
+    monkeypatch.setattr(handler_module, "get_llm_adapter", lambda _: object())
     monkeypatch.setattr(handler_module, "NewsTranslateChain", RetryOnceTranslateChain)
     monkeypatch.setattr(handler_module, "sleep", lambda _: None)
 
@@ -155,3 +161,29 @@ def test_translate_handler_requires_llm(monkeypatch: pytest.MonkeyPatch) -> None
 
     with pytest.raises(RuntimeError, match="LLM is required"):
         handler.execute(payload, spec)
+
+
+def test_translate_handler_renders_markdown_async(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(settings, "llm_enabled", True)
+    monkeypatch.setattr(handler_module, "get_llm_adapter", lambda _: object())
+    monkeypatch.setattr(handler_module, "NewsTranslateChain", AsyncTranslateChain)
+
+    handler = TranslateNewsAndRenderMarkdownHandler()
+    spec = TaskRegistry(Path("configs/tasks")).get("translate_news_and_render_markdown")
+    output_path = tmp_path / "async_news.md"
+    payload = handler.validate_payload(
+        {
+            "items_en": [{"rank": 1, "title_en": "Title EN", "url": "https://example.com/1"}],
+            "date": "2026-02-20",
+            "output_path": str(output_path),
+        },
+        spec,
+    )
+
+    result = asyncio.run(handler.aexecute(payload, spec))
+
+    assert result["item_count"] == 1
+    assert "Title ZH" in output_path.read_text(encoding="utf-8")
@@ -0,0 +1,126 @@
+import json
+import shutil
+from pathlib import Path
+from typing import Any
+
+import pytest
+from pydantic import ValidationError
+
+from tasks import manifest as manifest_module
+from tasks.manifest import load_task_manifest, load_task_specs
+from tasks.registry import TaskRegistry
+
+
+@pytest.fixture
+def task_dir(tmp_path: Path) -> Path:
+    target = tmp_path / "tasks"
+    shutil.copytree(Path("configs/tasks"), target)
+    return target
+
+
+def test_manifest_matches_registry(task_dir: Path) -> None:
+    manifest = load_task_manifest(task_dir)
+    registry = TaskRegistry(task_dir)
+
+    assert manifest.ids() == registry.list_ids()
+    entry = manifest.get("append_hello_agent_comment")
+    assert entry.handler == registry.get("append_hello_agent_comment").handler
+    assert entry.inputs["required"] == ["target_file"]
+    with pytest.raises(KeyError, match="Unknown task_id"):
+        manifest.get("missing")
+
+
+def test_manifest_and_specs_share_one_disk_cache(
+    task_dir: Path,
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    cache_dir = tmp_path / "cache"
+    load_task_manifest(task_dir, cache_dir=cache_dir)
+    (cache_file,) = cache_dir.glob("*.json")
+    assert json.loads(cache_file.read_text(encoding="utf-8"))["version"] == 2
+
+    parsed: list[str] = []
+    original = manifest_module._parse_spec
+
+    def _counting_parse(path: Path) -> dict[str, Any]:
+        parsed.append(path.name)
+        return original(path)
+
+    monkeypatch.setattr(manifest_module, "_parse_spec", _counting_parse)
+    monkeypatch.setattr(manifest_module, "_memory_cache", {})
+
+    assert "append_hello_agent_comment" in load_task_specs(task_dir, cache_dir=cache_dir)
+    assert parsed == []
+
+    extra = task_dir / "zz_extra.yaml"
+    source = (task_dir / "append_hello_agent_comment.yaml").read_text(encoding="utf-8")
+    extra.write_text(
+        source.replace("id: append_hello_agent_comment", "id: zz_extra"),
+        encoding="utf-8",
+    )
+
+    assert "zz_extra" in load_task_manifest(task_dir, cache_dir=cache_dir).ids()
+    assert "zz_extra" in load_task_specs(task_dir, cache_dir=cache_dir)
+    assert parsed == ["zz_extra.yaml"]
+    assert list(cache_dir.glob("*.json")) == [cache_file]
+
+
+@pytest.mark.parametrize("content", ["[1, 2]", '{"version": 2, "files": []}', "not json"])
+def test_malformed_disk_cache_is_a_miss(
+    task_dir: Path, tmp_path: Path, monkeypatch: pytest.MonkeyPatch, content: str
+) -> None:
+    cache_dir = tmp_path / "cache"
+    load_task_manifest(task_dir, cache_dir=cache_dir)
+    (cache_file,) = cache_dir.glob("*.json")
+    cache_file.write_text(content, encoding="utf-8")
+    monkeypatch.setattr(manifest_module, "_memory_cache", {})
+
+    assert "append_hello_agent_comment" in load_task_manifest(task_dir, cache_dir=cache_dir).ids()
+    assert json.loads(cache_file.read_text(encoding="utf-8"))["version"] == 2
+
+
+def test_manifest_rejects_config_without_handler(tmp_path: Path) -> None:
+    (tmp_path / "broken.yaml").write_text("id: broken\n", encoding="utf-8")
+
+    with pytest.raises(ValueError, match="'id' and 'handler'"):
+        load_task_manifest(tmp_path)
+
+
+def test_task_specs_reparse_only_changed_files(
+    task_dir: Path,
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    cache_dir = tmp_path / "cache"
+    first = load_task_specs(task_dir, cache_dir=cache_dir)
+
+    parsed: list[str] = []
+    original = manifest_module._parse_spec
+
+    def _counting_parse(path: Path) -> dict[str, Any]:
+        parsed.append(path.name)
+        return original(path)
+
+    monkeypatch.setattr(manifest_module, "_parse_spec", _counting_parse)
+    monkeypatch.setattr(manifest_module, "_memory_cache", {})
+
+    assert load_task_specs(task_dir, cache_dir=cache_dir) == first
+    assert parsed == []
+
+    target = task_dir / "append_hello_agent_comment.yaml"
+    target.write_text(
+        target.read_text(encoding="utf-8").replace("max_attempts: 1", "max_attempts: 3"),
+        encoding="utf-8",
+    )
+    reloaded = load_task_specs(task_dir, cache_dir=cache_dir)
+
+    assert parsed == ["append_hello_agent_comment.yaml"]
+    assert reloaded["append_hello_agent_comment"]["constraints"]["max_attempts"] == 3
+
+
+def test_task_specs_validate_changed_files(tmp_path: Path) -> None:
+    (tmp_path / "broken.yaml").write_text("id: broken\nhandler: x.Y\n", encoding="utf-8")
+
+    with pytest.raises(ValidationError):
+        load_task_specs(tmp_path, cache_dir=tmp_path / "cache")
@@ -4,7 +4,7 @@ import pytest
 from pydantic import ValidationError
 
 from tasks.registry import TaskRegistry
-from tasks.validation import validate_task_payload
+from tasks.validation import validate_task_output, validate_task_payload
 
 
 def test_validation_accepts_valid_payload() -> None:
@@ -27,3 +27,23 @@ def test_validation_rejects_extra_fields() -> None:
 
     with pytest.raises(ValidationError):
         validate_task_payload(spec, {"target_file": "demo.py", "unexpected": True})
+
+
+def test_registry_compiles_validators_once() -> None:
+    spec = TaskRegistry(Path("configs/tasks")).get("append_hello_agent_comment")
+    compiled = spec._validators
+
+    validate_task_payload(spec, {"target_file": "demo.py"})
+
+    assert compiled is not None
+    assert spec._validators is compiled
+
+
+def test_output_validation_checks_required_fields_and_types() -> None:
+    spec = TaskRegistry(Path("configs/tasks")).get("extract_top10_en_news")
+
+    validate_task_output(spec, {"items_en": [], "selection_notes": None, "extra": 1})
+    with pytest.raises(ValidationError):
+        validate_task_output(spec, {"selection_notes": "x"})
+    with pytest.raises(ValidationError):
+        validate_task_output(spec, {"items_en": "not a list"})